@@ -0,0 +1,172 @@
+"""
+Estado de cuenta de un cliente calculado en la base de datos.
+
+Los movimientos (liquidaciones como débitos, pagos como créditos) se leen con
+una sola consulta UNION ALL cuyo saldo acumulado sale de
+SUM(...) OVER (ORDER BY fecha, orden, id), y se entregan de a bloques desde un
+cursor (del lado del servidor en PostgreSQL). El estado de cuenta se pagina
+por rango de fechas: el saldo anterior al período y los totales del período
+salen de un único agregado, que parte del SaldoMensual del mes previo y solo
+suma los movimientos desde el inicio del mes de `desde`.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection, models
+
+from liquidaciones.models import (
+    Banco,
+    Liquidacion,
+    Pago,
+    Procedencia,
+    Proveedor,
+    SaldoMensual,
+)
+
+FECHA_MINIMA = date(1, 1, 1)
+FECHA_MAXIMA = date(9999, 12, 31)
+TAMANO_BLOQUE = 2000
+
+_IMPORTE = models.DecimalField(max_digits=14, decimal_places=2)
+_FECHA = models.DateField()
+_CENTAVOS = Decimal("0.01")
+
+
+def _tablas():
+    return {
+        "liquidacion": Liquidacion._meta.db_table,
+        "pago": Pago._meta.db_table,
+        "proveedor": Proveedor._meta.db_table,
+        "procedencia": Procedencia._meta.db_table,
+        "banco": Banco._meta.db_table,
+        "saldo": SaldoMensual._meta.db_table,
+    }
+
+
+# Débitos y créditos del cliente; `orden` deja las liquidaciones de un día
+# antes que sus pagos, como en el estado de cuenta impreso
+_MOVIMIENTOS = """
+    SELECT l.fecha AS fecha, 0 AS orden, l.id AS id,
+           l.numero_factura_comercial AS factura,
+           COALESCE(pr.nombre, '') AS origen,
+           l.numero_despacho AS prof, l.ad_valorem AS oc,
+           '' AS bco, NULL AS referencia,
+           0 AS pagos, l.total_subtotal AS liquidacion
+    FROM {liquidacion} l
+    INNER JOIN {proveedor} p ON p.id = l.proveedor_id
+    LEFT OUTER JOIN {procedencia} pr ON pr.id = p.procedencia_id
+    WHERE l.cliente_id = %s AND l.fecha >= %s AND l.fecha <= %s
+    UNION ALL
+    SELECT pa.fecha, 1, pa.id,
+           '', '',
+           l.numero_despacho, '',
+           b.nombre, pa.referencia,
+           pa.monto, 0
+    FROM {pago} pa
+    INNER JOIN {liquidacion} l ON l.id = pa.liquidacion_id
+    INNER JOIN {banco} b ON b.id = pa.banco_id
+    WHERE l.cliente_id = %s AND pa.fecha >= %s AND pa.fecha <= %s
+"""
+
+_MOVIMIENTOS_CON_SALDO = """
+SELECT fecha, orden, id, factura, origen, prof, oc, bco, referencia,
+       pagos, liquidacion,
+       SUM(pagos - liquidacion) OVER (ORDER BY fecha, orden, id) AS saldo
+FROM ({movimientos}) movimientos
+ORDER BY fecha, orden, id
+"""
+
+_RESUMEN = """
+SELECT
+    COALESCE((
+        SELECT saldo_cierre FROM {saldo}
+        WHERE cliente_id = %s AND mes < %s
+        ORDER BY mes DESC LIMIT 1
+    ), 0) + COALESCE(SUM(CASE WHEN fecha < %s THEN pagos - liquidacion END), 0),
+    COALESCE(SUM(CASE WHEN fecha >= %s THEN pagos END), 0),
+    COALESCE(SUM(CASE WHEN fecha >= %s THEN liquidacion END), 0)
+FROM ({movimientos}) movimientos
+"""
+
+
+def _importe(valor):
+    """Decimal con 2 decimales (SQLite devuelve las sumas como float)"""
+    return _IMPORTE.to_python(valor).quantize(_CENTAVOS)
+
+
+def _parametros(cliente_id, desde, hasta):
+    desde = connection.ops.adapt_datefield_value(desde)
+    hasta = connection.ops.adapt_datefield_value(hasta)
+    return [cliente_id, desde, hasta] * 2
+
+
+def resumen(cliente_id, desde=None, hasta=None):
+    """
+    Saldo anterior a `desde` y totales de pagos y liquidaciones del período,
+    en una sola consulta. Devuelve un dict con saldo_inicial, total_pagos,
+    total_liquidaciones y total_saldo (saldo al cierre del período).
+    """
+    desde = desde or FECHA_MINIMA
+    hasta = hasta or FECHA_MAXIMA
+    inicio_mes = desde.replace(day=1)
+    tablas = _tablas()
+    sql = _RESUMEN.format(movimientos=_MOVIMIENTOS.format(**tablas), **tablas)
+    inicio = connection.ops.adapt_datefield_value(desde)
+    params = (
+        [cliente_id, connection.ops.adapt_datefield_value(inicio_mes)]
+        + [inicio, inicio, inicio]
+        + _parametros(cliente_id, inicio_mes, hasta)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        saldo_inicial, pagos, liquidaciones = [
+            _importe(valor) for valor in cursor.fetchone()
+        ]
+    return {
+        "saldo_inicial": saldo_inicial,
+        "total_pagos": pagos,
+        "total_liquidaciones": liquidaciones,
+        "total_saldo": saldo_inicial + pagos - liquidaciones,
+    }
+
+
+def movimientos(cliente_id, desde=None, hasta=None, saldo_inicial=Decimal("0")):
+    """
+    Itera los movimientos del período en orden, cada uno como dict con las
+    columnas del estado de cuenta y el `saldo` acumulado (partiendo de
+    `saldo_inicial`). Las filas se leen de a TAMANO_BLOQUE.
+    """
+    sql = _MOVIMIENTOS_CON_SALDO.format(
+        movimientos=_MOVIMIENTOS.format(**_tablas())
+    )
+    params = _parametros(cliente_id, desde or FECHA_MINIMA, hasta or FECHA_MAXIMA)
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            filas = cursor.fetchmany(TAMANO_BLOQUE)
+            if not filas:
+                break
+            for fila in filas:
+                yield _movimiento(fila, saldo_inicial)
+
+
+def _movimiento(fila, saldo_inicial):
+    (fecha, orden, pk, factura, origen, prof, oc, bco, referencia,
+     pagos, liquidacion, saldo) = fila
+    fecha = _FECHA.to_python(fecha)
+    es_pago = orden == 1
+    return {
+        "fecha": fecha,
+        "tipo": "pago" if es_pago else "liquidacion",
+        "id": pk,
+        "factura": factura,
+        "origen": origen,
+        "prof": prof,
+        "oc": oc,
+        "bco": bco[:3].upper(),
+        "referencia": referencia or fecha.strftime("%y%m%d"),
+        "pagos": _importe(pagos),
+        "liquidacion": _importe(liquidacion),
+        "saldo": saldo_inicial + _importe(saldo),
+    }
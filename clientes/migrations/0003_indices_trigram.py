@@ -0,0 +1,18 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from sgb.search import CrearIndiceTrigram
+
+
+class Migration(migrations.Migration):
+    """Índices pg_trgm para las búsquedas con icontains (solo PostgreSQL)."""
+
+    dependencies = [
+        ("clientes", "0002_cliente_numero_liquidacion_alter_cliente_email"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        CrearIndiceTrigram("cliente", "nombre", "clientes_cliente_nombre_trgm"),
+        CrearIndiceTrigram("cliente", "ruc", "clientes_cliente_ruc_trgm"),
+    ]
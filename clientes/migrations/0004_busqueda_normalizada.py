@@ -0,0 +1,26 @@
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+from sgb.search import BorrarIndiceTrigram, CrearFuncionUnaccent, CrearIndiceNormalizado
+
+
+class Migration(migrations.Migration):
+    """
+    Índices pg_trgm sobre LOWER(sgb_unaccent(columna)) para las búsquedas sin
+    acentos, en lugar de los de UPPER(columna) de 0003 (solo PostgreSQL).
+    """
+
+    dependencies = [
+        ("clientes", "0003_indices_trigram"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        CrearFuncionUnaccent(),
+        BorrarIndiceTrigram("cliente", "nombre", "clientes_cliente_nombre_trgm"),
+        BorrarIndiceTrigram("cliente", "ruc", "clientes_cliente_ruc_trgm"),
+        CrearIndiceNormalizado("cliente", "nombre", "cliente_nombre_normalizado_trgm"),
+        CrearIndiceNormalizado("cliente", "ruc", "cliente_ruc_normalizado_trgm"),
+        CrearIndiceNormalizado("cliente", "email", "cliente_email_normalizado_trgm"),
+    ]
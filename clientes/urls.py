@@ -13,4 +13,5 @@ urlpatterns = [
     
     # Estado de cuenta URL
     path('estado-cuenta/<int:cliente_id>/', views.estado_cuenta, name='estado_cuenta'),
+    path('estado-cuenta/<int:cliente_id>/exportar/', views.estado_cuenta_export, name='estado_cuenta_export'),
 ]
\ No newline at end of file
@@ -1,85 +1,127 @@
-from decimal import Decimal
+from datetime import date
+from itertools import islice
+import logging
 
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.template.loader import render_to_string
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db import models
+from django.utils.dateparse import parse_date
 
-from liquidaciones.models import Liquidacion, Pago
+from liquidaciones import exportar
+from sgb.search import buscar
 
+from . import estado_cuenta as estado
 from .models import Cliente
 from .forms import ClienteForm
 
+logger = logging.getLogger(__name__)
+
+# Lugar de las filas de movimientos en clientes/estado_cuenta.html
+MARCA_MOVIMIENTOS = "<!-- movimientos -->"
+TAMANO_BLOQUE = 500
+
+
+def _fecha(valor):
+    try:
+        return parse_date(valor or "")
+    except ValueError:
+        return None
+
+
+def _periodo(request):
+    """
+    Rango de fechas del estado de cuenta: ?desde= y ?hasta= (AAAA-MM-DD); sin
+    ninguno de los dos, todo el historial del cliente.
+    """
+    return _fecha(request.GET.get("desde")), _fecha(request.GET.get("hasta"))
+
+
+def _cliente_y_periodo(request, cliente_id):
+    return (get_object_or_404(Cliente, id=cliente_id), *_periodo(request))
+
 
 def estado_cuenta(request, cliente_id):
-    cliente = get_object_or_404(Cliente, id=cliente_id)
-    liquidaciones = Liquidacion.objects.filter(cliente=cliente).select_related('proveedor__procedencia').prefetch_related('liquidacionitem_set').order_by("fecha")
-    pagos = Pago.objects.filter(liquidacion__cliente=cliente).select_related('liquidacion', 'banco').order_by("fecha")
-
-    # Create a comprehensive list combining liquidaciones and pagos
-    account_entries = []
-
-    # Add liquidaciones as debits
-    for liquidacion in liquidaciones:
-        account_entries.append(
-            {
-                "fecha": liquidacion.fecha,
-                "tipo": "liquidacion",
-                "factura": liquidacion.numero_factura_comercial,
-                "origen": liquidacion.procedencia.nombre,
-                "prof": liquidacion.numero_despacho,
-                "oc": liquidacion.ad_valorem,
-                "bco": "",
-                "referencia": liquidacion.fecha.strftime("%y%m%d"),
-                "pagos": Decimal("0"),
-                "liquidacion": liquidacion.valor_total_calculado,
-                "liquidacion_obj": liquidacion,
-            }
-        )
-
-    # Add pagos as credits
-    for pago in pagos:
-        account_entries.append(
-            {
-                "fecha": pago.fecha,
-                "tipo": "pago",
-                "factura": "",
-                "origen": "",
-                "prof": pago.liquidacion.numero_despacho,  # Get numero_despacho from related liquidacion
-                "oc": "",
-                "bco": pago.banco.nombre[:3].upper(),
-                "referencia": pago.referencia or pago.fecha.strftime("%y%m%d"),
-                "pagos": pago.monto,
-                "liquidacion": Decimal("0"),
-                "pago_obj": pago,
-            }
-        )
-
-    # Sort all entries by date
-    account_entries.sort(key=lambda x: x["fecha"])
-
-    # Calculate running balance and totals
-    total_pagos = Decimal("0")
-    total_liquidaciones = Decimal("0")
-    running_balance = Decimal("0")
-
-    for entry in account_entries:
-        total_pagos += entry["pagos"]
-        total_liquidaciones += entry["liquidacion"]
-        running_balance += entry["pagos"] - entry["liquidacion"]
-        entry["saldo"] = running_balance
-
-    total_saldo = total_pagos - total_liquidaciones
+    """
+    La página se envía en streaming: la plantilla se renderiza sin las filas
+    y los movimientos se intercalan en MARCA_MOVIMIENTOS de a bloques de
+    TAMANO_BLOQUE, a medida que se leen del cursor. Así un historial largo no
+    se arma entero en memoria.
+    """
+    cliente, desde, hasta = _cliente_y_periodo(request, cliente_id)
+
+    # Saldo anterior y totales del período en un solo agregado; los
+    # movimientos se leen de a bloques con el saldo acumulado ya calculado
+    totales = estado.resumen(cliente.pk, desde, hasta)
+    entradas = estado.movimientos(
+        cliente.pk, desde, hasta, saldo_inicial=totales["saldo_inicial"]
+    )
+    primera = next(entradas, None)
 
     context = {
         "cliente": cliente,
-        "account_entries": account_entries,
-        "total_pagos": total_pagos,
-        "total_liquidaciones": total_liquidaciones,
-        "total_saldo": total_saldo,
+        "sin_movimientos": primera is None,
+        "desde": desde,
+        "hasta": hasta,
+        **totales,
     }
-
-    return render(request, "clientes/estado_cuenta.html", context)
+    # Navegación año a año cuando el período es un año calendario
+    if desde and hasta and (desde, hasta) == (date(desde.year, 1, 1), date(desde.year, 12, 31)):
+        context["anio_anterior"] = desde.year - 1
+        context["anio_siguiente"] = desde.year + 1
+    pagina = render_to_string("clientes/estado_cuenta.html", context, request)
+
+    def contenido():
+        if primera is None:
+            yield pagina
+            return
+        antes, despues = pagina.split(MARCA_MOVIMIENTOS, 1)
+        yield antes
+        bloque = [primera, *islice(entradas, TAMANO_BLOQUE - 1)]
+        while bloque:
+            yield render_to_string(
+                "clientes/estado_cuenta_filas.html", {"account_entries": bloque}
+            )
+            bloque = list(islice(entradas, TAMANO_BLOQUE))
+        yield despues
+
+    return StreamingHttpResponse(contenido())
+
+
+def estado_cuenta_export(request, cliente_id):
+    """Exporta el estado de cuenta del período (CSV o XLSX, en streaming)"""
+    cliente, desde, hasta = _cliente_y_periodo(request, cliente_id)
+    totales = estado.resumen(cliente.pk, desde, hasta)
+    columnas = [
+        ("Fecha", exportar.FECHA),
+        ("Factura", exportar.TEXTO),
+        ("Origen", exportar.TEXTO),
+        ("Prof.", exportar.TEXTO),
+        ("OC", exportar.TEXTO),
+        ("Bco", exportar.TEXTO),
+        ("Referencia", exportar.TEXTO),
+        ("Pagos", exportar.ENTERO),
+        ("Liquidación", exportar.ENTERO),
+        ("Saldo", exportar.ENTERO),
+    ]
+    claves = ["fecha", "factura", "origen", "prof", "oc", "bco", "referencia",
+              "pagos", "liquidacion", "saldo"]
+
+    def filas():
+        yield [desde, "", "", "", "", "", "Saldo anterior", None, None, totales["saldo_inicial"]]
+        for entry in estado.movimientos(
+            cliente.pk, desde, hasta, saldo_inicial=totales["saldo_inicial"]
+        ):
+            # Como en la pantalla, pagos y liquidación en cero quedan vacíos
+            entry["pagos"] = entry["pagos"] or None
+            entry["liquidacion"] = entry["liquidacion"] or None
+            yield [entry[clave] for clave in claves]
+        yield [hasta, "", "", "", "", "", "Totales",
+               totales["total_pagos"], totales["total_liquidaciones"], totales["total_saldo"]]
+
+    nombre = f"estado_cuenta_{cliente.pk}_{desde or 'inicio'}_{hasta or 'hoy'}"
+    return exportar.exportar(request, nombre, columnas, filas())
 
 
 def cliente_list(request):
@@ -88,11 +130,7 @@ def cliente_list(request):
     # Search functionality
     search = request.GET.get('search', '')
     if search:
-        clientes = clientes.filter(
-            models.Q(nombre__icontains=search) |
-            models.Q(ruc__icontains=search) |
-            models.Q(email__icontains=search)
-        )
+        clientes = buscar(clientes, search, ['nombre', 'ruc', 'email'])
     
     # Pagination
     paginator = Paginator(clientes, 10)  # Show 10 clientes per page
@@ -117,14 +155,11 @@ def cliente_create(request):
                 messages.success(request, f'Cliente {cliente.nombre} creado exitosamente.')
                 return redirect('clientes:cliente_list')
                 
-            except Exception as e:
-                print(f"❌ ERROR DURING CLIENTE SAVE: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error al crear el cliente")
                 messages.error(request, 'Error al crear el cliente.')
         else:
-            print("=== CLIENTE FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
+            logger.info("Formulario de cliente inválido: %s", form.errors.get_json_data())
             if form.errors:
                 messages.error(request, f'Error en el formulario: {form.errors}')
     else:
@@ -154,14 +189,11 @@ def cliente_edit(request, pk):
                 messages.success(request, 'Cliente actualizado exitosamente.')
                 return redirect('clientes:cliente_detail', pk=cliente.pk)
                 
-            except Exception as e:
-                print(f"❌ ERROR DURING CLIENTE UPDATE: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error al actualizar el cliente %s", cliente.pk)
                 messages.error(request, 'Error al actualizar el cliente.')
         else:
-            print("=== CLIENTE FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
+            logger.info("Formulario de cliente inválido: %s", form.errors.get_json_data())
             if form.errors:
                 messages.error(request, f'Error en el formulario: {form.errors}')
     else:
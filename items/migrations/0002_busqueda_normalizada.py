@@ -0,0 +1,19 @@
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+from sgb.search import CrearFuncionUnaccent, CrearIndiceNormalizado
+
+
+class Migration(migrations.Migration):
+    """Índice pg_trgm sin acentos para la búsqueda de items (solo PostgreSQL)."""
+
+    dependencies = [
+        ("items", "0001_initial"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        CrearFuncionUnaccent(),
+        CrearIndiceNormalizado("item", "descripcion", "item_descripcion_normalizado_trgm"),
+    ]
@@ -1,8 +1,9 @@
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db import models
 from django.shortcuts import get_object_or_404, redirect, render
 
+from sgb.search import buscar
+
 from .forms import ItemForm
 from .models import Item
 
@@ -13,7 +14,7 @@ def item_list(request):
     # Search functionality
     search = request.GET.get('search', '')
     if search:
-        items = items.filter(descripcion__icontains=search)
+        items = buscar(items, search, ['descripcion'])
     
     # Pagination
     paginator = Paginator(items, 10)  # Show 10 items per page
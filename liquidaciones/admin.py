@@ -43,12 +43,20 @@ class LiquidacionAdmin(admin.ModelAdmin):
         "cliente",
         "clase",
         "valor_imponible",
+        "valor_total",
     )
     list_filter = ("fecha", "clase", "moneda_valor_imponible")
+    list_select_related = ("cliente",)
     search_fields = ("numero_liquidacion", "cliente__nombre", "numero_despacho")
     inlines = [LiquidacionItemInline]
     date_hierarchy = "fecha"
 
+    def valor_total(self, obj):
+        return obj.valor_total_calculado
+
+    valor_total.short_description = "Valor Total"
+    valor_total.admin_order_field = "total_subtotal"
+
 
 @admin.register(Banco)
 class BancoAdmin(admin.ModelAdmin):
@@ -67,6 +75,7 @@ class PagoAdmin(admin.ModelAdmin):
         "referencia",
     )
     list_filter = ("fecha", "banco", "liquidacion__cliente")
+    list_select_related = ("liquidacion__cliente", "banco")
     search_fields = (
         "liquidacion__numero_despacho",
         "liquidacion__cliente__nombre",
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class LiquidacionesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "liquidaciones"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from sgb.search import registrar_funciones
+
+        from . import signals  # noqa: F401
+
+        connection_created.connect(registrar_funciones, dispatch_uid="sgb.search")
@@ -0,0 +1,90 @@
+"""
+Autocompletados de las vistas api/*-autocomplete (ver sgb.autocompletar).
+Los mantiene al día liquidaciones.signals.
+"""
+
+from clientes.models import Cliente
+from sgb.autocompletar import Autocompletado
+from sgb.search import buscar
+
+from .models import Liquidacion, LiquidacionQuerySet, PlanillaGastos, Proveedor
+
+
+def formato_monto(monto):
+    """Monto con separador de miles y sin decimales"""
+    return f"{int(monto):,}".replace(",", ".")
+
+
+class Clientes(Autocompletado):
+    nombre = "cliente"
+    campos = ("nombre",)
+
+    def queryset(self):
+        return Cliente.objects.all()
+
+    def buscar_en_base(self, consulta):
+        return buscar(self.queryset(), consulta, ["nombre"])
+
+    def formatear(self, cliente):
+        return {"id": cliente.id, "text": cliente.nombre}
+
+
+class Proveedores(Autocompletado):
+    nombre = "proveedor"
+    campos = ("nombre", "procedencia__nombre")
+
+    def queryset(self):
+        return Proveedor.objects.select_related("procedencia")
+
+    def buscar_en_base(self, consulta):
+        return buscar(self.queryset(), consulta, ["nombre", "procedencia__nombre"])
+
+    def formatear(self, proveedor):
+        procedencia = proveedor.procedencia.nombre if proveedor.procedencia else "Sin especificar"
+        return {"id": proveedor.id, "text": f"{proveedor.nombre} ({procedencia})"}
+
+
+class Liquidaciones(Autocompletado):
+    nombre = "liquidacion"
+    campos = tuple(LiquidacionQuerySet.CAMPOS_BUSQUEDA)
+
+    def queryset(self):
+        return Liquidacion.objects.select_related("cliente")
+
+    def buscar_en_base(self, consulta):
+        return self.queryset().buscar(consulta)
+
+    def formatear(self, liquidacion):
+        return {
+            "id": liquidacion.id,
+            "text": (
+                f"{liquidacion.numero_despacho} - {liquidacion.cliente.nombre}: "
+                f"{formato_monto(liquidacion.valor_total_calculado)}"
+            ),
+        }
+
+
+class PlanillasGastos(Autocompletado):
+    nombre = "planilla_gastos"
+    campos = ("numero_planilla",)
+
+    def queryset(self):
+        return PlanillaGastos.objects.all()
+
+    def buscar_en_base(self, consulta):
+        return buscar(self.queryset(), consulta, ["numero_planilla"])
+
+    def formatear(self, planilla):
+        return {
+            "id": planilla.id,
+            "text": (
+                f"{planilla.numero_planilla} - {planilla.fecha} "
+                f"(Total: {planilla.total_gastos:,.0f})"
+            ),
+        }
+
+
+CLIENTES = Clientes()
+PROVEEDORES = Proveedores()
+LIQUIDACIONES = Liquidaciones()
+PLANILLAS_GASTOS = PlanillasGastos()
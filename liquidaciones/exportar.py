@@ -0,0 +1,211 @@
+"""
+Exportación de listados a CSV y XLSX en streaming.
+
+Las filas llegan de un iterable (normalmente `.iterator(chunk_size=...)` o el
+generador del estado de cuenta) y se escriben a medida que el cliente las
+descarga, de modo que la memoria no crece con la cantidad de filas.
+
+El CSV usa `;` como separador y los formatos de number_filters (1.234.567 y
+1.234.567,89), que es lo que espera una planilla configurada para Paraguay.
+El XLSX se arma a mano, sin dependencias: un zip escrito sobre un buffer que
+se vacía en cada bloque, con celdas numéricas y formatos #,##0 / #,##0.00.
+"""
+
+import csv
+from datetime import date
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import Http404, StreamingHttpResponse
+
+from .templatetags.number_filters import format_decimal, format_integer
+
+TEXTO = "texto"
+FECHA = "fecha"
+ENTERO = "entero"
+DECIMAL = "decimal"
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+TAMANO_BLOQUE = 64 * 1024
+# chunk_size de los .iterator() que alimentan las exportaciones
+FILAS_POR_CONSULTA = 2000
+
+
+def exportar(request, nombre, columnas, filas):
+    """
+    StreamingHttpResponse con `filas` en el formato de ?formato= (csv por
+    defecto). `columnas` es una lista de (título, tipo); cada fila es una
+    secuencia con un valor por columna.
+    """
+    formato = request.GET.get("formato", "csv")
+    if formato not in FORMATOS:
+        raise Http404(f"Formato de exportación desconocido: {formato}")
+    contenido = _csv(columnas, filas) if formato == "csv" else _xlsx(columnas, filas)
+    response = StreamingHttpResponse(contenido, content_type=FORMATOS[formato])
+    response["Content-Disposition"] = f'attachment; filename="{nombre}.{formato}"'
+    return response
+
+
+# CSV
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: write() devuelve la línea escrita"""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor, tipo):
+    if valor is None:
+        return ""
+    if tipo == ENTERO:
+        return format_integer(valor)
+    if tipo == DECIMAL:
+        return format_decimal(valor)
+    if tipo == FECHA:
+        return valor.strftime("%d/%m/%Y")
+    return valor
+
+
+def _csv(columnas, filas):
+    escritor = csv.writer(_Eco(), delimiter=";")
+    # BOM para que Excel detecte UTF-8
+    yield "\ufeff" + escritor.writerow([titulo for titulo, _ in columnas])
+    tipos = [tipo for _, tipo in columnas]
+    for fila in filas:
+        yield escritor.writerow(
+            [_valor_csv(valor, tipo) for valor, tipo in zip(fila, tipos)]
+        )
+
+
+# XLSX
+
+
+class BufferStreaming:
+    """
+    Destino de un zip escrito en streaming (sin seek()); vaciar() entrega lo
+    escrito hasta el momento.
+    """
+
+    def __init__(self):
+        self.partes = []
+        self.tamano = 0
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        self.tamano += len(datos)
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b"".join(self.partes)
+        self.partes = []
+        self.tamano = 0
+        return datos
+
+
+_PARTES_XLSX = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Datos" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    ),
+    # Estilos: 0 general, 1 entero, 2 decimal, 3 fecha, 4 encabezado en negrita
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="5">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="3" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        "</cellXfs>"
+        "</styleSheet>"
+    ),
+}
+
+_INICIO_HOJA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+_FIN_HOJA = "</sheetData></worksheet>"
+
+_ESTILOS = {ENTERO: 1, DECIMAL: 2, FECHA: 3}
+_EPOCA_EXCEL = date(1899, 12, 30)
+# Caracteres de control que XML 1.0 no admite
+_NO_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _celda_xlsx(valor, tipo):
+    if valor is None or valor == "":
+        return "<c/>"
+    if tipo == FECHA:
+        return f'<c s="3"><v>{(valor - _EPOCA_EXCEL).days}</v></c>'
+    if tipo in _ESTILOS:
+        return f'<c s="{_ESTILOS[tipo]}"><v>{valor}</v></c>'
+    texto = escape(_NO_XML.sub("", str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _xlsx(columnas, filas):
+    salida = BufferStreaming()
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in _PARTES_XLSX.items():
+            libro.writestr(nombre, contenido)
+        with libro.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja:
+            encabezado = "".join(
+                f'<c t="inlineStr" s="4"><is><t>{escape(titulo)}</t></is></c>'
+                for titulo, _ in columnas
+            )
+            hoja.write(f"{_INICIO_HOJA}<row>{encabezado}</row>".encode())
+            tipos = [tipo for _, tipo in columnas]
+            for fila in filas:
+                celdas = "".join(
+                    _celda_xlsx(valor, tipo) for valor, tipo in zip(fila, tipos)
+                )
+                hoja.write(f"<row>{celdas}</row>".encode())
+                if salida.tamano >= TAMANO_BLOQUE:
+                    yield salida.vaciar()
+            hoja.write(_FIN_HOJA.encode())
+    yield salida.vaciar()
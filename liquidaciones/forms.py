@@ -1,5 +1,7 @@
 from django import forms
 from django.forms import inlineformset_factory
+from clientes.models import Cliente
+
 from .models import Liquidacion, LiquidacionItem, Proveedor, Pago, Banco, Procedencia, PlanillaGastos, PlanillaGastosItem
 
 
@@ -300,4 +302,48 @@ PlanillaGastosItemFormSet = inlineformset_factory(
     form=PlanillaGastosItemForm,
     extra=0,  # No extra forms by default
     can_delete=True
-)
\ No newline at end of file
+)
+
+
+class FiltroPdfLoteForm(forms.Form):
+    """Filtro de liquidaciones para la generación de PDFs por lote"""
+
+    FORMATOS = [("zip", "ZIP (un PDF por liquidación)"), ("pdf", "PDF combinado")]
+
+    cliente = forms.ModelChoiceField(queryset=Cliente.objects.all(), required=False)
+    desde = forms.DateField(required=False)
+    hasta = forms.DateField(required=False)
+    planilla_gastos = forms.ModelChoiceField(
+        queryset=PlanillaGastos.objects.all(), required=False
+    )
+    formato = forms.ChoiceField(choices=FORMATOS, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        filtros = ("cliente", "desde", "hasta", "planilla_gastos")
+        if not any(cleaned_data.get(campo) for campo in filtros):
+            raise forms.ValidationError(
+                "Indique al menos un filtro: cliente, rango de fechas o planilla de gastos."
+            )
+        cleaned_data["formato"] = cleaned_data.get("formato") or "zip"
+        return cleaned_data
+
+    def filtros(self):
+        return {
+            campo: self.cleaned_data[campo]
+            for campo in ("cliente", "desde", "hasta", "planilla_gastos")
+        }
+
+
+class TrabajoPdfForm(FiltroPdfLoteForm):
+    """Pedido de PDF en segundo plano: una liquidación o un lote filtrado"""
+
+    liquidacion = forms.ModelChoiceField(
+        queryset=Liquidacion.objects.all(), required=False
+    )
+
+    def clean(self):
+        if self.cleaned_data.get("liquidacion"):
+            self.cleaned_data["formato"] = "pdf"
+            return self.cleaned_data
+        return super().clean()
@@ -0,0 +1,145 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+# Variables de entorno de cada modo de --comparar (ver _database() en settings)
+MODOS = {
+    "sin persistencia": {"DB_CONN_MAX_AGE": "0", "DB_POOL": "0"},
+    "persistentes": {"DB_CONN_MAX_AGE": "600", "DB_POOL": "0"},
+    "pool": {"DB_POOL": "1"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia (p50/p95/p99) de una URL, por defecto el autocompletado "
+        "de clientes, pasando cada petición por el handler WSGI completo para "
+        "que se abran y cierren las conexiones como en producción. Con "
+        "--comparar repite la medición sin conexiones persistentes, con "
+        "DB_CONN_MAX_AGE y con el pool de conexiones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--peticiones",
+            type=int,
+            default=300,
+            help="Peticiones a medir (por defecto 300).",
+        )
+        parser.add_argument(
+            "--url",
+            default="/liquidaciones/api/cliente-autocomplete/?q=a",
+            help="URL a pedir (por defecto el autocompletado de clientes).",
+        )
+        parser.add_argument(
+            "--comparar",
+            action="store_true",
+            help="Mide cada modo de conexión en un proceso aparte.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Escribe el resultado como JSON.",
+        )
+
+    def handle(self, *args, **options):
+        if options["peticiones"] < 2:
+            raise CommandError("--peticiones debe ser al menos 2")
+
+        if options["comparar"]:
+            resultados = {
+                modo: self._en_subproceso(variables, options)
+                for modo, variables in MODOS.items()
+            }
+        else:
+            resultados = {"actual": self._medir(options["url"], options["peticiones"])}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(resultados))
+            return
+        for modo, resultado in resultados.items():
+            self.stdout.write(
+                f"{modo}: p50 {resultado['p50']:.2f} ms, p95 {resultado['p95']:.2f} ms, "
+                f"p99 {resultado['p99']:.2f} ms, {resultado['conexiones']} conexión(es) "
+                f"nuevas en {resultado['peticiones']} peticiones "
+                f"({resultado['engine']}, CONN_MAX_AGE={resultado['conn_max_age']})"
+            )
+
+    def _medir(self, url, peticiones):
+        handler = WSGIHandler()
+        ruta, _, consulta = url.partition("?")
+        conexiones = 0
+
+        def contar(sender, connection, **kwargs):
+            nonlocal conexiones
+            conexiones += 1
+
+        connection_created.connect(contar)
+        try:
+            self._pedir(handler, ruta, consulta)
+            conexiones = 0
+            tiempos = []
+            for _ in range(peticiones):
+                inicio = time.perf_counter()
+                self._pedir(handler, ruta, consulta)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+        finally:
+            connection_created.disconnect(contar)
+
+        percentiles = statistics.quantiles(tiempos, n=100, method="inclusive")
+        return {
+            "engine": connection.settings_dict["ENGINE"],
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "peticiones": peticiones,
+            "conexiones": conexiones,
+            "p50": percentiles[49],
+            "p95": percentiles[94],
+            "p99": percentiles[98],
+        }
+
+    def _pedir(self, handler, ruta, consulta):
+        environ = {
+            "PATH_INFO": ruta,
+            "QUERY_STRING": consulta,
+            "HTTP_HOST": settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost",
+            "wsgi.input": BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        estado = []
+        respuesta = handler(environ, lambda status, headers, exc_info=None: estado.append(status))
+        try:
+            for _ in respuesta:
+                pass
+        finally:
+            # close() dispara request_finished, que cierra o conserva la conexión
+            respuesta.close()
+        if not estado[0].startswith("200"):
+            raise CommandError(f"{ruta}?{consulta} respondió {estado[0]}")
+
+    def _en_subproceso(self, variables, options):
+        comando = [
+            sys.executable, "-m", "django", "benchmark_conexiones", "--json",
+            "--peticiones", str(options["peticiones"]), "--url", options["url"],
+        ]
+        entorno = {
+            **os.environ,
+            **variables,
+            "DJANGO_SETTINGS_MODULE": os.environ.get(
+                "DJANGO_SETTINGS_MODULE", "sgb.settings"
+            ),
+        }
+        proceso = subprocess.run(comando, env=entorno, capture_output=True, text=True)
+        if proceso.returncode:
+            raise CommandError(proceso.stderr.strip().splitlines()[-1])
+        return json.loads(proceso.stdout)["actual"]
@@ -0,0 +1,47 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from liquidaciones.pdf_utils import numero_a_letras
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide numero_a_letras sobre importes aleatorios con centavos (hasta "
+        "mil millones por defecto)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cantidad",
+            type=int,
+            default=1_000_000,
+            help="Importes a convertir (por defecto 1.000.000).",
+        )
+        parser.add_argument(
+            "--maximo",
+            type=int,
+            default=10**9,
+            help="Importe máximo (por defecto 1.000.000.000).",
+        )
+        parser.add_argument("--semilla", type=int, default=0)
+
+    def handle(self, *args, **options):
+        generador = random.Random(options["semilla"])
+        centavos = options["maximo"] * 100
+        importes = [
+            Decimal(generador.randrange(centavos)) / 100
+            for _ in range(options["cantidad"])
+        ]
+
+        inicio = time.perf_counter()
+        for importe in importes:
+            numero_a_letras(importe)
+        segundos = time.perf_counter() - inicio
+
+        self.stdout.write(
+            f"{len(importes)} importes en {segundos:.2f} s "
+            f"({segundos / len(importes) * 1_000_000:.2f} µs por importe)"
+        )
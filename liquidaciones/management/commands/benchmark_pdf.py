@@ -0,0 +1,95 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from clientes.models import Cliente
+from liquidaciones import pdf_lote, pdf_utils
+from liquidaciones.models import Liquidacion, LiquidacionItem, Moneda, Proveedor
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de CPU por PDF de liquidación con 1 y 100 items, "
+        "como antes del kit de render (estilos y logo armados en cada "
+        "documento, streams en ASCII85) y reutilizando el kit del proceso. "
+        "Los datos de prueba se crean en una transacción que se revierte al "
+        "terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=20,
+            help="PDFs a generar por caso (por defecto 20).",
+        )
+        parser.add_argument(
+            "--items",
+            type=int,
+            nargs="+",
+            default=[1, 100],
+            help="Cantidades de items a medir (por defecto 1 y 100).",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeticiones"] < 1:
+            raise CommandError("--repeticiones debe ser al menos 1")
+
+        with transaction.atomic():
+            for cantidad in options["items"]:
+                liquidacion = self._liquidacion(cantidad)
+                antes = self._medir(
+                    liquidacion, pdf_utils.crear_kit_render, options["repeticiones"], ascii85=True
+                )
+                despues = self._medir(
+                    liquidacion, pdf_utils.kit_render, options["repeticiones"]
+                )
+                self.stdout.write(
+                    f"{cantidad} item(s): antes {antes:.2f} ms, "
+                    f"kit del proceso {despues:.2f} ms ({antes / despues:.2f}x)"
+                )
+            transaction.set_rollback(True)
+
+    def _medir(self, liquidacion, kit, repeticiones, ascii85=False):
+        """Mediana en milisegundos de CPU por documento"""
+        pdf_utils.generar_pdf_liquidacion(liquidacion, kit=kit(), ascii85=ascii85)
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.process_time()
+            pdf_utils.generar_pdf_liquidacion(liquidacion, kit=kit(), ascii85=ascii85)
+            tiempos.append((time.process_time() - inicio) * 1000)
+        return statistics.median(tiempos)
+
+    def _liquidacion(self, cantidad_items):
+        moneda, _ = Moneda.objects.get_or_create(codigo="USD", defaults={"nombre": "Dólar"})
+        liquidacion = Liquidacion.objects.create(
+            fecha="2026-01-15",
+            cliente=Cliente.objects.create(nombre="Cliente Benchmark S.A.", ruc="80000000-1"),
+            numero_liquidacion=f"BENCH-{cantidad_items}",
+            numero_despacho="DES-BENCH",
+            clase=Liquidacion.ClaseChoices.IMPORTACION,
+            numero_factura_comercial="FAC-BENCH",
+            partida_arancelaria="8471.30.12",
+            ad_valorem="10%",
+            valor_imponible=Decimal("12500.00"),
+            moneda_valor_imponible=moneda,
+            moneda_factura=moneda,
+            equivalente_gs=Decimal("92500000"),
+            tipo_cambio_despacho="7400",
+            tipo_cambio_factura="7410",
+            proveedor=Proveedor.objects.create(nombre="Proveedor Benchmark Ltda."),
+        )
+        LiquidacionItem.objects.bulk_create(
+            LiquidacionItem(
+                liquidacion=liquidacion,
+                item=f"Gasto de despacho número {i + 1}",
+                monto=Decimal("150000") + i,
+                iva=Decimal("15000"),
+                retencion=Decimal("1500") if i % 10 == 0 else Decimal("0"),
+            )
+            for i in range(cantidad_items)
+        )
+        return pdf_lote.liquidaciones_para_pdf().get(pk=liquidacion.pk)
@@ -0,0 +1,286 @@
+import json
+import statistics
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from clientes.models import Cliente
+from liquidaciones import autocompletar, sembrado
+from liquidaciones.models import (
+    Liquidacion,
+    LiquidacionItem,
+    Pago,
+    PlanillaGastos,
+    Proveedor,
+)
+from sgb.consultas import medir
+
+
+def _url(nombre, *args, **parametros):
+    url = reverse(nombre, args=args)
+    return f"{url}?{urlencode(parametros)}" if parametros else url
+
+
+# (nombre, URL a partir de los objetos de _objetos()); None si no aplica
+CASOS = [
+    ("dashboard", lambda o: _url("dashboard")),
+    ("liquidacion_list", lambda o: _url("liquidacion_list")),
+    ("liquidacion_list_total", lambda o: _url("liquidacion_list", orden="-total")),
+    ("liquidacion_list_busqueda", lambda o: _url("liquidacion_list", search=o["texto"])),
+    ("liquidacion_detail", lambda o: _url("liquidacion_detail", o["liquidacion"].pk)),
+    ("liquidacion_pdf", lambda o: _url("liquidacion_pdf", o["liquidacion"].pk)),
+    (
+        "liquidacion_export_busqueda",
+        lambda o: _url("liquidacion_export", formato="csv", search=o["texto"]),
+    ),
+    ("pago_list", lambda o: _url("pago_list")),
+    ("planilla_gastos_list", lambda o: _url("planilla_gastos_list")),
+    (
+        "planilla_gastos_detail",
+        lambda o: o["planilla"] and _url("planilla_gastos_detail", o["planilla"].pk),
+    ),
+    ("cliente_list", lambda o: _url("clientes:cliente_list")),
+    ("cliente_list_busqueda", lambda o: _url("clientes:cliente_list", search=o["texto"])),
+    ("estado_cuenta", lambda o: _url("clientes:estado_cuenta", o["cliente"].pk)),
+    (
+        "estado_cuenta_export",
+        lambda o: _url("clientes:estado_cuenta_export", o["cliente"].pk, formato="csv"),
+    ),
+    ("cliente_autocomplete", lambda o: _url("cliente_autocomplete", q=o["texto"])),
+    (
+        "proveedor_autocomplete",
+        lambda o: _url("proveedor_autocomplete", q=o["liquidacion"].proveedor.nombre[:4]),
+    ),
+    (
+        "liquidacion_autocomplete",
+        lambda o: _url("liquidacion_autocomplete", q=o["liquidacion"].numero_liquidacion[-4:]),
+    ),
+    (
+        "planilla_gastos_autocomplete",
+        lambda o: o["planilla"]
+        and _url("planilla_gastos_autocomplete", q=o["planilla"].numero_planilla[-4:]),
+    ),
+]
+CONTEOS = {
+    "liquidaciones": Liquidacion,
+    "items": LiquidacionItem,
+    "pagos": Pago,
+    "clientes": Cliente,
+    "proveedores": Proveedor,
+    "planillas": PlanillaGastos,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de las vistas principales, los autocompletados, el PDF "
+        "de liquidación y el estado de cuenta (el del cliente con más "
+        "liquidaciones), con la base actual o llevándola a cada tamaño de "
+        "--tamanos con sembrado.sembrar() (esos datos quedan en la base). Por "
+        "caso informa la primera petición con las caches vacías, la mediana, "
+        "p95 y máximo de las siguientes y las consultas SQL; --salida guarda "
+        "el resultado como JSON y --comparar lo compara con uno anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            type=int,
+            nargs="+",
+            help=(
+                "Cantidades de liquidaciones a medir, de menor a mayor; se "
+                "siembra lo que falte (por defecto se mide la base como está)."
+            ),
+        )
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=10,
+            help="Peticiones a medir por caso, después de la primera (por defecto 10).",
+        )
+        parser.add_argument(
+            "--casos",
+            nargs="+",
+            choices=[nombre for nombre, _ in CASOS],
+            metavar="CASO",
+            help="Casos a medir (por defecto todos).",
+        )
+        parser.add_argument("--salida", help="Archivo donde guardar el resultado en JSON.")
+        parser.add_argument(
+            "--comparar",
+            help="Resultado JSON anterior con el que comparar las medianas.",
+        )
+        parser.add_argument(
+            "--semilla",
+            type=int,
+            default=0,
+            help="Semilla de los datos sembrados (por defecto 0).",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeticiones"] < 2:
+            raise CommandError("--repeticiones debe ser al menos 2")
+        anterior = None
+        if options["comparar"]:
+            try:
+                with open(options["comparar"]) as archivo:
+                    anterior = json.load(archivo)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"No se pudo leer {options['comparar']}: {error}")
+        casos = [
+            (nombre, url)
+            for nombre, url in CASOS
+            if not options["casos"] or nombre in options["casos"]
+        ]
+
+        resultado = {
+            "fecha": timezone.now().isoformat(timespec="seconds"),
+            "motor": connection.vendor,
+            "repeticiones": options["repeticiones"],
+            "tamanos": [],
+        }
+        for tamano in options["tamanos"] or [None]:
+            if tamano is not None:
+                self._sembrar_hasta(tamano, options["semilla"])
+            medicion = self._medir_tamano(casos, options["repeticiones"])
+            resultado["tamanos"].append(medicion)
+            self._escribir(medicion)
+
+        if options["salida"]:
+            with open(options["salida"], "w") as archivo:
+                json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        if anterior:
+            self._comparar(anterior, resultado)
+
+    def _sembrar_hasta(self, tamano, semilla):
+        actuales = Liquidacion.objects.count()
+        if actuales >= tamano:
+            return
+        inicio = time.perf_counter()
+        # Otra semilla por tramo: cada tramo genera valores distintos
+        sembrado.sembrar(sembrado.volumenes(tamano - actuales), semilla=semilla + actuales)
+        self.stdout.write(
+            f"Sembradas {tamano - actuales} liquidaciones en "
+            f"{time.perf_counter() - inicio:.1f} s"
+        )
+
+    def _objetos(self):
+        liquidacion = (
+            Liquidacion.objects.select_related("proveedor").order_by("-pk").first()
+        )
+        if liquidacion is None:
+            raise CommandError("No hay liquidaciones: usar --tamanos o seed_bench")
+        mayor = (
+            Liquidacion.objects.order_by()
+            .values("cliente")
+            .annotate(cantidad=Count("pk"))
+            .order_by("-cantidad")
+            .values_list("cliente", flat=True)
+            .first()
+        )
+        cliente = Cliente.objects.get(pk=mayor)
+        return {
+            "liquidacion": liquidacion,
+            "cliente": cliente,
+            "planilla": PlanillaGastos.objects.order_by("-pk").first(),
+            # Palabra del nombre del cliente, para las búsquedas
+            "texto": max(cliente.nombre.split(), key=len),
+        }
+
+    def _medir_tamano(self, casos, repeticiones):
+        medicion = {nombre: modelo.objects.count() for nombre, modelo in CONTEOS.items()}
+        medicion["casos"] = {}
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost"
+        if host in ("*", ".localhost"):
+            host = "localhost"
+        with transaction.atomic():
+            objetos = self._objetos()
+            cliente = Client(HTTP_HOST=host)
+            cliente.force_login(User.objects.create_user("benchmark_vistas"))
+            for nombre, url in casos:
+                url = url(objetos)
+                if url:
+                    medicion["casos"][nombre] = self._medir(cliente, url, repeticiones)
+            transaction.set_rollback(True)
+        return medicion
+
+    def _medir(self, cliente, url, repeticiones):
+        # Primera petición sin caches ni índices de autocompletado
+        for cache in caches.all():
+            cache.clear()
+        for autocompletado in (
+            autocompletar.CLIENTES,
+            autocompletar.PROVEEDORES,
+            autocompletar.LIQUIDACIONES,
+            autocompletar.PLANILLAS_GASTOS,
+        ):
+            autocompletado.descartar()
+        primera, consultas, tamano = self._pedir(cliente, url)
+        tiempos = [self._pedir(cliente, url)[0] for _ in range(repeticiones)]
+        percentiles = statistics.quantiles(tiempos, n=100, method="inclusive")
+        return {
+            "url": url,
+            "primera_ms": round(primera, 2),
+            "p50_ms": round(percentiles[49], 2),
+            "p95_ms": round(percentiles[94], 2),
+            "max_ms": round(max(tiempos), 2),
+            "consultas": consultas,
+            "bytes": tamano,
+        }
+
+    def _pedir(self, cliente, url):
+        with medir() as medicion:
+            inicio = time.perf_counter()
+            response = cliente.get(url)
+            if response.streaming:
+                contenido = b"".join(response.streaming_content)
+            else:
+                contenido = response.content
+            duracion = (time.perf_counter() - inicio) * 1000
+        if response.status_code != 200:
+            raise CommandError(f"{url} respondió {response.status_code}")
+        return duracion, medicion.consultas, len(contenido)
+
+    def _escribir(self, medicion):
+        self.stdout.write(
+            ", ".join(f"{medicion[nombre]} {nombre}" for nombre in CONTEOS)
+        )
+        for nombre, caso in medicion["casos"].items():
+            self.stdout.write(
+                f"  {nombre:30} primera {caso['primera_ms']:9.2f} ms  "
+                f"p50 {caso['p50_ms']:9.2f} ms  p95 {caso['p95_ms']:9.2f} ms  "
+                f"{caso['consultas']:3} consultas"
+            )
+
+    def _comparar(self, anterior, actual):
+        """Medianas del resultado actual contra el tamaño más cercano del anterior"""
+        if not anterior.get("tamanos"):
+            return
+        self.stdout.write(f"Comparación con {anterior['fecha']} ({anterior['motor']}):")
+        for medicion in actual["tamanos"]:
+            previa = min(
+                anterior["tamanos"],
+                key=lambda otra: abs(otra["liquidaciones"] - medicion["liquidaciones"]),
+            )
+            self.stdout.write(
+                f"{medicion['liquidaciones']} liquidaciones "
+                f"(antes {previa['liquidaciones']}):"
+            )
+            for nombre, caso in medicion["casos"].items():
+                antes = previa["casos"].get(nombre)
+                if not antes:
+                    continue
+                cociente = caso["p50_ms"] / antes["p50_ms"] if antes["p50_ms"] else 0
+                self.stdout.write(
+                    f"  {nombre:30} p50 {antes['p50_ms']:9.2f} -> {caso['p50_ms']:9.2f} ms "
+                    f"({cociente:.2f}x)"
+                )
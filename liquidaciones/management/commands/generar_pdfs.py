@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from liquidaciones import pdf_lote
+
+
+def _fecha(valor):
+    fecha = parse_date(valor)
+    if fecha is None:
+        raise ValueError(valor)
+    return fecha
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los PDFs de las liquidaciones del filtro en un ZIP (uno por "
+        "liquidación) o en un único PDF combinado, informando el tiempo de "
+        "cada documento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("salida", help="Archivo .zip o .pdf a generar.")
+        parser.add_argument("--cliente", type=int, help="Id del cliente.")
+        parser.add_argument("--desde", type=_fecha, help="Fecha inicial (AAAA-MM-DD).")
+        parser.add_argument("--hasta", type=_fecha, help="Fecha final (AAAA-MM-DD).")
+        parser.add_argument("--planilla-gastos", type=int, help="Id de la planilla de gastos.")
+        parser.add_argument(
+            "--procesos",
+            type=int,
+            help="Procesos de render para el ZIP (por defecto uno por núcleo; 0 = sin procesos).",
+        )
+
+    def handle(self, *args, **options):
+        filtros = {
+            "cliente": options["cliente"],
+            "desde": options["desde"],
+            "hasta": options["hasta"],
+            "planilla_gastos": options["planilla_gastos"],
+        }
+        if not any(valor is not None for valor in filtros.values()):
+            raise CommandError("Indique al menos un filtro (--cliente, --desde, --hasta o --planilla-gastos)")
+
+        salida = options["salida"]
+        if not salida.endswith((".zip", ".pdf")):
+            raise CommandError("La salida debe terminar en .zip o .pdf")
+
+        inicio = time.perf_counter()
+        liquidaciones = list(pdf_lote.liquidaciones_para_pdf(**filtros))
+        self.stdout.write(
+            f"{len(liquidaciones)} liquidaciones cargadas en {time.perf_counter() - inicio:.2f} s"
+        )
+        if not liquidaciones:
+            return
+
+        tiempos = []
+        inicio = time.perf_counter()
+        with open(salida, "wb") as archivo:
+            if salida.endswith(".pdf"):
+
+                def al_terminar(liquidacion, segundos):
+                    self._informar(pdf_lote.nombre_pdf(liquidacion), segundos, tiempos)
+
+                archivo.write(pdf_lote.pdf_combinado(liquidaciones, al_terminar=al_terminar))
+            else:
+
+                def resultados():
+                    for resultado in pdf_lote.renderizar(liquidaciones, options["procesos"]):
+                        self._informar(resultado.nombre, resultado.segundos, tiempos)
+                        yield resultado
+
+                for bloque in pdf_lote.zip_en_streaming(resultados()):
+                    archivo.write(bloque)
+        total = time.perf_counter() - inicio
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{salida}: {len(tiempos)} documentos en {total:.2f} s "
+                f"(promedio {sum(tiempos) / len(tiempos):.3f} s, máximo {max(tiempos):.3f} s por documento)"
+            )
+        )
+
+    def _informar(self, nombre, segundos, tiempos):
+        tiempos.append(segundos)
+        self.stdout.write(f"  {nombre}: {segundos:.3f} s")
@@ -0,0 +1,56 @@
+from datetime import timedelta
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from liquidaciones import pdf_trabajos
+from liquidaciones.models import TrabajoPdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de PDFs: procesa los TrabajoPdf pendientes en orden "
+        "de llegada y borra los finalizados hace más de PDF_TRABAJOS_DIAS días."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--una-vez",
+            action="store_true",
+            help="Procesa los pendientes y termina, en lugar de esperar nuevos.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Segundos entre consultas cuando la cola está vacía (por defecto 2).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            trabajo = TrabajoPdf.objects.tomar()
+            if trabajo is None:
+                self._purgar()
+                if options["una_vez"]:
+                    return
+                time.sleep(options["intervalo"])
+                continue
+
+            inicio = time.perf_counter()
+            if pdf_trabajos.procesar(trabajo):
+                self.stdout.write(
+                    f"{trabajo}: {trabajo.total} documento(s) en "
+                    f"{time.perf_counter() - inicio:.2f} s"
+                )
+            else:
+                self.stderr.write(f"{trabajo}: error al generar el PDF")
+
+    def _purgar(self):
+        limite = timezone.now() - timedelta(days=settings.PDF_TRABAJOS_DIAS)
+        borrados, _ = TrabajoPdf.objects.finalizados_antes(limite).delete()
+        if borrados:
+            self.stdout.write(f"{borrados} trabajo(s) finalizados borrados")
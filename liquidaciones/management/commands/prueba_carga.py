@@ -0,0 +1,201 @@
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sgb import carga
+
+# Comando de cada servidor de --servir: (módulo que debe estar instalado, argumentos)
+SERVIDORES = {
+    # Servidor con hilos de Django sobre WSGI_APPLICATION (sgb.wsgi)
+    "runserver": ("django", ["-m", "django", "runserver", "--noreload", "{host}:{puerto}"]),
+    "gunicorn": (
+        "gunicorn",
+        [
+            "-m", "gunicorn", "sgb.wsgi:application", "--bind", "{host}:{puerto}",
+            "--workers", "{workers}", "--threads", "4",
+        ],
+    ),
+    "uvicorn": (
+        "uvicorn",
+        [
+            "-m", "uvicorn", "sgb.asgi:application", "--host", "{host}", "--port", "{puerto}",
+            "--workers", "{workers}", "--no-access-log",
+        ],
+    ),
+}
+HOST = "localhost"
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga: operadores simulados con asyncio recorren buscar "
+        "cliente, estado de cuenta, crear liquidación con 20 items, registrar "
+        "pago y descargar el PDF contra la aplicación servida localmente "
+        "(sgb.wsgi con runserver o gunicorn, sgb.asgi con uvicorn) o contra "
+        "--url. Informa por paso peticiones por segundo, percentiles de "
+        "latencia y tasa de errores. Crea liquidaciones y pagos: usar sobre "
+        "una base de prueba (ver seed_bench)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="URL de un servidor ya levantado (por defecto se levanta uno con --servir).",
+        )
+        parser.add_argument(
+            "--servir",
+            choices=list(SERVIDORES),
+            default="runserver",
+            help="Servidor a levantar si no hay --url (por defecto runserver).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Procesos de gunicorn o uvicorn (por defecto 2).",
+        )
+        parser.add_argument(
+            "--usuarios",
+            type=int,
+            default=10,
+            help="Operadores simultáneos (por defecto 10).",
+        )
+        parser.add_argument(
+            "--duracion",
+            type=float,
+            default=30,
+            help="Segundos de carga (por defecto 30).",
+        )
+        parser.add_argument(
+            "--rampa",
+            type=float,
+            default=0,
+            help="Segundos en que se van sumando los operadores (por defecto 0).",
+        )
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0,
+            help="Espera media en segundos entre pasos de un operador (por defecto 0).",
+        )
+        parser.add_argument(
+            "--tiempo-maximo",
+            type=float,
+            default=30,
+            help="Segundos antes de dar por fallida una petición (por defecto 30).",
+        )
+        parser.add_argument(
+            "--semilla",
+            type=int,
+            default=0,
+            help="Semilla de los valores aleatorios (por defecto 0).",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Escribe el resultado como JSON.",
+        )
+
+    def handle(self, *args, **options):
+        if options["usuarios"] < 1:
+            raise CommandError("--usuarios debe ser al menos 1")
+        if options["duracion"] <= 0:
+            raise CommandError("--duracion debe ser mayor que 0")
+        try:
+            datos = carga.preparar()
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        servidor = None
+        url = options["url"]
+        if not url:
+            servidor, url = self._servir(options["servir"], options["workers"])
+        try:
+            resultado = asyncio.run(
+                carga.ejecutar(
+                    url,
+                    datos,
+                    usuarios=options["usuarios"],
+                    duracion=options["duracion"],
+                    pausa=options["pausa"],
+                    rampa=options["rampa"],
+                    semilla=options["semilla"],
+                    tiempo_maximo=options["tiempo_maximo"],
+                )
+            )
+        finally:
+            if servidor is not None:
+                servidor.terminate()
+                servidor.wait(timeout=30)
+
+        resultado = {
+            "url": url,
+            "servidor": None if options["url"] else options["servir"],
+            "usuarios": options["usuarios"],
+            **resultado,
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(resultado))
+            return
+        self._escribir(resultado)
+
+    def _servir(self, nombre, workers):
+        modulo, argumentos = SERVIDORES[nombre]
+        if importlib.util.find_spec(modulo) is None:
+            raise CommandError(f"--servir {nombre} necesita {modulo} instalado")
+        with socket.socket() as libre:
+            libre.bind((HOST, 0))
+            puerto = libre.getsockname()[1]
+        comando = [sys.executable] + [
+            argumento.format(host=HOST, puerto=puerto, workers=workers)
+            for argumento in argumentos
+        ]
+        entorno = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "sgb.settings"),
+        }
+        proceso = subprocess.Popen(
+            comando, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            if proceso.poll() is not None:
+                raise CommandError(f"{nombre} terminó con código {proceso.returncode}")
+            try:
+                socket.create_connection((HOST, puerto), timeout=1).close()
+            except OSError:
+                time.sleep(0.2)
+                continue
+            return proceso, f"http://{HOST}:{puerto}"
+        proceso.terminate()
+        raise CommandError(f"{nombre} no respondió en 30 s")
+
+    def _escribir(self, resultado):
+        self.stdout.write(
+            f"{resultado['usuarios']} operadores, {resultado['duracion_s']} s contra "
+            f"{resultado['url']}: {resultado['recorridos']} recorridos, "
+            f"{resultado['peticiones']} peticiones ({resultado['por_segundo']}/s), "
+            f"{resultado['errores']} errores"
+        )
+        for nombre, paso in resultado["pasos"].items():
+            if not paso["peticiones"]:
+                self.stdout.write(f"  {nombre:24} sin peticiones")
+                continue
+            linea = (
+                f"  {nombre:24} {paso['peticiones']:6} ({paso['por_segundo']:7.2f}/s)  "
+                f"p50 {paso['p50_ms']:8.1f}  p95 {paso['p95_ms']:8.1f}  "
+                f"p99 {paso['p99_ms']:8.1f}  max {paso['max_ms']:8.1f} ms  "
+                f"errores {paso['tasa_error']:.1%}"
+            )
+            if paso["detalle_errores"]:
+                linea += " (" + ", ".join(
+                    f"{error}: {cantidad}" for error, cantidad in paso["detalle_errores"].items()
+                ) + ")"
+            self.stdout.write(linea)
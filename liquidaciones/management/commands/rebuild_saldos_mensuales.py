@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.models import Cliente
+from liquidaciones.models import SaldoMensual
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera la tabla de saldos mensuales por cliente a partir de las "
+        "liquidaciones y pagos, o verifica que coincida."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Solo verifica los saldos, sin modificarlos.",
+        )
+        parser.add_argument(
+            "--cliente",
+            type=int,
+            action="append",
+            dest="clientes",
+            help="Id de cliente a procesar (se puede repetir; por defecto todos).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Cantidad de clientes por transacción (por defecto 500).",
+        )
+
+    def handle(self, *args, **options):
+        clientes = Cliente.objects.order_by("pk").values_list("pk", flat=True)
+        if options["clientes"]:
+            clientes = clientes.filter(pk__in=options["clientes"])
+        clientes = list(clientes)
+        lotes = [
+            clientes[i : i + options["batch_size"]]
+            for i in range(0, len(clientes), options["batch_size"])
+        ]
+
+        if options["check"]:
+            errores = sum(self._verificar(lote) for lote in lotes)
+            if errores:
+                raise CommandError(f"{errores} saldo(s) mensual(es) desactualizado(s)")
+            self.stdout.write(self.style.SUCCESS("Saldos mensuales verificados correctamente"))
+            return
+
+        filas = sum(SaldoMensual.objects.reconstruir(lote) for lote in lotes)
+        self.stdout.write(
+            self.style.SUCCESS(f"{filas} saldos mensuales de {len(clientes)} clientes regenerados")
+        )
+
+    def _verificar(self, clientes):
+        campos = ("cliente_id", "mes", "total_liquidaciones", "total_pagos", "saldo_cierre")
+        guardados = set(
+            SaldoMensual.objects.filter(cliente__in=clientes).values_list(*campos)
+        )
+        esperados = {
+            tuple(getattr(fila, campo) for campo in campos)
+            for fila in SaldoMensual.objects.calcular(clientes)
+        }
+        for cliente_id, mes, *_ in sorted(esperados ^ guardados):
+            self.stderr.write(f"Cliente {cliente_id} {mes:%Y-%m}: saldo desactualizado")
+        return len({fila[:2] for fila in esperados ^ guardados})
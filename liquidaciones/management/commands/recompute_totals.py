@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Max
+
+from liquidaciones.models import Liquidacion, PlanillaGastos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las columnas de totales de liquidaciones y planillas de "
+        "gastos a partir de sus items y verifica que coincidan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Solo verifica los totales, sin modificarlos.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Cantidad de ids por UPDATE (por defecto 5000).",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            for modelo in (Liquidacion, PlanillaGastos):
+                actualizadas = self._recalcular(modelo, options["batch_size"])
+                self.stdout.write(
+                    f"{modelo._meta.verbose_name_plural}: {actualizadas} recalculadas"
+                )
+
+        errores = self._verificar()
+        if errores:
+            raise CommandError(f"{errores} registro(s) con totales desactualizados")
+        self.stdout.write(self.style.SUCCESS("Totales verificados correctamente"))
+
+    def _recalcular(self, modelo, batch_size):
+        ultimo = modelo.objects.aggregate(ultimo=Max("pk"))["ultimo"] or 0
+        actualizadas = 0
+        for desde in range(0, ultimo + 1, batch_size):
+            with transaction.atomic():
+                actualizadas += modelo.objects.filter(
+                    pk__gte=desde, pk__lt=desde + batch_size
+                ).recompute_totals()
+        return actualizadas
+
+    def _verificar(self):
+        liquidaciones = Liquidacion.objects.with_totals().exclude(
+            total_monto=F("suma_monto"),
+            total_iva=F("suma_iva"),
+            total_retencion=F("suma_retencion"),
+            total_subtotal=F("suma_subtotal"),
+        )
+        planillas = PlanillaGastos.objects.with_totals().exclude(
+            total_gastos=F("suma_gastos")
+        )
+        errores = 0
+        for modelo, desactualizadas in (
+            (Liquidacion, liquidaciones),
+            (PlanillaGastos, planillas),
+        ):
+            for pk in desactualizadas.values_list("pk", flat=True):
+                errores += 1
+                self.stderr.write(f"{modelo.__name__} {pk}: totales desactualizados")
+        return errores
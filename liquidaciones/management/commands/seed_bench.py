@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from liquidaciones import sembrado
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos para benchmarks con bulk_create: clientes, "
+        "proveedores, planillas de gastos, liquidaciones con items y pagos. "
+        "Por defecto, por cada liquidación, 10 items y 2 pagos, y un cliente "
+        "cada 20 liquidaciones; al terminar quedan al día los totales, los "
+        "saldos mensuales y las caches. Los datos se agregan a los que ya "
+        "hay en la base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--liquidaciones",
+            type=int,
+            default=10000,
+            help="Liquidaciones a crear (por defecto 10000).",
+        )
+        for nombre, proporcion in sembrado.PROPORCIONES.items():
+            parser.add_argument(
+                f"--{nombre}",
+                type=int,
+                help=f"{nombre.capitalize()} a crear (por defecto {proporcion:g} por liquidación).",
+            )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=5000,
+            help="Liquidaciones (y filas de cada INSERT) por transacción (por defecto 5000).",
+        )
+        parser.add_argument(
+            "--semilla",
+            type=int,
+            default=0,
+            help="Semilla de los valores aleatorios (por defecto 0).",
+        )
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser al menos 1")
+        volumenes = sembrado.volumenes(
+            options["liquidaciones"],
+            **{nombre: options[nombre] for nombre in sembrado.PROPORCIONES},
+        )
+        if any(cantidad < 0 for cantidad in volumenes.values()):
+            raise CommandError("Las cantidades no pueden ser negativas")
+        if volumenes["liquidaciones"] and not (volumenes["clientes"] and volumenes["proveedores"]):
+            raise CommandError("Las liquidaciones necesitan al menos un cliente y un proveedor")
+
+        inicio = time.perf_counter()
+        avisar = self.stdout.write if options["verbosity"] > 1 else None
+        sembrado.sembrar(volumenes, options["lote"], options["semilla"], avisar)
+        self.stdout.write(
+            self.style.SUCCESS(
+                ", ".join(f"{cantidad} {nombre}" for nombre, cantidad in volumenes.items())
+                + f" creados en {time.perf_counter() - inicio:.1f} s"
+            )
+        )
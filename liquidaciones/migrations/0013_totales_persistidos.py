@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('liquidaciones', '0012_moneda_fk_not_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='liquidacion',
+            name='total_iva',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='liquidacion',
+            name='total_monto',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='liquidacion',
+            name='total_retencion',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='liquidacion',
+            name='total_subtotal',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='planillagastos',
+            name='total_gastos',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def _suma(items, campo_fk, expresion):
+    campo = models.DecimalField(max_digits=14, decimal_places=2)
+    suma = (
+        items.filter(**{campo_fk: models.OuterRef("pk")})
+        .order_by()
+        .values(campo_fk)
+        .annotate(total=models.Sum(expresion, output_field=campo))
+        .values("total")
+    )
+    return Coalesce(
+        models.Subquery(suma, output_field=campo),
+        models.Value(Decimal("0"), output_field=campo),
+        output_field=campo,
+    )
+
+
+def poblar_totales(apps, schema_editor):
+    Liquidacion = apps.get_model("liquidaciones", "Liquidacion")
+    LiquidacionItem = apps.get_model("liquidaciones", "LiquidacionItem")
+    PlanillaGastos = apps.get_model("liquidaciones", "PlanillaGastos")
+    PlanillaGastosItem = apps.get_model("liquidaciones", "PlanillaGastosItem")
+
+    items = LiquidacionItem.objects.all()
+    Liquidacion.objects.update(
+        total_monto=_suma(items, "liquidacion", models.F("monto")),
+        total_iva=_suma(items, "liquidacion", models.F("iva")),
+        total_retencion=_suma(items, "liquidacion", models.F("retencion")),
+        total_subtotal=_suma(
+            items,
+            "liquidacion",
+            models.F("monto") + models.F("iva") - models.F("retencion"),
+        ),
+    )
+    PlanillaGastos.objects.update(
+        total_gastos=_suma(
+            PlanillaGastosItem.objects.all(), "planilla_gastos", models.F("monto")
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    """Solo datos, separada de 0013 por las FK diferidas de Postgres (ver 0011)."""
+
+    dependencies = [
+        ("liquidaciones", "0013_totales_persistidos"),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_totales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from sgb.search import CrearIndiceTrigram
+
+
+class Migration(migrations.Migration):
+    """Índices pg_trgm para las búsquedas con icontains (solo PostgreSQL)."""
+
+    dependencies = [
+        ("liquidaciones", "0014_poblar_totales"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        CrearIndiceTrigram(
+            "liquidacion",
+            "numero_liquidacion",
+            "liquidacion_numero_liquidacion_trgm",
+        ),
+        CrearIndiceTrigram(
+            "liquidacion", "numero_despacho", "liquidacion_numero_despacho_trgm"
+        ),
+        CrearIndiceTrigram("proveedor", "nombre", "proveedor_nombre_trgm"),
+        CrearIndiceTrigram("pago", "referencia", "pago_referencia_trgm"),
+        CrearIndiceTrigram("banco", "nombre", "banco_nombre_trgm"),
+    ]
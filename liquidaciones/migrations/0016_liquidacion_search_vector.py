@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:44
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from sgb.search import CrearIndiceGin
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('liquidaciones', '0015_indices_trigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='liquidacion',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        CrearIndiceGin("liquidacion", "search_vector", "liquidacion_search_vector_gin"),
+    ]
@@ -0,0 +1,38 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+def poblar_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Cliente = apps.get_model("clientes", "Cliente")
+    Proveedor = apps.get_model("liquidaciones", "Proveedor")
+    Liquidacion = apps.get_model("liquidaciones", "Liquidacion")
+    cliente = Cliente.objects.filter(pk=models.OuterRef("cliente_id"))
+    proveedor = Proveedor.objects.filter(pk=models.OuterRef("proveedor_id"))
+    Liquidacion.objects.update(
+        search_vector=SearchVector(
+            "numero_liquidacion",
+            "numero_despacho",
+            "numero_factura_comercial",
+            "proforma",
+            "orden_de_compra",
+            models.Subquery(cliente.values("nombre")),
+            models.Subquery(cliente.values("ruc")),
+            models.Subquery(proveedor.values("nombre")),
+            config="simple",
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    """Solo datos, separada de 0016 por las FK diferidas de Postgres (ver 0011)."""
+
+    dependencies = [
+        ("clientes", "0003_indices_trigram"),
+        ("liquidaciones", "0016_liquidacion_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_search_vector, migrations.RunPython.noop),
+    ]
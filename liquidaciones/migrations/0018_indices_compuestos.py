@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('liquidaciones', '0017_poblar_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='liquidacion',
+            name='total_subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='liquidacion',
+            index=models.Index(fields=['cliente', 'fecha'], name='liq_cliente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='liquidacion',
+            index=models.Index(fields=['fecha', 'id'], name='liq_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='liquidacion',
+            index=models.Index(fields=['total_subtotal', 'id'], name='liq_total_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['liquidacion', 'fecha'], name='pago_liquidacion_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha', 'id'], name='pago_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planillagastos',
+            index=models.Index(fields=['fecha'], name='planilla_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0003_indices_trigram'),
+        ('liquidaciones', '0018_indices_compuestos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('total_liquidaciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_pagos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo_cierre', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clientes.cliente')),
+            ],
+            options={
+                'verbose_name': 'Saldo Mensual',
+                'verbose_name_plural': 'Saldos Mensuales',
+                'ordering': ['cliente', 'mes'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='saldomensual',
+            constraint=models.UniqueConstraint(fields=('cliente', 'mes'), name='saldo_cliente_mes_uniq'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+
+def poblar_saldos(apps, schema_editor):
+    Liquidacion = apps.get_model("liquidaciones", "Liquidacion")
+    Pago = apps.get_model("liquidaciones", "Pago")
+    SaldoMensual = apps.get_model("liquidaciones", "SaldoMensual")
+
+    totales = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    liquidaciones = (
+        Liquidacion.objects.order_by()
+        .values("cliente_id", mes=TruncMonth("fecha"))
+        .annotate(total=models.Sum("total_subtotal"))
+        .values_list("cliente_id", "mes", "total")
+    )
+    for cliente_id, mes, total in liquidaciones:
+        totales[cliente_id, mes][0] += total or 0
+    pagos = (
+        Pago.objects.order_by()
+        .values(cliente_id=models.F("liquidacion__cliente_id"), mes=TruncMonth("fecha"))
+        .annotate(total=models.Sum("monto"))
+        .values_list("cliente_id", "mes", "total")
+    )
+    for cliente_id, mes, total in pagos:
+        totales[cliente_id, mes][1] += total or 0
+
+    filas = []
+    saldos = defaultdict(Decimal)
+    for (cliente_id, mes), (total_liquidaciones, total_pagos) in sorted(totales.items()):
+        if total_liquidaciones == total_pagos == 0:
+            continue
+        saldos[cliente_id] += total_pagos - total_liquidaciones
+        filas.append(
+            SaldoMensual(
+                cliente_id=cliente_id,
+                mes=mes,
+                total_liquidaciones=total_liquidaciones,
+                total_pagos=total_pagos,
+                saldo_cierre=saldos[cliente_id],
+            )
+        )
+    SaldoMensual.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    """Solo datos, separada de 0019 por las FK diferidas de Postgres (ver 0011)."""
+
+    dependencies = [
+        ("liquidaciones", "0019_saldo_mensual"),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_saldos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('liquidaciones', '0020_poblar_saldos_mensuales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoPdf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('terminado', 'Terminado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('filtros', models.JSONField(blank=True, default=dict)),
+                ('formato', models.CharField(choices=[('pdf', 'PDF'), ('zip', 'ZIP')], default='pdf', max_length=3)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('procesados', models.PositiveIntegerField(default=0)),
+                ('nombre_archivo', models.CharField(blank=True, max_length=255)),
+                ('contenido', models.BinaryField(null=True)),
+                ('error', models.TextField(blank=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('liquidacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='liquidaciones.liquidacion')),
+            ],
+            options={
+                'verbose_name': 'Trabajo PDF',
+                'verbose_name_plural': 'Trabajos PDF',
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['estado', 'creado'], name='trabajo_pdf_estado_idx')],
+            },
+        ),
+    ]
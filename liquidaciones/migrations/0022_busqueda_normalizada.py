@@ -0,0 +1,46 @@
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+from sgb.search import BorrarIndiceTrigram, CrearFuncionUnaccent, CrearIndiceNormalizado
+
+
+class Migration(migrations.Migration):
+    """
+    Índices pg_trgm sobre LOWER(sgb_unaccent(columna)) para las búsquedas sin
+    acentos, en lugar de los de UPPER(columna) de 0015 (solo PostgreSQL).
+    """
+
+    dependencies = [
+        ("liquidaciones", "0021_trabajo_pdf"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        CrearFuncionUnaccent(),
+        BorrarIndiceTrigram(
+            "liquidacion",
+            "numero_liquidacion",
+            "liquidacion_numero_liquidacion_trgm",
+        ),
+        BorrarIndiceTrigram(
+            "liquidacion", "numero_despacho", "liquidacion_numero_despacho_trgm"
+        ),
+        BorrarIndiceTrigram("proveedor", "nombre", "proveedor_nombre_trgm"),
+        BorrarIndiceTrigram("pago", "referencia", "pago_referencia_trgm"),
+        BorrarIndiceTrigram("banco", "nombre", "banco_nombre_trgm"),
+        # La lista de liquidaciones usa search_vector; numero_despacho es para
+        # la búsqueda de pagos
+        CrearIndiceNormalizado(
+            "liquidacion", "numero_despacho", "liquidacion_despacho_normalizado_trgm"
+        ),
+        CrearIndiceNormalizado("proveedor", "nombre", "proveedor_nombre_normalizado_trgm"),
+        CrearIndiceNormalizado(
+            "procedencia", "nombre", "procedencia_nombre_normalizado_trgm"
+        ),
+        CrearIndiceNormalizado("pago", "referencia", "pago_referencia_normalizado_trgm"),
+        CrearIndiceNormalizado("banco", "nombre", "banco_nombre_normalizado_trgm"),
+        CrearIndiceNormalizado(
+            "planillagastos", "numero_planilla", "planilla_numero_normalizado_trgm"
+        ),
+    ]
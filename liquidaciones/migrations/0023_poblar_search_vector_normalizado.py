@@ -0,0 +1,40 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+from sgb.search import Normalizado
+
+
+def poblar_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Cliente = apps.get_model("clientes", "Cliente")
+    Proveedor = apps.get_model("liquidaciones", "Proveedor")
+    Liquidacion = apps.get_model("liquidaciones", "Liquidacion")
+    cliente = Cliente.objects.filter(pk=models.OuterRef("cliente_id"))
+    proveedor = Proveedor.objects.filter(pk=models.OuterRef("proveedor_id"))
+    campos = [
+        "numero_liquidacion",
+        "numero_despacho",
+        "numero_factura_comercial",
+        "proforma",
+        "orden_de_compra",
+        models.Subquery(cliente.values("nombre")),
+        models.Subquery(cliente.values("ruc")),
+        models.Subquery(proveedor.values("nombre")),
+    ]
+    Liquidacion.objects.update(
+        search_vector=SearchVector(*map(Normalizado, campos), config="simple")
+    )
+
+
+class Migration(migrations.Migration):
+    """Regenera search_vector sin acentos, con la función de 0022."""
+
+    dependencies = [
+        ("clientes", "0004_busqueda_normalizada"),
+        ("liquidaciones", "0022_busqueda_normalizada"),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_search_vector, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,20 @@
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
 
 from clientes.models import Cliente
+from sgb.search import Normalizado, buscar, consulta_prefijos, es_postgres
 
 
 class Procedencia(models.Model):
@@ -43,6 +57,142 @@ def get_default_moneda_factura():
     return moneda.pk
 
 
+def _suma_items(items, campo_fk, expresion):
+    """
+    Subconsulta correlacionada con la suma de `expresion` sobre los items
+    cuyo `campo_fk` apunta a la fila externa (0 si no hay items).
+    """
+    campo = models.DecimalField(max_digits=14, decimal_places=2)
+    suma = (
+        items.filter(**{campo_fk: models.OuterRef("pk")})
+        .order_by()
+        .values(campo_fk)
+        .annotate(total=models.Sum(expresion, output_field=campo))
+        .values("total")
+    )
+    return Coalesce(
+        models.Subquery(suma, output_field=campo),
+        models.Value(Decimal("0"), output_field=campo),
+        output_field=campo,
+    )
+
+
+def _campos_guardados(modelo, mantenidos):
+    """Campos que save() escribe al modificar una fila de `modelo`, salvo `mantenidos`"""
+    return [
+        campo.name
+        for campo in modelo._meta.concrete_fields
+        if not campo.primary_key and campo.name not in mantenidos
+    ]
+
+
+def documento_busqueda():
+    """
+    Documento de búsqueda de una liquidación: sus números de referencia más
+    el nombre y RUC del cliente y el nombre del proveedor, sin acentos.
+    """
+    cliente = Cliente.objects.filter(pk=models.OuterRef("cliente_id"))
+    proveedor = Proveedor.objects.filter(pk=models.OuterRef("proveedor_id"))
+    campos = [
+        "numero_liquidacion",
+        "numero_despacho",
+        "numero_factura_comercial",
+        "proforma",
+        "orden_de_compra",
+        models.Subquery(cliente.values("nombre")),
+        models.Subquery(cliente.values("ruc")),
+        models.Subquery(proveedor.values("nombre")),
+    ]
+    return SearchVector(*map(Normalizado, campos), config="simple")
+
+
+class LiquidacionQuerySet(models.QuerySet):
+    CAMPOS_BUSQUEDA = [
+        "numero_liquidacion",
+        "numero_despacho",
+        "numero_factura_comercial",
+        "proforma",
+        "orden_de_compra",
+        "cliente__nombre",
+        "cliente__ruc",
+        "proveedor__nombre",
+    ]
+
+    def actualizar_busqueda(self):
+        """
+        Regenera search_vector con un único UPDATE (solo PostgreSQL; en otros
+        motores la búsqueda no usa la columna).
+        """
+        if not es_postgres(self.db):
+            return 0
+        return self.update(search_vector=documento_busqueda())
+
+    def buscar(self, texto):
+        """
+        Busca por prefijos de palabra en search_vector y ordena por relevancia.
+        Fuera de PostgreSQL, o si el texto no tiene palabras, usa buscar()
+        sobre los mismos campos.
+        """
+        consulta = consulta_prefijos(texto)
+        if consulta is None or not es_postgres(self.db):
+            return buscar(self, texto, self.CAMPOS_BUSQUEDA)
+        query = SearchQuery(consulta, config="simple", search_type="raw")
+        orden = self.query.order_by or self.model._meta.ordering
+        return (
+            self.filter(search_vector=query)
+            .annotate(relevancia=SearchRank(models.F("search_vector"), query))
+            .order_by("-relevancia", *orden)
+        )
+
+    def recompute_totals(self):
+        """
+        Recalcula las columnas de totales a partir de los items con un único
+        UPDATE. Devuelve la cantidad de liquidaciones actualizadas.
+        """
+        items = LiquidacionItem.objects.all()
+        return self.update(
+            total_monto=_suma_items(items, "liquidacion", models.F("monto")),
+            total_iva=_suma_items(items, "liquidacion", models.F("iva")),
+            total_retencion=_suma_items(items, "liquidacion", models.F("retencion")),
+            total_subtotal=_suma_items(
+                items,
+                "liquidacion",
+                models.F("monto") + models.F("iva") - models.F("retencion"),
+            ),
+        )
+
+    def with_totals(self):
+        """
+        Anota los totales de los items calculados en la base de datos
+        (suma_monto, suma_iva, suma_retencion y suma_subtotal). Solo sirve
+        para verificar las columnas total_* (recompute_totals --check): las
+        vistas leen esas columnas.
+        """
+        campo = models.DecimalField(max_digits=14, decimal_places=2)
+        cero = models.Value(Decimal("0"), output_field=campo)
+        return self.annotate(
+            suma_monto=Coalesce(
+                models.Sum("liquidacionitem__monto"), cero, output_field=campo
+            ),
+            suma_iva=Coalesce(
+                models.Sum("liquidacionitem__iva"), cero, output_field=campo
+            ),
+            suma_retencion=Coalesce(
+                models.Sum("liquidacionitem__retencion"), cero, output_field=campo
+            ),
+            suma_subtotal=Coalesce(
+                models.Sum(
+                    models.F("liquidacionitem__monto")
+                    + models.F("liquidacionitem__iva")
+                    - models.F("liquidacionitem__retencion"),
+                    output_field=campo,
+                ),
+                cero,
+                output_field=campo,
+            ),
+        )
+
+
 class Liquidacion(models.Model):
     class ClaseChoices(models.TextChoices):
         IMPORTACION = "importacion", "Importación"
@@ -81,37 +231,67 @@ class Liquidacion(models.Model):
     planilla_gastos = models.ForeignKey(
         "PlanillaGastos", on_delete=models.SET_NULL, null=True, blank=True
     )
+    # Totales de los items, mantenidos por liquidaciones.signals
+    total_monto = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    total_iva = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    total_retencion = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    total_subtotal = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    # Documento de búsqueda (tsvector), mantenido por liquidaciones.signals
+    search_vector = SearchVectorField(null=True, editable=False)
 
-    @property
-    def procedencia(self):
-        """Accede a la procedencia a través del proveedor"""
-        return self.proveedor.procedencia
+    objects = LiquidacionQuerySet.as_manager()
 
-    @property
-    def total_monto(self):
-        """Suma de todos los montos de los items"""
-        return sum(item.monto for item in self.liquidacionitem_set.all())
+    # Columnas que mantienen las señales; save() no las escribe al modificar
+    CAMPOS_MANTENIDOS = {
+        "total_monto",
+        "total_iva",
+        "total_retencion",
+        "total_subtotal",
+        "search_vector",
+    }
 
-    @property
-    def total_iva(self):
-        """Suma de todos los IVA de los items"""
-        return sum(item.iva for item in self.liquidacionitem_set.all())
+    class Meta:
+        indexes = [
+            # estado_cuenta: filter(cliente=...).order_by("fecha")
+            models.Index(fields=["cliente", "fecha"], name="liq_cliente_fecha_idx"),
+            # liquidacion_list: keyset sobre (fecha, id) y (total_subtotal, id)
+            models.Index(fields=["fecha", "id"], name="liq_fecha_id_idx"),
+            models.Index(fields=["total_subtotal", "id"], name="liq_total_id_idx"),
+        ]
 
     @property
-    def total_retencion(self):
-        """Suma de todas las retenciones de los items"""
-        return sum(item.retencion for item in self.liquidacionitem_set.all())
+    def procedencia(self):
+        """Accede a la procedencia a través del proveedor"""
+        return self.proveedor.procedencia
 
     @property
     def valor_total_calculado(self):
         """
-        Calcula el valor total como la suma de subtotales de todos los items de la liquidación
+        Valor total de la liquidación (suma de subtotales de sus items),
+        mantenido en la columna total_subtotal
         """
-        return sum(item.subtotal for item in self.liquidacionitem_set.all())
+        return self.total_subtotal
 
     def __str__(self):
         return f"Liquidación {self.numero_liquidacion} - {self.cliente.nombre}"
 
+    def save(self, *args, **kwargs):
+        """
+        Al modificar, no escribe CAMPOS_MANTENIDOS: una instancia leída antes
+        de cambiar sus items pisaría los totales con valores viejos.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = _campos_guardados(Liquidacion, self.CAMPOS_MANTENIDOS)
+        super().save(*args, **kwargs)
+
 
 class LiquidacionItem(models.Model):
     liquidacion = models.ForeignKey(Liquidacion, on_delete=models.CASCADE)
@@ -147,6 +327,12 @@ class Pago(models.Model):
 
     class Meta:
         ordering = ["-fecha"]
+        indexes = [
+            # estado_cuenta: pagos de las liquidaciones de un cliente por fecha
+            models.Index(fields=["liquidacion", "fecha"], name="pago_liquidacion_fecha_idx"),
+            # pago_list: keyset sobre (fecha, id)
+            models.Index(fields=["fecha", "id"], name="pago_fecha_id_idx"),
+        ]
 
     @property
     def numero_despacho(self):
@@ -162,23 +348,221 @@ class Pago(models.Model):
         return f"Pago {self.numero_despacho} - {self.monto} ({self.fecha})"
 
 
+def _inicio_mes(fecha):
+    return fecha.replace(day=1)
+
+
+def _mes_siguiente(mes):
+    return (mes + timedelta(days=32)).replace(day=1)
+
+
+class SaldoMensualQuerySet(models.QuerySet):
+    def actualizar(self, cliente_id, fecha):
+        """
+        Recalcula el mes de `fecha` del cliente a partir de sus liquidaciones
+        y pagos, y suma la diferencia de saldo a los meses siguientes. Los
+        meses sin movimientos no tienen fila.
+        """
+        mes = _inicio_mes(fecha)
+        rango = (mes, _mes_siguiente(mes) - timedelta(days=1))
+        with transaction.atomic(using=self.db):
+            liquidaciones = Liquidacion.objects.filter(
+                cliente_id=cliente_id, fecha__range=rango
+            ).aggregate(total=models.Sum("total_subtotal"))["total"]
+            pagos = Pago.objects.filter(
+                liquidacion__cliente_id=cliente_id, fecha__range=rango
+            ).aggregate(total=models.Sum("monto"))["total"]
+            liquidaciones = liquidaciones or Decimal("0")
+            pagos = pagos or Decimal("0")
+
+            actual = (
+                self.select_for_update().filter(cliente_id=cliente_id, mes=mes).first()
+            )
+            neto_anterior = (
+                actual.total_pagos - actual.total_liquidaciones if actual else Decimal("0")
+            )
+            diferencia = pagos - liquidaciones - neto_anterior
+            if diferencia:
+                self.filter(cliente_id=cliente_id, mes__gt=mes).update(
+                    saldo_cierre=models.F("saldo_cierre") + diferencia
+                )
+
+            if liquidaciones == pagos == 0:
+                if actual:
+                    actual.delete()
+                return
+            saldo_previo = self.saldo_al(cliente_id, mes)
+            self.update_or_create(
+                cliente_id=cliente_id,
+                mes=mes,
+                defaults={
+                    "total_liquidaciones": liquidaciones,
+                    "total_pagos": pagos,
+                    "saldo_cierre": saldo_previo + pagos - liquidaciones,
+                },
+            )
+
+    def saldo_al(self, cliente_id, fecha):
+        """Saldo del cliente al cierre del último mes anterior al de `fecha`"""
+        saldo = (
+            self.filter(cliente_id=cliente_id, mes__lt=_inicio_mes(fecha))
+            .order_by("-mes")
+            .values_list("saldo_cierre", flat=True)
+            .first()
+        )
+        return saldo if saldo is not None else Decimal("0")
+
+    def calcular(self, clientes=None):
+        """
+        Filas (sin guardar) de los clientes indicados (todos si es None),
+        calculadas con dos agregados por mes.
+        """
+        liquidaciones = Liquidacion.objects.all()
+        pagos = Pago.objects.all()
+        if clientes is not None:
+            liquidaciones = liquidaciones.filter(cliente__in=clientes)
+            pagos = pagos.filter(liquidacion__cliente__in=clientes)
+        return _saldos_mensuales(liquidaciones, pagos, self.model)
+
+    def reconstruir(self, clientes=None):
+        """Regenera las filas de los clientes indicados; devuelve cuántas creó"""
+        saldos = self.all()
+        if clientes is not None:
+            saldos = saldos.filter(cliente__in=clientes)
+        with transaction.atomic(using=self.db):
+            filas = self.calcular(clientes)
+            saldos.delete()
+            self.bulk_create(filas, batch_size=1000)
+        return len(filas)
+
+
+def _saldos_mensuales(liquidaciones, pagos, modelo):
+    """
+    Instancias de `modelo` (SaldoMensual) con los totales de cada mes de las
+    liquidaciones y pagos dados y el saldo acumulado por cliente.
+    """
+    totales = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    por_mes = (
+        liquidaciones.order_by()
+        .values("cliente_id", mes=TruncMonth("fecha"))
+        .annotate(total=models.Sum("total_subtotal"))
+        .values_list("cliente_id", "mes", "total")
+    )
+    for cliente_id, mes, total in por_mes:
+        totales[cliente_id, mes][0] += total or 0
+    por_mes = (
+        pagos.order_by()
+        .values(cliente_id=models.F("liquidacion__cliente_id"), mes=TruncMonth("fecha"))
+        .annotate(total=models.Sum("monto"))
+        .values_list("cliente_id", "mes", "total")
+    )
+    for cliente_id, mes, total in por_mes:
+        totales[cliente_id, mes][1] += total or 0
+
+    filas = []
+    saldos = defaultdict(Decimal)
+    for (cliente_id, mes), (total_liquidaciones, total_pagos) in sorted(totales.items()):
+        if total_liquidaciones == total_pagos == 0:
+            continue
+        saldos[cliente_id] += total_pagos - total_liquidaciones
+        filas.append(
+            modelo(
+                cliente_id=cliente_id,
+                mes=mes,
+                total_liquidaciones=total_liquidaciones,
+                total_pagos=total_pagos,
+                saldo_cierre=saldos[cliente_id],
+            )
+        )
+    return filas
+
+
+class SaldoMensual(models.Model):
+    """
+    Foto mensual de la cuenta de un cliente: totales del mes y saldo
+    (pagos - liquidaciones) acumulado al cierre. La mantiene
+    liquidaciones.signals y la regenera `rebuild_saldos_mensuales`.
+    """
+
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
+    # Primer día del mes
+    mes = models.DateField()
+    total_liquidaciones = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    total_pagos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo_cierre = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = SaldoMensualQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["cliente", "mes"]
+        constraints = [
+            models.UniqueConstraint(fields=["cliente", "mes"], name="saldo_cliente_mes_uniq"),
+        ]
+        verbose_name = "Saldo Mensual"
+        verbose_name_plural = "Saldos Mensuales"
+
+    def __str__(self):
+        return f"{self.cliente} {self.mes:%Y-%m}: {self.saldo_cierre}"
+
+
+class PlanillaGastosQuerySet(models.QuerySet):
+    def recompute_totals(self):
+        """Recalcula total_gastos a partir de los items con un único UPDATE"""
+        return self.update(
+            total_gastos=_suma_items(
+                PlanillaGastosItem.objects.all(), "planilla_gastos", models.F("monto")
+            )
+        )
+
+    def with_totals(self):
+        """
+        Anota la suma de los gastos calculada en la base de datos
+        (suma_gastos), para verificar total_gastos como
+        LiquidacionQuerySet.with_totals().
+        """
+        campo = models.DecimalField(max_digits=14, decimal_places=2)
+        return self.annotate(
+            suma_gastos=Coalesce(
+                models.Sum("planillagastositem__monto"),
+                models.Value(Decimal("0"), output_field=campo),
+                output_field=campo,
+            )
+        )
+
+
 class PlanillaGastos(models.Model):
     fecha = models.DateField()
     numero_planilla = models.CharField(max_length=50, unique=True)
+    # Suma de los items, mantenida por liquidaciones.signals
+    total_gastos = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, editable=False
+    )
+
+    objects = PlanillaGastosQuerySet.as_manager()
+
+    # Columnas que mantienen las señales; save() no las escribe al modificar
+    CAMPOS_MANTENIDOS = {"total_gastos"}
 
     class Meta:
         ordering = ["-fecha"]
+        indexes = [
+            # planilla_gastos_list: order_by("-fecha")
+            models.Index(fields=["fecha"], name="planilla_fecha_idx"),
+        ]
         verbose_name = "Planilla de Gastos"
         verbose_name_plural = "Planillas de Gastos"
 
-    @property
-    def total_gastos(self):
-        """Suma de todos los montos de los gastos de la planilla"""
-        return sum(gasto.monto for gasto in self.planillagastositem_set.all())
-
     def __str__(self):
         return f"Planilla {self.numero_planilla} - {self.fecha}"
 
+    def save(self, *args, **kwargs):
+        """Como Liquidacion.save(): al modificar no escribe total_gastos"""
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = _campos_guardados(PlanillaGastos, self.CAMPOS_MANTENIDOS)
+        super().save(*args, **kwargs)
+
 
 class PlanillaGastosItem(models.Model):
     planilla_gastos = models.ForeignKey(PlanillaGastos, on_delete=models.CASCADE)
@@ -191,3 +575,106 @@ class PlanillaGastosItem(models.Model):
 
     def __str__(self):
         return f"{self.descripcion} - {self.monto}"
+
+
+class TrabajoPdfQuerySet(models.QuerySet):
+    def tomar(self):
+        """
+        Marca como procesando el trabajo pendiente más antiguo y lo devuelve
+        (None si no hay). Con SKIP LOCKED varios workers no toman el mismo
+        trabajo. Un trabajo que lleva más de PDF_TRABAJOS_PLAZO segundos
+        procesando se da por abandonado (el worker murió) y se vuelve a tomar.
+        """
+        ahora = timezone.now()
+        abandonado = ahora - timedelta(seconds=settings.PDF_TRABAJOS_PLAZO)
+        with transaction.atomic():
+            trabajo = (
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    models.Q(estado=TrabajoPdf.EstadoChoices.PENDIENTE)
+                    | models.Q(
+                        estado=TrabajoPdf.EstadoChoices.PROCESANDO, iniciado__lt=abandonado
+                    )
+                )
+                .defer("contenido")
+                .order_by("creado", "pk")
+                .first()
+            )
+            if trabajo is None:
+                return None
+            trabajo.estado = TrabajoPdf.EstadoChoices.PROCESANDO
+            trabajo.iniciado = ahora
+            trabajo.procesados = 0
+            trabajo.save(update_fields=["estado", "iniciado", "procesados"])
+        return trabajo
+
+    def finalizados_antes(self, fecha):
+        """Trabajos terminados o con error antes de `fecha`"""
+        return self.filter(
+            estado__in=[
+                TrabajoPdf.EstadoChoices.TERMINADO,
+                TrabajoPdf.EstadoChoices.ERROR,
+            ],
+            terminado__lt=fecha,
+        )
+
+
+class TrabajoPdf(models.Model):
+    """
+    Generación de PDF en segundo plano: una liquidación o un lote (filtros
+    de FiltroPdfLoteForm). La procesa el comando procesar_trabajos_pdf y el
+    resultado queda en `contenido`.
+    """
+
+    class EstadoChoices(models.TextChoices):
+        PENDIENTE = "pendiente", "Pendiente"
+        PROCESANDO = "procesando", "Procesando"
+        TERMINADO = "terminado", "Terminado"
+        ERROR = "error", "Error"
+
+    class FormatoChoices(models.TextChoices):
+        PDF = "pdf", "PDF"
+        ZIP = "zip", "ZIP"
+
+    estado = models.CharField(
+        max_length=20, choices=EstadoChoices.choices, default=EstadoChoices.PENDIENTE
+    )
+    liquidacion = models.ForeignKey(
+        Liquidacion, on_delete=models.CASCADE, null=True, blank=True
+    )
+    # Lote: ids de cliente y planilla_gastos, fechas en ISO
+    filtros = models.JSONField(default=dict, blank=True)
+    formato = models.CharField(
+        max_length=3, choices=FormatoChoices.choices, default=FormatoChoices.PDF
+    )
+    total = models.PositiveIntegerField(default=0)
+    procesados = models.PositiveIntegerField(default=0)
+    nombre_archivo = models.CharField(max_length=255, blank=True)
+    contenido = models.BinaryField(null=True, editable=False)
+    error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    objects = TrabajoPdfQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-creado"]
+        indexes = [
+            # TrabajoPdf.objects.tomar(): pendiente más antiguo
+            models.Index(fields=["estado", "creado"], name="trabajo_pdf_estado_idx"),
+        ]
+        verbose_name = "Trabajo PDF"
+        verbose_name_plural = "Trabajos PDF"
+
+    @property
+    def progreso(self):
+        """Porcentaje de documentos procesados"""
+        if self.estado == self.EstadoChoices.TERMINADO:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.procesados * 100 // self.total)
+
+    def __str__(self):
+        return f"Trabajo PDF {self.pk} ({self.get_estado_display()})"
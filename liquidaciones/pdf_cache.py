@@ -0,0 +1,116 @@
+"""
+Cache de PDFs de liquidaciones direccionada por contenido.
+
+La clave es un hash de los campos de la liquidación, de los datos
+relacionados que se imprimen (cliente, proveedor, monedas), de sus items y de
+la versión del código de pdf_utils y del logo. Un mismo hash produce
+siempre el mismo documento, por lo que sirve también como ETag.
+
+Al guardar o borrar una liquidación o sus items, liquidaciones.signals
+llama a invalidar(), que borra la entrada vigente usando el puntero
+pdf:liquidacion:<pk>. Las entradas van a la cache "pdf" de settings.CACHES.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+
+from django.core.cache import caches
+
+from . import pdf_utils
+
+ALIAS_CACHE = "pdf"
+DURACION = 60 * 60 * 24 * 30
+
+
+def _version_codigo():
+    """Hash del código de pdf_utils y del logo; cambia con cada despliegue que los modifique"""
+    huella = hashlib.sha256()
+    for ruta in (pdf_utils.__file__, pdf_utils.LOGO_PATH):
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as archivo:
+                huella.update(archivo.read())
+    return huella.hexdigest()[:16]
+
+
+VERSION = _version_codigo()
+
+
+@dataclass(frozen=True)
+class PdfCacheado:
+    contenido: bytes
+    generado: datetime
+
+
+def _cache():
+    return caches[ALIAS_CACHE]
+
+
+def _clave_pdf(huella):
+    return f"pdf:{huella}"
+
+
+def _clave_puntero(liquidacion_id):
+    return f"pdf:liquidacion:{liquidacion_id}"
+
+
+def huella(liquidacion):
+    """
+    Hash de todo lo que se imprime en el PDF. Usa liquidacionitem_set.all(),
+    así que conviene prefetch_related("liquidacionitem_set").
+    """
+    datos = {
+        "version": VERSION,
+        "liquidacion": [
+            (campo.attname, campo.value_to_string(liquidacion))
+            for campo in liquidacion._meta.concrete_fields
+            if campo.attname != "search_vector"
+        ],
+        "cliente": liquidacion.cliente.nombre,
+        "proveedor": liquidacion.proveedor.nombre,
+        "procedencia": str(liquidacion.procedencia or ""),
+        "monedas": [
+            liquidacion.moneda_valor_imponible.codigo,
+            liquidacion.moneda_factura.codigo,
+        ],
+        "items": [
+            [item.pk, item.item, str(item.monto), str(item.iva), str(item.retencion)]
+            for item in liquidacion.liquidacionitem_set.all()
+        ],
+    }
+    return hashlib.sha256(
+        json.dumps(datos, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def obtener(liquidacion, huella_pdf=None):
+    """PdfCacheado de la liquidación; lo genera y lo guarda si no está en la cache"""
+    huella_pdf = huella_pdf or huella(liquidacion)
+    cache = _cache()
+    entrada = cache.get(_clave_pdf(huella_pdf))
+    if entrada is None:
+        entrada = PdfCacheado(
+            contenido=pdf_utils.generar_pdf_liquidacion(liquidacion).getvalue(),
+            generado=datetime.now(timezone.utc).replace(microsecond=0),
+        )
+        cache.set_many(
+            {
+                _clave_pdf(huella_pdf): entrada,
+                _clave_puntero(liquidacion.pk): huella_pdf,
+            },
+            DURACION,
+        )
+    return entrada
+
+
+def invalidar(liquidacion_id):
+    """Borra el PDF vigente de la liquidación (si está en la cache)"""
+    cache = _cache()
+    clave_puntero = _clave_puntero(liquidacion_id)
+    huella_pdf = cache.get(clave_puntero)
+    claves = [clave_puntero]
+    if huella_pdf:
+        claves.append(_clave_pdf(huella_pdf))
+    cache.delete_many(claves)
@@ -0,0 +1,115 @@
+"""
+Generación de PDFs de liquidaciones por lote.
+
+Las liquidaciones se cargan con todo lo que usa pdf_utils en tres consultas
+(select_related + prefetch de items) y se renderizan en un
+ProcessPoolExecutor: ReportLab es CPU puro, así que los procesos escalan con
+los núcleos. Los procesos se crean con "spawn" para no heredar las conexiones
+a la base de datos; no consultan la base, reciben las instancias ya cargadas.
+
+La salida es un ZIP en streaming (un PDF por liquidación más tiempos.csv) o
+un único PDF combinado.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import multiprocessing
+import os
+import time
+import zipfile
+
+import django
+
+from .exportar import BufferStreaming
+from .models import Liquidacion
+from .pdf_utils import generar_pdf_liquidacion, generar_pdf_liquidaciones
+
+
+@dataclass(frozen=True)
+class PdfRenderizado:
+    liquidacion_id: int
+    nombre: str
+    contenido: bytes
+    segundos: float
+
+
+def liquidaciones_para_pdf(cliente=None, desde=None, hasta=None, planilla_gastos=None):
+    """Liquidaciones del filtro con las relaciones que usa el PDF ya cargadas"""
+    liquidaciones = Liquidacion.objects.select_related(
+        "cliente",
+        "proveedor__procedencia",
+        "moneda_valor_imponible",
+        "moneda_factura",
+    ).prefetch_related("liquidacionitem_set")
+    if cliente is not None:
+        liquidaciones = liquidaciones.filter(cliente=cliente)
+    if desde is not None:
+        liquidaciones = liquidaciones.filter(fecha__gte=desde)
+    if hasta is not None:
+        liquidaciones = liquidaciones.filter(fecha__lte=hasta)
+    if planilla_gastos is not None:
+        liquidaciones = liquidaciones.filter(planilla_gastos=planilla_gastos)
+    return liquidaciones.order_by("fecha", "id")
+
+
+def nombre_pdf(liquidacion):
+    return f"Liquidacion_{liquidacion.numero_liquidacion or liquidacion.pk}.pdf"
+
+
+def _renderizar(liquidacion):
+    inicio = time.perf_counter()
+    contenido = generar_pdf_liquidacion(liquidacion).getvalue()
+    return PdfRenderizado(
+        liquidacion.pk, nombre_pdf(liquidacion), contenido, time.perf_counter() - inicio
+    )
+
+
+def renderizar(liquidaciones, procesos=None):
+    """
+    Itera PdfRenderizado en el orden de `liquidaciones`. `procesos` es la
+    cantidad de procesos (por defecto uno por núcleo); con 0 se renderiza en
+    el proceso actual.
+    """
+    liquidaciones = list(liquidaciones)
+    if procesos is None:
+        procesos = min(os.cpu_count() or 1, len(liquidaciones))
+    if procesos <= 1 or len(liquidaciones) <= 1:
+        yield from map(_renderizar, liquidaciones)
+        return
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        # django.setup() antes de recibir instancias de modelos
+        initializer=django.setup,
+    ) as executor:
+        chunksize = max(1, len(liquidaciones) // (procesos * 4))
+        yield from executor.map(_renderizar, liquidaciones, chunksize=chunksize)
+
+
+def zip_en_streaming(resultados):
+    """
+    Bytes de un ZIP con cada PDF a medida que se renderiza, más tiempos.csv
+    con los segundos de render de cada documento.
+    """
+    salida = BufferStreaming()
+    nombres = set()
+    tiempos = ["liquidacion_id;archivo;segundos"]
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as archivo:
+        for resultado in resultados:
+            nombre = resultado.nombre
+            if nombre in nombres:
+                nombre = nombre.replace(".pdf", f"_{resultado.liquidacion_id}.pdf")
+            nombres.add(nombre)
+            archivo.writestr(nombre, resultado.contenido)
+            tiempos.append(f"{resultado.liquidacion_id};{nombre};{resultado.segundos:.4f}")
+            yield salida.vaciar()
+        archivo.writestr("tiempos.csv", "\n".join(tiempos) + "\n")
+    yield salida.vaciar()
+
+
+def pdf_combinado(liquidaciones, al_terminar=None):
+    """
+    Un único PDF con todas las liquidaciones. Se arma en el proceso actual
+    porque ReportLab no puede unir PDFs ya generados.
+    """
+    return generar_pdf_liquidaciones(liquidaciones, al_terminar=al_terminar).getvalue()
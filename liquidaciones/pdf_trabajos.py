@@ -0,0 +1,113 @@
+"""
+Cola de generación de PDFs en la base de datos.
+
+La vista encola un TrabajoPdf (un INSERT) y responde enseguida; el comando
+procesar_trabajos_pdf toma los pendientes con TrabajoPdf.objects.tomar(),
+renderiza con pdf_cache / pdf_lote y guarda el resultado en el mismo
+registro, actualizando `procesados` a medida que avanza.
+"""
+
+import logging
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import pdf_cache, pdf_lote
+from .models import TrabajoPdf
+
+logger = logging.getLogger(__name__)
+
+
+def encolar_liquidacion(liquidacion):
+    return TrabajoPdf.objects.create(
+        liquidacion=liquidacion, formato=TrabajoPdf.FormatoChoices.PDF, total=1
+    )
+
+
+def total_lote(filtros):
+    """Liquidaciones del lote (un COUNT); ValueError si pasan de PDF_LOTE_MAXIMO"""
+    total = pdf_lote.liquidaciones_para_pdf(**filtros).count()
+    if total > settings.PDF_LOTE_MAXIMO:
+        raise ValueError(
+            f"El lote tiene {total} liquidaciones; el máximo es {settings.PDF_LOTE_MAXIMO}."
+        )
+    return total
+
+
+def encolar_lote(filtros, formato):
+    """
+    `filtros` como los de FiltroPdfLoteForm.filtros(). ValueError si el lote
+    pasa de PDF_LOTE_MAXIMO liquidaciones.
+    """
+    return TrabajoPdf.objects.create(
+        total=total_lote(filtros),
+        filtros={
+            "cliente": filtros["cliente"].pk if filtros["cliente"] else None,
+            "desde": filtros["desde"].isoformat() if filtros["desde"] else None,
+            "hasta": filtros["hasta"].isoformat() if filtros["hasta"] else None,
+            "planilla_gastos": (
+                filtros["planilla_gastos"].pk if filtros["planilla_gastos"] else None
+            ),
+        },
+        formato=formato,
+    )
+
+
+def procesar(trabajo):
+    """Genera el documento de un trabajo ya tomado y lo deja terminado o con error"""
+    try:
+        if trabajo.liquidacion_id:
+            nombre, contenido = _liquidacion(trabajo)
+        else:
+            nombre, contenido = _lote(trabajo)
+    except Exception:
+        logger.exception("Error al generar el PDF del trabajo %s", trabajo.pk)
+        TrabajoPdf.objects.filter(pk=trabajo.pk).update(
+            estado=TrabajoPdf.EstadoChoices.ERROR,
+            error=traceback.format_exc(),
+            terminado=timezone.now(),
+        )
+        return False
+    TrabajoPdf.objects.filter(pk=trabajo.pk).update(
+        estado=TrabajoPdf.EstadoChoices.TERMINADO,
+        nombre_archivo=nombre,
+        contenido=contenido,
+        procesados=trabajo.total,
+        terminado=timezone.now(),
+    )
+    return True
+
+
+def _avanzar(trabajo, procesados):
+    trabajo.procesados = procesados
+    TrabajoPdf.objects.filter(pk=trabajo.pk).update(procesados=procesados)
+
+
+def _liquidacion(trabajo):
+    liquidacion = pdf_lote.liquidaciones_para_pdf().get(pk=trabajo.liquidacion_id)
+    return pdf_lote.nombre_pdf(liquidacion), pdf_cache.obtener(liquidacion).contenido
+
+
+def _lote(trabajo):
+    # El límite se vuelve a controlar: el lote pudo crecer desde que se encoló
+    total_lote(trabajo.filtros)
+    liquidaciones = list(pdf_lote.liquidaciones_para_pdf(**trabajo.filtros))
+    trabajo.total = len(liquidaciones)
+    TrabajoPdf.objects.filter(pk=trabajo.pk).update(total=trabajo.total)
+
+    if trabajo.formato == TrabajoPdf.FormatoChoices.PDF:
+
+        def al_terminar(liquidacion, segundos):
+            _avanzar(trabajo, trabajo.procesados + 1)
+
+        return "Liquidaciones.pdf", pdf_lote.pdf_combinado(liquidaciones, al_terminar)
+
+    def resultados():
+        for procesados, resultado in enumerate(
+            pdf_lote.renderizar(liquidaciones, procesos=settings.PDF_LOTE_PROCESOS), 1
+        ):
+            yield resultado
+            _avanzar(trabajo, procesados)
+
+    return "Liquidaciones.zip", b"".join(pdf_lote.zip_en_streaming(resultados()))
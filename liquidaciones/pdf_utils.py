@@ -1,15 +1,23 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 import os
-from decimal import Decimal
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
 from io import BytesIO
 
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 from reportlab.platypus import (
     Image,
+    PageBreak,
     Paragraph,
     SimpleDocTemplate,
     Spacer,
@@ -22,147 +30,188 @@ LOGO_PATH = os.path.join(
 )
 
 
-def numero_a_letras(numero):
-    """Convierte un número a su representación en letras en español (Guaraníes)"""
-    # Conversión básica para guaraníes
-    # Esta es una implementación simplificada
-
-    unidades = [
-        "",
-        "uno",
-        "dos",
-        "tres",
-        "cuatro",
-        "cinco",
-        "seis",
-        "siete",
-        "ocho",
-        "nueve",
-    ]
-    decenas = [
-        "",
-        "diez",
-        "veinte",
-        "treinta",
-        "cuarenta",
-        "cincuenta",
-        "sesenta",
-        "setenta",
-        "ochenta",
-        "noventa",
-    ]
-    centenas = [
-        "",
-        "ciento",
-        "doscientos",
-        "trescientos",
-        "cuatrocientos",
-        "quinientos",
-        "seiscientos",
-        "setecientos",
-        "ochocientos",
-        "novecientos",
-    ]
-
-    especiales = {
-        11: "once",
-        12: "doce",
-        13: "trece",
-        14: "catorce",
-        15: "quince",
-        16: "dieciséis",
-        17: "diecisiete",
-        18: "dieciocho",
-        19: "diecinueve",
-        21: "veintiuno",
-        22: "veintidós",
-        23: "veintitrés",
-        24: "veinticuatro",
-        25: "veinticinco",
-        26: "veintiséis",
-        27: "veintisiete",
-        28: "veintiocho",
-        29: "veintinueve",
-    }
-
-    def convertir_grupo(n):
-        if n == 0:
-            return ""
-        elif n in especiales:
-            return especiales[n]
-        elif n < 10:
-            return unidades[n]
-        elif n < 20:
-            return decenas[1]
-        elif n < 30:
-            return especiales.get(n, "veinti" + unidades[n % 10])
-        elif n < 100:
-            u = n % 10
-            d = n // 10
-            if u == 0:
-                return decenas[d]
-            return decenas[d] + " y " + unidades[u]
-        elif n < 1000:
-            c = n // 100
-            resto = n % 100
-            if n == 100:
-                return "cien"
-            if resto == 0:
-                return centenas[c]
-            return centenas[c] + " " + convertir_grupo(resto)
-        return ""
-
-    if numero == 0:
-        return "cero"
-
-    # Convertir a entero si es Decimal
-    if isinstance(numero, Decimal):
-        numero = int(numero)
-
-    numero = int(numero)
-
-    # Dividir en grupos de miles
-    millones = numero // 1000000
-    miles = (numero % 1000000) // 1000
-    unidades_simples = numero % 1000
-
-    resultado = []
-
-    if millones > 0:
-        if millones == 1:
-            resultado.append("un millón")
-        else:
-            resultado.append(convertir_grupo(millones) + " millones")
-
-    if miles > 0:
-        if miles == 1:
-            resultado.append("mil")
-        else:
-            resultado.append(convertir_grupo(miles) + " mil")
-
-    if unidades_simples > 0:
-        resultado.append(convertir_grupo(unidades_simples))
-
-    return ", ".join(resultado) if resultado else "cero"
-
-
-def generar_pdf_liquidacion(liquidacion, buffer=None):
-    """Genera un PDF de la liquidación con el formato de SGB"""
-
-    if buffer is None:
-        buffer = BytesIO()
+_UNIDADES = (
+    "",
+    "uno",
+    "dos",
+    "tres",
+    "cuatro",
+    "cinco",
+    "seis",
+    "siete",
+    "ocho",
+    "nueve",
+)
+_DIEZ_A_VEINTINUEVE = (
+    "diez",
+    "once",
+    "doce",
+    "trece",
+    "catorce",
+    "quince",
+    "dieciséis",
+    "diecisiete",
+    "dieciocho",
+    "diecinueve",
+    "veinte",
+    "veintiuno",
+    "veintidós",
+    "veintitrés",
+    "veinticuatro",
+    "veinticinco",
+    "veintiséis",
+    "veintisiete",
+    "veintiocho",
+    "veintinueve",
+)
+_DECENAS = (
+    "",
+    "",
+    "",
+    "treinta",
+    "cuarenta",
+    "cincuenta",
+    "sesenta",
+    "setenta",
+    "ochenta",
+    "noventa",
+)
+_CENTENAS = (
+    "",
+    "ciento",
+    "doscientos",
+    "trescientos",
+    "cuatrocientos",
+    "quinientos",
+    "seiscientos",
+    "setecientos",
+    "ochocientos",
+    "novecientos",
+)
+# Escala larga del español: millón = 10^6, billón = 10^12, trillón = 10^18
+_ESCALAS = (
+    (10**18, "un trillón", "trillones"),
+    (10**12, "un billón", "billones"),
+    (10**6, "un millón", "millones"),
+)
+_MAXIMO = 10**24
+_CENTESIMO = Decimal("0.01")
+
+
+def _grupo_a_letras(n):
+    """Letras de 1 a 999; solo se usa para armar _GRUPOS"""
+    if n == 100:
+        return "cien"
+    centenas, resto = divmod(n, 100)
+    partes = [_CENTENAS[centenas]] if centenas else []
+    if resto >= 30:
+        decenas, unidades = divmod(resto, 10)
+        texto = _DECENAS[decenas]
+        if unidades:
+            texto += f" y {_UNIDADES[unidades]}"
+        partes.append(texto)
+    elif resto >= 10:
+        partes.append(_DIEZ_A_VEINTINUEVE[resto - 10])
+    elif resto:
+        partes.append(_UNIDADES[resto])
+    return " ".join(partes)
+
+
+def _apocopar(texto):
+    """Forma delante de mil, millones, etc.: un, veintiún, treinta y un"""
+    if texto.endswith("veintiuno"):
+        return texto[: -len("veintiuno")] + "veintiún"
+    if texto.endswith("uno"):
+        return texto[:-1]
+    return texto
+
+
+# Letras de cada grupo de tres cifras (índice 0 = ""), calculadas una sola vez
+_GRUPOS = ("",) + tuple(_grupo_a_letras(n) for n in range(1, 1000))
+_GRUPOS_APOCOPADOS = tuple(_apocopar(texto) for texto in _GRUPOS)
+
+
+def _menor_que_millon(n, separador, grupos):
+    miles, unidades = divmod(n, 1000)
+    partes = []
+    if miles == 1:
+        partes.append("mil")
+    elif miles:
+        partes.append(_GRUPOS_APOCOPADOS[miles] + " mil")
+    if unidades:
+        partes.append(grupos[unidades])
+    return separador.join(partes)
 
-    # Crear el documento PDF
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=40,
-        leftMargin=40,
-        topMargin=40,
-        bottomMargin=40,
-    )
 
-    # Estilos
+def numero_a_letras(numero):
+    """
+    Convierte un importe a letras en español: "un millón, doscientos mil,
+    trescientos". Admite hasta trillones (escala larga) y negativos; los
+    decimales se redondean a dos y se agregan como "con ... centavos".
+    """
+    if isinstance(numero, int):
+        negativo, entero, centavos = numero < 0, abs(numero), 0
+    else:
+        if not isinstance(numero, Decimal):
+            numero = Decimal(str(numero))
+        numero = numero.quantize(_CENTESIMO, ROUND_HALF_UP)
+        negativo = numero < 0
+        entero, centavos = divmod(int(abs(numero) * 100), 100)
+    if entero >= _MAXIMO:
+        raise ValueError(f"{numero} excede el máximo de numero_a_letras")
+
+    partes = []
+    if entero >= 1_000_000:
+        for valor, singular, plural in _ESCALAS:
+            cantidad, entero = divmod(entero, valor)
+            if cantidad == 1:
+                partes.append(singular)
+            elif cantidad:
+                partes.append(
+                    _menor_que_millon(cantidad, " ", _GRUPOS_APOCOPADOS) + " " + plural
+                )
+    if entero:
+        partes.append(_menor_que_millon(entero, ", ", _GRUPOS))
+
+    texto = ", ".join(partes) or "cero"
+    if centavos == 1:
+        texto += " con un centavo"
+    elif centavos:
+        texto += f" con {_GRUPOS_APOCOPADOS[centavos]} centavos"
+    return f"menos {texto}" if negativo else texto
+
+
+class ImagenCompartida(Image):
+    """Image que dibuja un ImageReader ya decodificado en lugar de leer el archivo"""
+
+    def __init__(self, lector, width=None, height=None):
+        self._img = lector
+        super().__init__(lector.fileName, width=width, height=height)
+
+
+@dataclass(frozen=True)
+class KitRender:
+    """
+    Estilos, estilos de tabla y logo del PDF de liquidaciones. Se arma una
+    vez por proceso (kit_render()) y se comparte entre documentos, así que
+    no debe modificarse.
+    """
+
+    estilo_encabezado: ParagraphStyle
+    estilo_subencabezado: ParagraphStyle
+    estilo_direccion: ParagraphStyle
+    estilo_normal: ParagraphStyle
+    estilo_negrita: ParagraphStyle
+    estilo_item: ParagraphStyle
+    tabla_info: TableStyle
+    tabla_items: TableStyle
+    tabla_detalle: TableStyle
+    tabla_firmas: TableStyle
+    logo: ImageReader | None
+
+
+def crear_kit_render():
+    """KitRender nuevo; normalmente conviene el compartido de kit_render()"""
     styles = getSampleStyleSheet()
 
     # Estilo para el encabezado
@@ -214,13 +263,177 @@ def generar_pdf_liquidacion(liquidacion, buffer=None):
         fontName="Helvetica-Bold",
     )
 
+    style_item = ParagraphStyle(
+        "ItemDesc",
+        parent=styles["Normal"],
+        fontSize=9,
+        fontName="Helvetica",
+        leading=11,
+    )
+
+    return KitRender(
+        estilo_encabezado=style_header,
+        estilo_subencabezado=style_subheader,
+        estilo_direccion=style_address,
+        estilo_normal=style_normal,
+        estilo_negrita=style_bold,
+        estilo_item=style_item,
+        tabla_info=TableStyle(
+            [
+                ("ALIGN", (0, 0), (0, -1), "LEFT"),
+                ("ALIGN", (1, 0), (2, -1), "LEFT"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ]
+        ),
+        tabla_items=TableStyle(
+            [
+                ("ALIGN", (0, 0), (0, -1), "LEFT"),
+                ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTNAME", (0, 1), (-1, -2), "Helvetica"),
+                ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 9),
+                ("LINEBELOW", (0, 0), (-1, -1), 0.5, colors.black),
+                ("LINEABOVE", (0, 0), (-1, 0), 0.5, colors.black),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+                ("BACKGROUND", (0, -1), (-1, -1), colors.lightgrey),
+            ]
+        ),
+        tabla_detalle=TableStyle(
+            [
+                ("ALIGN", (0, 0), (0, -1), "LEFT"),
+                ("ALIGN", (1, 0), (1, -1), "LEFT"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+                ("FONTNAME", (1, 0), (-1, -1), "Helvetica"),
+                ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ]
+        ),
+        tabla_firmas=TableStyle(
+            [
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+                ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ]
+        ),
+        # ImageReader decodifica el PNG una sola vez
+        logo=ImageReader(LOGO_PATH) if os.path.exists(LOGO_PATH) else None,
+    )
+
+
+@lru_cache(maxsize=None)
+def kit_render():
+    """KitRender del proceso, creado en el primer uso"""
+    return crear_kit_render()
+
+
+# Streams binarios (solo FlateDecode) en lugar de ASCII85: sin la extensión C
+# de ReportLab, codificar el logo en ASCII85 se lleva la mayor parte del
+# tiempo de cada PDF. rl_config.useA85 es global del proceso y ReportLab no
+# acepta la opción por documento, así que se cambia solo mientras se arma
+# alguno de estos PDFs (varios hilos a la vez comparten el cambio) y después
+# se restaura el valor que tenía.
+_bloqueo_a85 = threading.Lock()
+_armando = 0
+_use_a85 = None
+
+
+@contextmanager
+def _sin_ascii85():
+    global _armando, _use_a85
+    with _bloqueo_a85:
+        if not _armando:
+            _use_a85 = rl_config.useA85
+            rl_config.useA85 = 0
+        _armando += 1
+    try:
+        yield
+    finally:
+        with _bloqueo_a85:
+            _armando -= 1
+            if not _armando:
+                rl_config.useA85 = _use_a85
+
+
+def _documento(buffer):
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=40,
+        bottomMargin=40,
+    )
+
+
+def generar_pdf_liquidacion(liquidacion, buffer=None, kit=None, ascii85=False):
+    """
+    Genera un PDF de la liquidación con el formato de SGB. Con ascii85=True
+    deja rl_config.useA85 como esté (streams en ASCII85 por defecto).
+    """
+
+    if buffer is None:
+        buffer = BytesIO()
+
+    # Crear el documento PDF
+    doc = _documento(buffer)
+    if ascii85:
+        doc.build(contenido_pdf_liquidacion(liquidacion, kit))
+    else:
+        with _sin_ascii85():
+            doc.build(contenido_pdf_liquidacion(liquidacion, kit))
+
+    buffer.seek(0)
+    return buffer
+
+
+def generar_pdf_liquidaciones(liquidaciones, buffer=None, al_terminar=None):
+    """
+    Genera un único PDF con todas las liquidaciones, cada una desde una
+    página nueva. `al_terminar(liquidacion, segundos)` se llama después de
+    armar el contenido de cada una.
+    """
+    if buffer is None:
+        buffer = BytesIO()
+
+    story = []
+    for liquidacion in liquidaciones:
+        inicio = time.perf_counter()
+        if story:
+            story.append(PageBreak())
+        story.extend(contenido_pdf_liquidacion(liquidacion))
+        if al_terminar:
+            al_terminar(liquidacion, time.perf_counter() - inicio)
+    with _sin_ascii85():
+        _documento(buffer).build(story)
+
+    buffer.seek(0)
+    return buffer
+
+
+def contenido_pdf_liquidacion(liquidacion, kit=None):
+    """
+    Flowables (story) de ReportLab con el formato de SGB para una
+    liquidación. `kit` es el KitRender a usar (por defecto el del proceso).
+    """
+
+    kit = kit or kit_render()
+    style_header = kit.estilo_encabezado
+    style_subheader = kit.estilo_subencabezado
+    style_address = kit.estilo_direccion
+    style_normal = kit.estilo_normal
+    style_bold = kit.estilo_negrita
+
     # Contenido del PDF
     story = []
 
     # Encabezado de la empresa - usar imagen si existe, sino texto
-    if os.path.exists(LOGO_PATH):
-        logo = Image(LOGO_PATH, width=6.5 * inch, height=1.0 * inch)
-        story.append(logo)
+    if kit.logo is not None:
+        # Image es un flowable con estado: uno nuevo por documento, sobre el
+        # mismo ImageReader ya decodificado
+        story.append(ImagenCompartida(kit.logo, width=6.5 * inch, height=1.0 * inch))
     else:
         story.append(Paragraph("AGENCIA ADUANERA SGB", style_header))
         story.append(Paragraph("GAVILAN BALOVIER & ASOCIADOS", style_subheader))
@@ -298,15 +511,7 @@ def generar_pdf_liquidacion(liquidacion, buffer=None):
     ]
 
     info_table = Table(info_data, colWidths=[2.5 * inch, 1.5 * inch, 2 * inch])
-    info_table.setStyle(
-        TableStyle(
-            [
-                ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                ("ALIGN", (1, 0), (2, -1), "LEFT"),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ]
-        )
-    )
+    info_table.setStyle(kit.tabla_info)
 
     story.append(info_table)
     story.append(Spacer(1, 0.3 * inch))
@@ -320,16 +525,8 @@ def generar_pdf_liquidacion(liquidacion, buffer=None):
     else:
         items_data = [["", "", "Sub-Total", "I.V.A.", "Total"]]
 
-    style_item = ParagraphStyle(
-        "ItemDesc",
-        parent=styles["Normal"],
-        fontSize=9,
-        fontName="Helvetica",
-        leading=11,
-    )
-
     for item_liq in items_liquidacion:
-        descripcion = Paragraph(item_liq.item or "", style_item)
+        descripcion = Paragraph(item_liq.item or "", kit.estilo_item)
         subtotal = f"{item_liq.monto:,.0f}".replace(",", ".")
         iva = f"{item_liq.iva:,.0f}".replace(",", ".") if item_liq.iva else ""
         total = f"{item_liq.subtotal:,.0f}".replace(",", ".")
@@ -389,29 +586,14 @@ def generar_pdf_liquidacion(liquidacion, buffer=None):
         ]
 
     items_table = Table(items_data, colWidths=col_widths)
-    items_table.setStyle(
-        TableStyle(
-            [
-                ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTNAME", (0, 1), (-1, -2), "Helvetica"),
-                ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("LINEBELOW", (0, 0), (-1, -1), 0.5, colors.black),
-                ("LINEABOVE", (0, 0), (-1, 0), 0.5, colors.black),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                ("BACKGROUND", (0, -1), (-1, -1), colors.lightgrey),
-            ]
-        )
-    )
+    items_table.setStyle(kit.tabla_items)
 
     story.append(items_table)
     story.append(Spacer(1, 0.1 * inch))
 
     # Total en letras
-    total_letras = numero_a_letras(total_general)
+    # Redondeado como el total impreso en la tabla
+    total_letras = numero_a_letras(round(total_general))
     story.append(Paragraph(f"SON GUARANIES: {total_letras.title()}.-", style_bold))
     story.append(Spacer(1, 0.2 * inch))
 
@@ -498,18 +680,7 @@ def generar_pdf_liquidacion(liquidacion, buffer=None):
     detalle_table = Table(
         detalle_data, colWidths=[2 * inch, 2.8 * inch, 1.5 * inch, 1.2 * inch]
     )
-    detalle_table.setStyle(
-        TableStyle(
-            [
-                ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                ("ALIGN", (1, 0), (1, -1), "LEFT"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                ("FONTNAME", (1, 0), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-            ]
-        )
-    )
+    detalle_table.setStyle(kit.tabla_detalle)
 
     story.append(detalle_table)
     story.append(Spacer(1, 0.4 * inch))
@@ -523,21 +694,7 @@ def generar_pdf_liquidacion(liquidacion, buffer=None):
     ]
 
     firmas_table = Table(firmas_data, colWidths=[3 * inch, 3 * inch])
-    firmas_table.setStyle(
-        TableStyle(
-            [
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-            ]
-        )
-    )
+    firmas_table.setStyle(kit.tabla_firmas)
 
     story.append(firmas_table)
-
-    # Construir el PDF
-    doc.build(story)
-
-    buffer.seek(0)
-    return buffer
+    return story
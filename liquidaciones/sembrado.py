@@ -0,0 +1,376 @@
+"""
+Datos sintéticos para medir las vistas con volúmenes de producción.
+
+sembrar() crea clientes, proveedores, bancos, planillas de gastos,
+liquidaciones con sus items y pagos con bulk_create, por lotes y una
+transacción por lote. Como bulk_create no envía señales, los totales de
+liquidaciones y planillas se calculan al generar los items y se guardan
+en el mismo INSERT; al terminar cada lote se regenera search_vector y al
+final los saldos mensuales de los clientes nuevos, las estadísticas del
+dashboard y los índices de autocompletado. Los items y los pagos, la
+mayoría de las filas, se insertan con SQL de varias filas por sentencia
+(ver _insertar()): instanciar los modelos y compilar cada fila con el ORM
+lleva más tiempo que el INSERT.
+
+Los valores salen de un random.Random con semilla: los mismos volúmenes y
+la misma semilla dan los mismos datos, salvo ids y fechas (relativas al
+día de hoy). Las liquidaciones y pagos se reparten entre los clientes con
+una distribución sesgada, como en producción: pocos clientes concentran
+muchas liquidaciones.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+import random
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from clientes.models import Cliente
+from liquidaciones import autocompletar
+from liquidaciones.models import (
+    Banco,
+    Liquidacion,
+    LiquidacionItem,
+    Moneda,
+    Pago,
+    PlanillaGastos,
+    PlanillaGastosItem,
+    Procedencia,
+    Proveedor,
+    SaldoMensual,
+)
+from sgb import estadisticas
+
+# Cantidad de cada entidad por liquidación, si no se indica otra
+PROPORCIONES = {
+    "clientes": 1 / 20,
+    "proveedores": 1 / 200,
+    "planillas": 1 / 50,
+    "items": 10,
+    "pagos": 2,
+}
+ITEMS_POR_PLANILLA = 5
+# Liquidaciones de los últimos MESES meses
+MESES = 36
+# Máximo de filas por sentencia en _insertar()
+FILAS_POR_INSERT = 1000
+# Clientes por llamada a SaldoMensual.objects.reconstruir()
+CLIENTES_POR_SALDO = 500
+
+APELLIDOS = [
+    "Acosta", "Benítez", "Cáceres", "Duarte", "Espínola", "Fernández",
+    "Giménez", "González", "Ibáñez", "Jara", "López", "Martínez", "Núñez",
+    "Ortiz", "Peña", "Ramírez", "Rolón", "Sánchez", "Torres", "Valdez",
+    "Villalba", "Zárate", "Ayala", "Báez", "Cardozo", "Ocampo", "Riquelme",
+]
+RUBROS = [
+    "Importadora", "Comercial", "Distribuidora", "Agroganadera", "Ferretería",
+    "Farmacéutica", "Automotores", "Textil", "Electrónica", "Logística",
+]
+FORMAS = ["S.A.", "S.R.L.", "E.A.S.", "y Cía.", ""]
+PROVEEDORES = [
+    "Shenzhen", "Ningbo", "Guangzhou", "São Paulo", "Curitiba", "Buenos Aires",
+    "Rosario", "Miami", "Hamburg", "Osaka", "Busan", "Valencia",
+]
+GIROS = ["Trading", "Industrial", "Export", "Machinery", "Electronics", "Foods"]
+SUFIJOS = ["Co. Ltd.", "Ltda.", "S.A.", "Inc.", "GmbH", "S.L."]
+PROCEDENCIAS = [
+    "China", "Brasil", "Argentina", "Estados Unidos", "Alemania", "Japón",
+    "Corea del Sur", "España", "Chile", "Uruguay", "India", "Taiwán",
+]
+BANCOS = ["Banco Itaú", "Banco Continental", "Banco GNB", "Banco Basa", "Ueno Bank"]
+CONCEPTOS = [
+    "Honorarios profesionales", "Tasa de servicio aduanero", "Canon informático",
+    "Flete interno", "Estiba y desestiba", "Almacenaje", "Gastos de despacho",
+    "Índice de valoración", "Ley 2422 - Tasa de intervención", "Verificación física",
+    "Sellado y timbrado", "Precinto electrónico", "Transferencia bancaria",
+]
+GASTOS = ["Flete", "Estiba", "Almacenaje", "Guardia", "Fotocopias", "Movilidad"]
+PARTIDAS = ["8471.30.12", "8517.12.31", "3004.90.99", "8703.23.10", "6109.10.00"]
+AD_VALOREM = ["0%", "2%", "5%", "10%", "14%", "18%"]
+CONTENIDOS = ["Repuestos", "Medicamentos", "Electrónicos", "Prendas", "Maquinarias"]
+
+
+def volumenes(liquidaciones, **cantidades):
+    """
+    Volúmenes para `liquidaciones` con las PROPORCIONES, salvo las
+    cantidades indicadas (las que son None se calculan).
+    """
+    resultado = {"liquidaciones": liquidaciones}
+    for nombre, proporcion in PROPORCIONES.items():
+        cantidad = cantidades.get(nombre)
+        if cantidad is None:
+            cantidad = round(liquidaciones * proporcion)
+            if liquidaciones and nombre in ("clientes", "proveedores"):
+                cantidad = max(cantidad, 1)
+        resultado[nombre] = cantidad
+    return resultado
+
+
+def _repartir(total, partes, indice):
+    """Cuántos de `total` le tocan a la parte `indice` de `partes` (suman total)"""
+    return total * (indice + 1) // partes - total * indice // partes
+
+
+def _lotes(cantidad, lote):
+    for inicio in range(0, cantidad, lote):
+        yield range(inicio, min(inicio + lote, cantidad))
+
+
+def _insertar(modelo, campos, filas):
+    """
+    INSERT de `filas` (tuplas con los valores de `campos`, ya adaptados a la
+    base) en la tabla de `modelo`, con tantas filas por sentencia como
+    admita la base.
+    """
+    campos = [modelo._meta.get_field(campo) for campo in campos]
+    columnas = ", ".join(connection.ops.quote_name(campo.column) for campo in campos)
+    marcas = "(" + ", ".join(["%s"] * len(campos)) + ")"
+    por_sentencia = min(FILAS_POR_INSERT, connection.ops.bulk_batch_size(campos, filas))
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    sql = f"INSERT INTO {tabla} ({columnas}) VALUES "
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(filas), por_sentencia):
+            bloque = filas[inicio : inicio + por_sentencia]
+            cursor.execute(
+                sql + ", ".join([marcas] * len(bloque)),
+                [valor for fila in bloque for valor in fila],
+            )
+
+
+def _sesgado(rng, valores):
+    """Un valor de la lista, con más probabilidad los primeros"""
+    return valores[int(len(valores) * rng.random() ** 2)]
+
+
+class _Sembrador:
+    def __init__(self, volumenes, lote, semilla, avisar):
+        self.volumenes = volumenes
+        self.lote = lote
+        self.rng = random.Random(semilla)
+        self.avisar = avisar or (lambda mensaje: None)
+        self.hoy = timezone.localdate()
+
+    def sembrar(self):
+        rng = self.rng
+        self.monedas = list(Moneda.objects.values_list("pk", flat=True))
+        self.usd = Moneda.objects.get(codigo="USD").pk
+        self.bancos = self._existentes(
+            Banco,
+            BANCOS,
+            lambda i, nombre: Banco(
+                nombre=nombre, titular="SGB Despachos", numero_cuenta=f"{i:03d}-1234567"
+            ),
+        )
+        procedencias = self._existentes(
+            Procedencia, PROCEDENCIAS, lambda i, nombre: Procedencia(nombre=nombre)
+        )
+        self.clientes = self._crear_por_lotes(Cliente, "clientes", self._cliente)
+        self.proveedores = self._crear_por_lotes(
+            Proveedor,
+            "proveedores",
+            lambda i: Proveedor(
+                nombre=(
+                    f"{rng.choice(PROVEEDORES)} {rng.choice(GIROS)} "
+                    f"{rng.choice(SUFIJOS)}"
+                ),
+                procedencia_id=rng.choice(procedencias),
+            ),
+        )
+        self.planillas = self._planillas()
+        self._liquidaciones()
+        self._saldos()
+        estadisticas.descartar()
+        for autocompletado in (
+            autocompletar.CLIENTES,
+            autocompletar.PROVEEDORES,
+            autocompletar.LIQUIDACIONES,
+            autocompletar.PLANILLAS_GASTOS,
+        ):
+            autocompletado.descartar()
+        return self.volumenes
+
+    def _crear(self, modelo, objetos):
+        objetos = modelo.objects.bulk_create(objetos, batch_size=self.lote)
+        return [objeto.pk for objeto in objetos]
+
+    def _crear_por_lotes(self, modelo, nombre, fabrica):
+        pks = []
+        for rango in _lotes(self.volumenes[nombre], self.lote):
+            with transaction.atomic():
+                pks += self._crear(modelo, [fabrica(i) for i in rango])
+            self.avisar(f"{nombre}: {len(pks)}/{self.volumenes[nombre]}")
+        return pks
+
+    def _existentes(self, modelo, nombres, fabrica):
+        """pks de las filas con esos nombres; crea las que falten"""
+        pks = dict(modelo.objects.filter(nombre__in=nombres).values_list("nombre", "pk"))
+        faltan = [
+            fabrica(i, nombre) for i, nombre in enumerate(nombres, 1) if nombre not in pks
+        ]
+        return sorted(pks.values()) + self._crear(modelo, faltan)
+
+    def _cliente(self, i):
+        rng = self.rng
+        nombre = f"{rng.choice(RUBROS)} {rng.choice(APELLIDOS)}"
+        if rng.random() < 0.5:
+            nombre += f" {rng.choice(APELLIDOS)}"
+        forma = rng.choice(FORMAS)
+        return Cliente(
+            nombre=f"{nombre} {forma}".strip(),
+            ruc=f"{rng.randrange(1_000_000, 99_999_999)}-{rng.randrange(10)}",
+            email=f"cliente{i}@example.com" if rng.random() < 0.7 else None,
+        )
+
+    def _fecha(self):
+        return self.hoy - timedelta(days=self.rng.randrange(MESES * 30))
+
+    def _planillas(self):
+        rng = self.rng
+        inicio = PlanillaGastos.objects.count()
+        pks = []
+        for rango in _lotes(self.volumenes["planillas"], self.lote):
+            planillas, items = [], []
+            for i in rango:
+                gastos = [
+                    (rng.choice(GASTOS), rng.randrange(50_000, 2_000_000, 1000))
+                    for _ in range(ITEMS_POR_PLANILLA)
+                ]
+                planillas.append(
+                    PlanillaGastos(
+                        fecha=self._fecha(),
+                        numero_planilla=f"PG-{inicio + i + 1:07d}",
+                        total_gastos=sum(monto for _, monto in gastos),
+                    )
+                )
+                items.append(gastos)
+            with transaction.atomic():
+                creadas = self._crear(PlanillaGastos, planillas)
+                _insertar(
+                    PlanillaGastosItem,
+                    ("planilla_gastos", "descripcion", "monto"),
+                    [(pk, *gasto) for pk, gastos in zip(creadas, items) for gasto in gastos],
+                )
+            pks += creadas
+            self.avisar(f"planillas: {len(pks)}/{self.volumenes['planillas']}")
+        return pks
+
+    def _liquidaciones(self):
+        cantidad = self.volumenes["liquidaciones"]
+        numero = Liquidacion.objects.count()
+        for rango in _lotes(cantidad, self.lote):
+            liquidaciones, items, pagos = [], [], []
+            for i in rango:
+                numero += 1
+                liquidacion, filas = self._liquidacion(
+                    numero, _repartir(self.volumenes["items"], cantidad, i)
+                )
+                liquidaciones.append(liquidacion)
+                items.append(filas)
+                pagos.append(_repartir(self.volumenes["pagos"], cantidad, i))
+            with transaction.atomic():
+                creadas = Liquidacion.objects.bulk_create(liquidaciones, batch_size=self.lote)
+                _insertar(
+                    LiquidacionItem,
+                    ("liquidacion", "item", "monto", "iva", "retencion"),
+                    [
+                        (liquidacion.pk, *fila)
+                        for liquidacion, filas in zip(creadas, items)
+                        for fila in filas
+                    ],
+                )
+                _insertar(
+                    Pago,
+                    ("liquidacion", "banco", "fecha", "monto", "referencia", "concepto"),
+                    [
+                        pago
+                        for liquidacion, cantidad_pagos in zip(creadas, pagos)
+                        for pago in self._pagos(liquidacion, cantidad_pagos)
+                    ],
+                )
+                Liquidacion.objects.filter(
+                    pk__in=[liquidacion.pk for liquidacion in creadas]
+                ).actualizar_busqueda()
+            self.avisar(f"liquidaciones: {rango.stop}/{cantidad}")
+
+    def _liquidacion(self, numero, cantidad_items):
+        rng = self.rng
+        filas = []
+        for _ in range(cantidad_items):
+            monto = rng.randrange(50_000, 5_000_000, 500)
+            filas.append(
+                (
+                    rng.choice(CONCEPTOS),
+                    monto,
+                    monto // 10 if rng.random() < 0.8 else 0,
+                    monto // 100 if rng.random() < 0.1 else 0,
+                )
+            )
+        monto = sum(fila[1] for fila in filas)
+        iva = sum(fila[2] for fila in filas)
+        retencion = sum(fila[3] for fila in filas)
+        valor = rng.randrange(1_000, 200_000)
+        tipo_cambio = rng.randrange(7_000, 7_600)
+        liquidacion = Liquidacion(
+            fecha=self._fecha(),
+            cliente_id=_sesgado(rng, self.clientes),
+            numero_liquidacion=f"LIQ-{numero:07d}",
+            proforma=f"PF-{rng.randrange(10**6):06d}" if rng.random() < 0.3 else None,
+            orden_de_compra=f"OC-{rng.randrange(10**5):05d}" if rng.random() < 0.3 else None,
+            numero_despacho=f"{self.hoy.year % 100}002IC04{numero:06d}X",
+            clase=rng.choice(Liquidacion.ClaseChoices.values),
+            numero_factura_comercial=f"FC-{rng.randrange(10**7):07d}",
+            partida_arancelaria=rng.choice(PARTIDAS),
+            ad_valorem=rng.choice(AD_VALOREM),
+            factura=Decimal(valor),
+            flete=Decimal(valor // 20),
+            seguro=Decimal(valor // 100),
+            valor_imponible=Decimal(valor + valor // 20 + valor // 100),
+            moneda_valor_imponible_id=self.usd,
+            moneda_factura_id=rng.choice(self.monedas),
+            equivalente_gs=Decimal(valor * tipo_cambio),
+            tipo_cambio_despacho=str(tipo_cambio),
+            tipo_cambio_factura=str(tipo_cambio + rng.randrange(-20, 20)),
+            proveedor_id=_sesgado(rng, self.proveedores),
+            detalle_de_contenido=rng.choice(CONTENIDOS),
+            planilla_gastos_id=(
+                rng.choice(self.planillas) if self.planillas and rng.random() < 0.4 else None
+            ),
+            total_monto=monto,
+            total_iva=iva,
+            total_retencion=retencion,
+            total_subtotal=monto + iva - retencion,
+        )
+        return liquidacion, filas
+
+    def _pagos(self, liquidacion, cantidad):
+        """Filas de pagos que cubren todo (la mayoría) o parte de la liquidación"""
+        rng = self.rng
+        cobrado = liquidacion.total_subtotal
+        if rng.random() < 0.3:
+            cobrado = cobrado * rng.randrange(20, 100) // 100
+        for i in range(cantidad):
+            fecha = min(liquidacion.fecha + timedelta(days=rng.randrange(60)), self.hoy)
+            yield (
+                liquidacion.pk,
+                rng.choice(self.bancos),
+                connection.ops.adapt_datefield_value(fecha),
+                _repartir(cobrado, cantidad, i),
+                f"TRF-{rng.randrange(10**8):08d}",
+                "Pago de liquidación" if i + 1 == cantidad else "Pago parcial",
+            )
+
+    def _saldos(self):
+        clientes = sorted(self.clientes)
+        for inicio in range(0, len(clientes), CLIENTES_POR_SALDO):
+            SaldoMensual.objects.reconstruir(clientes[inicio : inicio + CLIENTES_POR_SALDO])
+        self.avisar(f"saldos mensuales: {len(clientes)} clientes")
+
+
+def sembrar(volumenes, lote=5000, semilla=0, avisar=None):
+    """
+    Crea los volúmenes indicados (ver volumenes()) y devuelve el mismo
+    dict. `avisar` recibe un mensaje de progreso por lote.
+    """
+    return _Sembrador(volumenes, lote, semilla, avisar).sembrar()
@@ -0,0 +1,361 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from operator import attrgetter
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from clientes.models import Cliente
+from sgb import estadisticas
+from sgb.cache import invalidar, invalidar_con_senales
+
+from . import autocompletar, pdf_cache
+from .models import (
+    Liquidacion,
+    LiquidacionItem,
+    Moneda,
+    Pago,
+    PlanillaGastos,
+    PlanillaGastosItem,
+    Procedencia,
+    Proveedor,
+    SaldoMensual,
+)
+
+# Campos de la liquidación que forman parte de search_vector
+CAMPOS_DOCUMENTO = {
+    "numero_liquidacion",
+    "numero_despacho",
+    "numero_factura_comercial",
+    "proforma",
+    "orden_de_compra",
+    "cliente",
+    "proveedor",
+}
+
+
+def _actualizar_saldos(*periodos):
+    """Recalcula SaldoMensual para cada (cliente_id, fecha) distinto"""
+    fecha = Liquidacion._meta.get_field("fecha")
+    meses = {
+        (cliente_id, fecha.to_python(dia).replace(day=1))
+        for cliente_id, dia in periodos
+        if cliente_id is not None
+    }
+    for cliente_id, mes in sorted(meses):
+        SaldoMensual.objects.actualizar(cliente_id, mes)
+
+
+def _borrado_desde(origin, *modelos):
+    """Si el borrado en cascada empezó por una instancia o queryset de `modelos`"""
+    return getattr(origin, "model", type(origin)) in modelos
+
+
+# Si quien borra items con QuerySet.delete() aplica después sus efectos con
+# items_*_guardados (ver items_en_lote)
+_items_en_lote = ContextVar("items_en_lote", default=False)
+
+
+@contextmanager
+def items_en_lote():
+    """
+    Mientras dura, los QuerySet.delete() de items no actualizan totales,
+    saldos ni autocompletado por cada fila: quien borra llama después a
+    items_liquidacion_guardados() o items_planilla_guardados(). Fuera de
+    este bloque las señales corrigen todo, como con cualquier otro borrado.
+    """
+    token = _items_en_lote.set(True)
+    try:
+        yield
+    finally:
+        _items_en_lote.reset(token)
+
+
+def _borrado_en_lote(origin, modelo):
+    """Si el borrado es un QuerySet.delete() de `modelo` dentro de items_en_lote()"""
+    return _items_en_lote.get() and isinstance(origin, QuerySet) and origin.model is modelo
+
+
+@receiver(post_save, sender=LiquidacionItem)
+@receiver(post_delete, sender=LiquidacionItem)
+def actualizar_totales_liquidacion(sender, instance, origin=None, **kwargs):
+    """Mantiene las columnas de totales de la liquidación del item y su saldo mensual"""
+    if _borrado_desde(origin, Liquidacion, Cliente):
+        # La liquidación también se borra; su saldo se corrige en post_delete
+        return
+    if _borrado_en_lote(origin, LiquidacionItem):
+        return
+    liquidaciones = Liquidacion.objects.filter(pk=instance.liquidacion_id)
+    liquidaciones.recompute_totals()
+    _actualizar_saldos(*liquidaciones.values_list("cliente_id", "fecha"))
+
+
+@receiver(post_save, sender=PlanillaGastosItem)
+@receiver(post_delete, sender=PlanillaGastosItem)
+def actualizar_total_planilla(sender, instance, origin=None, **kwargs):
+    """Mantiene total_gastos de la planilla del item"""
+    if _borrado_en_lote(origin, PlanillaGastosItem):
+        return
+    PlanillaGastos.objects.filter(pk=instance.planilla_gastos_id).recompute_totals()
+
+
+@receiver(pre_save, sender=LiquidacionItem)
+def recordar_liquidacion_item(sender, instance, **kwargs):
+    """Guarda la liquidación previa del item, por si pasa a otra"""
+    instance._padre_anterior = (
+        LiquidacionItem.objects.filter(pk=instance.pk)
+        .values_list("liquidacion_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(pre_save, sender=PlanillaGastosItem)
+def recordar_planilla_item(sender, instance, **kwargs):
+    """Guarda la planilla previa del item, por si pasa a otra"""
+    instance._padre_anterior = (
+        PlanillaGastosItem.objects.filter(pk=instance.pk)
+        .values_list("planilla_gastos_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+def _padre_anterior(instance, padre_id):
+    """La liquidación o planilla que el item acaba de dejar, o None"""
+    anterior = getattr(instance, "_padre_anterior", None)
+    return anterior if anterior != padre_id else None
+
+
+@receiver(post_save, sender=LiquidacionItem)
+def quitar_item_de_liquidacion_anterior(sender, instance, **kwargs):
+    """Los totales, el saldo y las caches de la liquidación que dejó el item"""
+    anterior = _padre_anterior(instance, instance.liquidacion_id)
+    if anterior is None:
+        return
+    liquidaciones = Liquidacion.objects.filter(pk=anterior)
+    liquidaciones.recompute_totals()
+    _actualizar_saldos(*liquidaciones.values_list("cliente_id", "fecha"))
+    pdf_cache.invalidar(anterior)
+    invalidar("liquidacion", anterior)
+
+
+@receiver(post_save, sender=PlanillaGastosItem)
+def quitar_item_de_planilla_anterior(sender, instance, **kwargs):
+    """El total y las caches de la planilla que dejó el item"""
+    anterior = _padre_anterior(instance, instance.planilla_gastos_id)
+    if anterior is None:
+        return
+    PlanillaGastos.objects.filter(pk=anterior).recompute_totals()
+    invalidar("planilla_gastos", anterior)
+
+
+def items_liquidacion_guardados(liquidacion):
+    """
+    Lo que hacen las señales de LiquidacionItem, una sola vez para toda la
+    liquidación. Se llama después de bulk_create / bulk_update de sus items,
+    que no envían señales, o de borrarlos con QuerySet.delete() dentro de
+    items_en_lote().
+    """
+    liquidaciones = Liquidacion.objects.filter(pk=liquidacion.pk)
+    liquidaciones.recompute_totals()
+    _actualizar_saldos(*liquidaciones.values_list("cliente_id", "fecha"))
+    pdf_cache.invalidar(liquidacion.pk)
+    invalidar("liquidacion", liquidacion.pk)
+    _actualizar_autocompletado(autocompletar.LIQUIDACIONES)
+
+
+def items_planilla_guardados(planilla):
+    """Como items_liquidacion_guardados(), para los items de una planilla"""
+    PlanillaGastos.objects.filter(pk=planilla.pk).recompute_totals()
+    invalidar("planilla_gastos", planilla.pk)
+    _actualizar_autocompletado(autocompletar.PLANILLAS_GASTOS)
+
+
+@receiver(post_save, sender=Liquidacion)
+def actualizar_busqueda_liquidacion(sender, instance, update_fields=None, **kwargs):
+    """Regenera search_vector cuando cambia algún campo del documento"""
+    if update_fields is not None and not CAMPOS_DOCUMENTO & set(update_fields):
+        return
+    Liquidacion.objects.filter(pk=instance.pk).actualizar_busqueda()
+
+
+@receiver(post_save, sender=Cliente)
+def actualizar_busqueda_cliente(sender, instance, created, **kwargs):
+    """El nombre y RUC del cliente forman parte del documento de sus liquidaciones"""
+    if not created:
+        Liquidacion.objects.filter(cliente=instance).actualizar_busqueda()
+
+
+@receiver(post_save, sender=Proveedor)
+def actualizar_busqueda_proveedor(sender, instance, created, **kwargs):
+    """El nombre del proveedor forma parte del documento de sus liquidaciones"""
+    if not created:
+        Liquidacion.objects.filter(proveedor=instance).actualizar_busqueda()
+
+
+@receiver(pre_save, sender=Liquidacion)
+def recordar_periodo_liquidacion(sender, instance, **kwargs):
+    """Guarda el cliente y la fecha previos para corregir su saldo mensual"""
+    instance._periodo_anterior = (
+        Liquidacion.objects.filter(pk=instance.pk).values_list("cliente_id", "fecha").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Liquidacion)
+def actualizar_saldo_liquidacion(sender, instance, created, **kwargs):
+    """
+    El total de la liquidación cuenta en el mes de su fecha y sus pagos en
+    los meses de las suyas: si cambia el cliente, esos meses se corrigen
+    para el anterior y para el nuevo.
+    """
+    anterior = getattr(instance, "_periodo_anterior", None)
+    actual = (instance.cliente_id, sender._meta.get_field("fecha").to_python(instance.fecha))
+    if created or anterior is None or anterior == actual:
+        return
+    periodos = [anterior, actual]
+    if anterior[0] != instance.cliente_id:
+        for fecha in instance.pago_set.values_list("fecha", flat=True).distinct():
+            periodos += [(anterior[0], fecha), (instance.cliente_id, fecha)]
+    _actualizar_saldos(*periodos)
+
+
+@receiver(post_delete, sender=Liquidacion)
+def quitar_saldo_liquidacion(sender, instance, origin=None, **kwargs):
+    if _borrado_desde(origin, Cliente):
+        # Los saldos del cliente se borran en cascada
+        return
+    _actualizar_saldos((instance.cliente_id, instance.fecha))
+
+
+@receiver(pre_save, sender=Pago)
+def recordar_periodo_pago(sender, instance, **kwargs):
+    """Guarda el cliente y la fecha previos para corregir su saldo mensual"""
+    instance._periodo_anterior = (
+        Pago.objects.filter(pk=instance.pk)
+        .values_list("liquidacion__cliente_id", "fecha")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Pago)
+@receiver(post_delete, sender=Pago)
+def actualizar_saldo_pago(sender, instance, **kwargs):
+    cliente_id = (
+        Liquidacion.objects.filter(pk=instance.liquidacion_id)
+        .values_list("cliente_id", flat=True)
+        .first()
+    )
+    periodos = [(cliente_id, instance.fecha)]
+    if getattr(instance, "_periodo_anterior", None):
+        periodos.append(instance._periodo_anterior)
+    _actualizar_saldos(*periodos)
+
+
+@receiver(post_save, sender=Liquidacion)
+@receiver(post_delete, sender=Liquidacion)
+def invalidar_pdf_liquidacion(sender, instance, **kwargs):
+    """Descarta el PDF cacheado de la liquidación"""
+    pdf_cache.invalidar(instance.pk)
+
+
+@receiver(post_save, sender=LiquidacionItem)
+@receiver(post_delete, sender=LiquidacionItem)
+def invalidar_pdf_item(sender, instance, **kwargs):
+    """Descarta el PDF cacheado de la liquidación del item"""
+    pdf_cache.invalidar(instance.liquidacion_id)
+
+
+def _actualizar_autocompletado(autocompletado, pk=None, descartar=False):
+    """
+    Ahora, para las consultas de este proceso, y otra vez al confirmar la
+    transacción: otro proceso que rearme su índice en el medio no ve la
+    fila sin confirmar.
+    """
+    accion = autocompletado.descartar if descartar else lambda: autocompletado.actualizar(pk)
+    accion()
+    transaction.on_commit(accion)
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def actualizar_autocompletado_cliente(sender, instance, created=False, **kwargs):
+    _actualizar_autocompletado(autocompletar.CLIENTES, instance.pk)
+    if not created:
+        # Las liquidaciones también se buscan por el nombre y RUC del cliente
+        _actualizar_autocompletado(autocompletar.LIQUIDACIONES, descartar=True)
+
+
+@receiver(post_save, sender=Proveedor)
+@receiver(post_delete, sender=Proveedor)
+def actualizar_autocompletado_proveedor(sender, instance, created=False, **kwargs):
+    _actualizar_autocompletado(autocompletar.PROVEEDORES, instance.pk)
+    if not created:
+        _actualizar_autocompletado(autocompletar.LIQUIDACIONES, descartar=True)
+
+
+@receiver(post_save, sender=Procedencia)
+@receiver(post_delete, sender=Procedencia)
+def actualizar_autocompletado_procedencia(sender, instance, created=False, **kwargs):
+    if not created:
+        _actualizar_autocompletado(autocompletar.PROVEEDORES, descartar=True)
+
+
+@receiver(post_save, sender=Liquidacion)
+@receiver(post_delete, sender=Liquidacion)
+def actualizar_autocompletado_liquidacion(sender, instance, origin=None, **kwargs):
+    if not _borrado_desde(origin, Cliente, Proveedor):
+        _actualizar_autocompletado(autocompletar.LIQUIDACIONES, instance.pk)
+
+
+@receiver(post_save, sender=LiquidacionItem)
+@receiver(post_delete, sender=LiquidacionItem)
+def actualizar_autocompletado_item(sender, instance, origin=None, **kwargs):
+    """El total de la liquidación forma parte de su etiqueta"""
+    if not (
+        _borrado_desde(origin, Liquidacion, Cliente, Proveedor)
+        or _borrado_en_lote(origin, LiquidacionItem)
+    ):
+        _actualizar_autocompletado(autocompletar.LIQUIDACIONES)
+
+
+@receiver(post_save, sender=PlanillaGastos)
+@receiver(post_delete, sender=PlanillaGastos)
+def actualizar_autocompletado_planilla(sender, instance, **kwargs):
+    _actualizar_autocompletado(autocompletar.PLANILLAS_GASTOS, instance.pk)
+
+
+@receiver(post_save, sender=PlanillaGastosItem)
+@receiver(post_delete, sender=PlanillaGastosItem)
+def actualizar_autocompletado_planilla_item(sender, instance, origin=None, **kwargs):
+    if not (
+        _borrado_desde(origin, PlanillaGastos)
+        or _borrado_en_lote(origin, PlanillaGastosItem)
+    ):
+        _actualizar_autocompletado(autocompletar.PLANILLAS_GASTOS)
+
+
+# Versiones de las entradas de cache de cada objeto (ver sgb.cache): los
+# fragmentos de liquidacion_detail y planilla_gastos_detail, entre otros
+for modelo, nombre, pk in [
+    (Liquidacion, "liquidacion", attrgetter("pk")),
+    (LiquidacionItem, "liquidacion", attrgetter("liquidacion_id")),
+    (PlanillaGastos, "planilla_gastos", attrgetter("pk")),
+    (PlanillaGastosItem, "planilla_gastos", attrgetter("planilla_gastos_id")),
+]:
+    invalidar_con_senales(modelo, nombre, pk)
+
+# Nombres que se muestran en liquidacion_detail
+for modelo in (Cliente, Proveedor, Procedencia, Moneda):
+    invalidar_con_senales(modelo, modelo._meta.model_name, al_borrar=False)
+
+# Conteos e importes del dashboard (ver sgb.estadisticas)
+estadisticas.conectar_senales()
@@ -5,13 +5,24 @@ from . import views
 urlpatterns = [
     # Liquidacion URLs
     path("", views.liquidacion_list, name="liquidacion_list"),
+    path("exportar/", views.liquidacion_export, name="liquidacion_export"),
     path("crear/", views.liquidacion_create, name="liquidacion_create"),
     path("<int:pk>/", views.liquidacion_detail, name="liquidacion_detail"),
     path("<int:pk>/editar/", views.liquidacion_edit, name="liquidacion_edit"),
     path("<int:pk>/eliminar/", views.liquidacion_delete, name="liquidacion_delete"),
     path("<int:pk>/pdf/", views.liquidacion_pdf, name="liquidacion_pdf"),
+    path("pdf-lote/", views.liquidacion_pdf_lote, name="liquidacion_pdf_lote"),
+    # Cola de PDFs
+    path("pdf-trabajos/", views.trabajo_pdf_encolar, name="trabajo_pdf_encolar"),
+    path("pdf-trabajos/<int:pk>/", views.trabajo_pdf_estado, name="trabajo_pdf_estado"),
+    path(
+        "pdf-trabajos/<int:pk>/descargar/",
+        views.trabajo_pdf_descargar,
+        name="trabajo_pdf_descargar",
+    ),
     # Pago URLs
     path("pagos/", views.pago_list, name="pago_list"),
+    path("pagos/exportar/", views.pago_export, name="pago_export"),
     path("pagos/crear/", views.pago_create, name="pago_create"),
     path("pagos/<int:pk>/", views.pago_detail, name="pago_detail"),
     path("pagos/<int:pk>/editar/", views.pago_edit, name="pago_edit"),
@@ -46,6 +57,11 @@ urlpatterns = [
     ),
     # PlanillaGastos URLs
     path("planillas-gastos/", views.planilla_gastos_list, name="planilla_gastos_list"),
+    path(
+        "planillas-gastos/exportar/",
+        views.planilla_gastos_export,
+        name="planilla_gastos_export",
+    ),
     path(
         "planillas-gastos/crear/",
         views.planilla_gastos_create,
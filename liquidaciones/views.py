@@ -1,68 +1,111 @@
+from decimal import Decimal, InvalidOperation
+import logging
+import time
+
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db import models
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
 from clientes.models import Cliente
-
-from .forms import LiquidacionForm, LiquidacionItemFormSet, PagoForm, BancoForm, ProcedenciaForm, ProveedorForm, PlanillaGastosForm, PlanillaGastosItemFormSet
-from .models import Banco, Liquidacion, LiquidacionItem, Pago, Proveedor, Procedencia, PlanillaGastos, PlanillaGastosItem
-from .pdf_utils import generar_pdf_liquidacion
+from sgb.cache import compartida, version, versiones
+from sgb.pagination import KeysetPaginator
+from sgb.search import buscar
+
+from . import autocompletar, exportar, pdf_cache, pdf_lote, pdf_trabajos
+from .forms import FiltroPdfLoteForm, TrabajoPdfForm, LiquidacionForm, LiquidacionItemFormSet, PagoForm, BancoForm, ProcedenciaForm, ProveedorForm, PlanillaGastosForm, PlanillaGastosItemFormSet
+from .models import Banco, Liquidacion, LiquidacionItem, Pago, Proveedor, Procedencia, PlanillaGastos, PlanillaGastosItem, TrabajoPdf
+from .signals import items_en_lote, items_liquidacion_guardados, items_planilla_guardados
+
+logger = logging.getLogger(__name__)
+
+
+def _guardar_items(formset, padre, completar):
+    """
+    Guarda los items de un formset inline válido con un bulk_create para los
+    nuevos, un bulk_update para los modificados y un solo borrado para los
+    marcados. completar(item) prepara cada item y devuelve False para no
+    guardarlo. Como bulk_create y bulk_update no envían señales, y el borrado
+    se hace dentro de items_en_lote(), quien llama aplica sus efectos una vez
+    por documento (ver items_*_guardados en liquidaciones.signals). Devuelve
+    los items guardados.
+    """
+    modelo = formset.model
+    guardados = []
+    for item in formset.save(commit=False):
+        setattr(item, formset.fk.name, padre)
+        if completar(item):
+            guardados.append(item)
+    nuevos = [item for item in guardados if item.pk is None]
+    modificados = [item for item in guardados if item.pk is not None]
+    if nuevos:
+        modelo.objects.bulk_create(nuevos)
+    if modificados:
+        campos = [campo.name for campo in modelo._meta.concrete_fields if not campo.primary_key]
+        modelo.objects.bulk_update(modificados, campos)
+    borrados = [item.pk for item in formset.deleted_objects]
+    if borrados:
+        with items_en_lote():
+            modelo.objects.filter(pk__in=borrados).delete()
+    return guardados
+
+
+def _completar_item_liquidacion(item):
+    """Solo los items con concepto; los importes vacíos quedan en 0"""
+    if not item.item:
+        return False
+    item.retencion = item.retencion or 0
+    item.monto = item.monto or 0
+    item.iva = item.iva or 0
+    return True
+
+
+def _completar_item_planilla(item):
+    """Solo los items con descripción; el monto vacío queda en 0"""
+    if not item.descripcion:
+        return False
+    item.monto = item.monto or 0
+    return True
+
+
+def _registrar_errores(documento, form, formset=None):
+    """Errores de validación de un formulario (y sus items), sin los datos enviados"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    items = []
+    if formset is not None:
+        items = [item.errors.get_json_data() for item in formset if item.errors]
+        items += formset.non_form_errors()
+    logger.info(
+        "Formulario de %s inválido: %s; items: %s",
+        documento,
+        form.errors.get_json_data(),
+        items,
+    )
 
 
 def liquidacion_create(request):
-    print("=== LIQUIDACION CREATE VIEW CALLED ===")
-    print("Request method:", request.method)
-
     if request.method == "POST":
-        print("=== POST REQUEST RECEIVED ===")
-        print("POST data keys:", list(request.POST.keys()))
-        print(
-            "POST data values:",
-            {k: v for k, v in request.POST.items() if k != "csrfmiddlewaretoken"},
-        )
-
         form = LiquidacionForm(request.POST)
         formset = LiquidacionItemFormSet(request.POST)
 
-        print("Form valid:", form.is_valid())
-        if not form.is_valid():
-            print("Form errors:", dict(form.errors))
-
-        print("Formset valid:", formset.is_valid())
-        if not formset.is_valid():
-            print("Formset errors:", [dict(form.errors) for form in formset])
-            print("Formset non_form_errors:", formset.non_form_errors())
-
         if form.is_valid() and formset.is_valid():
-            print("=== BOTH FORMS VALID - SAVING ===")
             try:
-                liquidacion = form.save()
-                print(f"✅ Liquidacion saved with ID: {liquidacion.id}")
-
-                # Only save forms that have an item selected
-                instances = formset.save(commit=False)
-                saved_items = []
-
-                for instance in instances:
-                    # Check if item_id exists instead of accessing the item object
-                    if instance.item:  # Only save if item is filled
-                        instance.liquidacion = liquidacion
-                        # Ensure numeric fields have default values if empty
-                        if not instance.retencion:
-                            instance.retencion = 0
-                        if not instance.monto:
-                            instance.monto = 0
-                        if not instance.iva:
-                            instance.iva = 0
-                        instance.save()
-                        saved_items.append(instance)
-                        print(f"✅ Saved item: {instance.item}")
-
-                # Also handle formset deletions
-                for obj in formset.deleted_objects:
-                    obj.delete()
+                with transaction.atomic():
+                    liquidacion = form.save()
+                    saved_items = _guardar_items(
+                        formset, liquidacion, _completar_item_liquidacion
+                    )
+                    items_liquidacion_guardados(liquidacion)
+                logger.info(
+                    "Liquidación %s creada con %d item(s)", liquidacion.pk, len(saved_items)
+                )
 
                 # Show appropriate message
                 if saved_items:
@@ -80,20 +123,12 @@ def liquidacion_create(request):
                         "No se agregaron items a esta liquidación. Puedes editarla para agregar items más tarde.",
                     )
 
-                print("=== REDIRECTING TO LIQUIDACION_LIST ===")
-                redirect_response = redirect("liquidacion_list")
-                print(f"Redirect response: {redirect_response}")
-                print(f"Redirect URL: {redirect_response.url}")
-                return redirect_response
-
-            except Exception as e:
-                print(f"❌ ERROR DURING SAVE: {e}")
-                import traceback
+                return redirect("liquidacion_list")
 
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error al crear la liquidación")
         else:
-            print("=== FORM VALIDATION FAILED ===")
-            # Add error messages for debugging
+            _registrar_errores("liquidación", form, formset)
             if not form.is_valid():
                 messages.error(
                     request, f"Error en el formulario principal: {form.errors}"
@@ -110,7 +145,6 @@ def liquidacion_create(request):
                 ):
                     form_instance.initial["item"] = form_instance.cleaned_data["item"]
     else:
-        print("=== GET REQUEST - RENDERING EMPTY FORM ===")
         form = LiquidacionForm()
         # For create, we want one empty form to start with
         formset = LiquidacionItemFormSet(queryset=LiquidacionItem.objects.none())
@@ -121,83 +155,63 @@ def liquidacion_create(request):
 
 
 def liquidacion_detail(request, pk):
-    liquidacion = get_object_or_404(Liquidacion, pk=pk)
+    """
+    Una consulta con las relaciones que muestra la página; los items se leen
+    solo si el fragmento no está en la cache. La clave del fragmento lleva la
+    versión de la liquidación y de cada objeto relacionado (ver sgb.cache).
+    Si las versiones no son compartidas entre procesos, el cuerpo se
+    renderiza siempre, sin cache.
+    """
+    liquidacion = get_object_or_404(
+        Liquidacion.objects.select_related(
+            "cliente",
+            "proveedor__procedencia",
+            "moneda_valor_imponible",
+            "moneda_factura",
+            "planilla_gastos",
+        ),
+        pk=pk,
+    )
+    version = None
+    if compartida():
+        version = ".".join(map(str, versiones(
+            ("liquidacion", liquidacion.pk),
+            ("cliente", liquidacion.cliente_id),
+            ("proveedor", liquidacion.proveedor_id),
+            ("procedencia", liquidacion.proveedor.procedencia_id),
+            ("moneda", liquidacion.moneda_valor_imponible_id),
+            ("moneda", liquidacion.moneda_factura_id),
+            ("planilla_gastos", liquidacion.planilla_gastos_id),
+        )))
     return render(
-        request, "liquidaciones/liquidacion_detail.html", {"liquidacion": liquidacion}
+        request,
+        "liquidaciones/liquidacion_detail.html",
+        {"liquidacion": liquidacion, "version": version},
     )
 
 
 def liquidacion_edit(request, pk):
-    print(f"=== LIQUIDACION EDIT VIEW CALLED (PK: {pk}) ===")
-    print("Request method:", request.method)
-
     liquidacion = get_object_or_404(Liquidacion, pk=pk)
 
     if request.method == "POST":
-        print("=== POST REQUEST RECEIVED FOR EDIT ===")
-        print("POST data keys:", list(request.POST.keys()))
-        print(
-            "POST data values:",
-            {k: v for k, v in request.POST.items() if k != "csrfmiddlewaretoken"},
-        )
-
         form = LiquidacionForm(request.POST, instance=liquidacion)
         formset = LiquidacionItemFormSet(request.POST, instance=liquidacion)
 
-        print("Form valid:", form.is_valid())
-        if not form.is_valid():
-            print("Form errors:", dict(form.errors))
-
-        print("Formset valid:", formset.is_valid())
-        if not formset.is_valid():
-            print("Formset errors:", [dict(form.errors) for form in formset])
-            print("Formset non_form_errors:", formset.non_form_errors())
-
         if form.is_valid() and formset.is_valid():
-            print("=== BOTH FORMS VALID - UPDATING ===")
             try:
-                liquidacion = form.save()
-                print(f"✅ Liquidacion updated with ID: {liquidacion.id}")
-
-                # Only save non-empty forms
-                instances = formset.save(commit=False)
-                saved_items = []
-                for instance in instances:
-                    # Check if item_id exists instead of accessing the item object
-                    if instance.item:  # Only save if item is filled
-                        # Ensure numeric fields have default values if empty
-                        if not instance.retencion:
-                            instance.retencion = 0
-                        if not instance.monto:
-                            instance.monto = 0
-                        if not instance.iva:
-                            instance.iva = 0
-                        instance.save()
-                        saved_items.append(instance)
-                        print(f"✅ Updated item: {instance.item}")
-
-                # Delete items marked for deletion
-                print(f"Items marked for deletion: {len(formset.deleted_objects)}")
-                for i, obj in enumerate(formset.deleted_objects):
-                    print(f"Deleting item {i}: {obj.descripcion} - {obj.monto}")
-                    obj.delete()
-                    print(f"✅ Deleted item: {obj}")
+                with transaction.atomic():
+                    liquidacion = form.save()
+                    _guardar_items(formset, liquidacion, _completar_item_liquidacion)
+                    items_liquidacion_guardados(liquidacion)
+                logger.info("Liquidación %s actualizada", liquidacion.pk)
 
                 messages.success(request, "Liquidación actualizada exitosamente.")
-                print("=== REDIRECTING TO LIQUIDACION_DETAIL ===")
-                redirect_response = redirect("liquidacion_detail", pk=liquidacion.pk)
-                print(f"Redirect response: {redirect_response}")
-                print(f"Redirect URL: {redirect_response.url}")
-                return redirect_response
-
-            except Exception as e:
-                print(f"❌ ERROR DURING UPDATE: {e}")
-                import traceback
+                return redirect("liquidacion_detail", pk=liquidacion.pk)
 
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error al actualizar la liquidación %s", liquidacion.pk)
         else:
-            print("=== FORM VALIDATION FAILED ===")
-            # Add error messages for debugging
+            _registrar_errores("liquidación", form, formset)
             if not form.is_valid():
                 messages.error(
                     request, f"Error en el formulario principal: {form.errors}"
@@ -244,329 +258,125 @@ def liquidacion_delete(request, pk):
     return render(request, "liquidaciones/liquidacion_confirm_delete.html", context)
 
 
-def liquidacion_list(request):
-    liquidaciones = Liquidacion.objects.all().order_by("-fecha")
-
-    # Search functionality
-    search = request.GET.get("search", "")
-    if search:
-        liquidaciones = liquidaciones.filter(
-            models.Q(numero_liquidacion__icontains=search)
-            | models.Q(cliente__nombre__icontains=search)
-            | models.Q(numero_despacho__icontains=search)
-        )
+ORDENES_LIQUIDACION = {
+    "fecha": "fecha",
+    "-fecha": "-fecha",
+    "total": "total_subtotal",
+    "-total": "-total_subtotal",
+}
 
-    # Pagination
-    paginator = Paginator(liquidaciones, 10)  # Show 10 liquidaciones per page
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
 
-    context = {
-        "page_obj": page_obj,
-        "search": search,
-        "title": "Lista de Liquidaciones",
-    }
-    return render(request, "liquidaciones/liquidacion_list.html", context)
+def _parse_monto(value):
+    """Convierte un monto del filtro (formato Paraguay) a Decimal, o None"""
+    try:
+        return Decimal(value.strip().replace(".", "").replace(",", "."))
+    except (AttributeError, InvalidOperation):
+        return None
 
 
-
-def pago_create(request):
-    if request.method == "POST":
-        form = PagoForm(request.POST)
-
-        if form.is_valid():
-            try:
-                pago = form.save()
-                messages.success(
-                    request, f"Pago {pago.numero_despacho} creado exitosamente."
-                )
-                return redirect("pago_list")
-
-            except Exception as e:
-                print(f"❌ ERROR DURING PAGO SAVE: {e}")
-                import traceback
-
-                traceback.print_exc()
-        else:
-            print("=== PAGO FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
-            if form.errors:
-                messages.error(request, f"Error en el formulario: {form.errors}")
-    else:
-        form = PagoForm()
-
-    context = {"form": form, "title": "Crear Pago"}
-    return render(request, "liquidaciones/pago_form.html", context)
-
-
-def pago_list(request):
-    pagos = Pago.objects.select_related("liquidacion__cliente", "banco").order_by(
-        "-fecha"
+def _liquidaciones_filtradas(request):
+    """Liquidaciones con los filtros y el orden de la lista (?search, ?orden, ?monto_*)"""
+    orden = request.GET.get("orden", "-fecha")
+    if orden not in ORDENES_LIQUIDACION:
+        orden = "-fecha"
+    liquidaciones = Liquidacion.objects.select_related("cliente").order_by(
+        ORDENES_LIQUIDACION[orden]
     )
 
     # Search functionality
     search = request.GET.get("search", "")
     if search:
-        pagos = pagos.filter(
-            models.Q(liquidacion__numero_despacho__icontains=search)
-            | models.Q(liquidacion__cliente__nombre__icontains=search)
-            | models.Q(banco__nombre__icontains=search)
-            | models.Q(referencia__icontains=search)
-        )
-
-    # Pagination
-    paginator = Paginator(pagos, 10)  # Show 10 pagos per page
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-
-    context = {"page_obj": page_obj, "search": search, "title": "Lista de Pagos"}
-    return render(request, "liquidaciones/pago_list.html", context)
-
-
-def pago_detail(request, pk):
-    pago = get_object_or_404(
-        Pago.objects.select_related("liquidacion__cliente", "banco"), pk=pk
-    )
-    return render(request, "liquidaciones/pago_detail.html", {"pago": pago})
-
-
-def pago_edit(request, pk):
-    pago = get_object_or_404(
-        Pago.objects.select_related("liquidacion__cliente", "banco"), pk=pk
-    )
-
-    if request.method == "POST":
-        form = PagoForm(request.POST, instance=pago)
-
-        if form.is_valid():
-            try:
-                pago = form.save()
-                messages.success(request, "Pago actualizado exitosamente.")
-                return redirect("pago_detail", pk=pago.pk)
-
-            except Exception as e:
-                print(f"❌ ERROR DURING PAGO UPDATE: {e}")
-                import traceback
-
-                traceback.print_exc()
-        else:
-            print("=== PAGO FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
-            if form.errors:
-                messages.error(request, f"Error en el formulario: {form.errors}")
-    else:
-        form = PagoForm(instance=pago)
-
-    context = {
-        "form": form,
-        "title": f"Editar Pago {pago.numero_despacho}",
-        "pago": pago,
-        "is_edit": True,
-    }
-    return render(request, "liquidaciones/pago_form.html", context)
-
-
-def pago_delete(request, pk):
-    pago = get_object_or_404(
-        Pago.objects.select_related("liquidacion__cliente", "banco"), pk=pk
-    )
-
-    if request.method == "POST":
-        numero_despacho = pago.numero_despacho
-        pago.delete()
-        messages.success(request, f"Pago {numero_despacho} eliminado exitosamente.")
-        return redirect("pago_list")
-
-    context = {"pago": pago, "title": "Eliminar Pago"}
-    return render(request, "liquidaciones/pago_confirm_delete.html", context)
-
-
-def cliente_autocomplete(request):
-    query = request.GET.get("q", "")
-    if query:
-        clientes = Cliente.objects.filter(nombre__icontains=query)[:10]
-        results = [{"id": cliente.id, "text": cliente.nombre} for cliente in clientes]
-    else:
-        results = []
-
-    return JsonResponse({"results": results})
-
-
-def pago_create(request):
-    if request.method == "POST":
-        form = PagoForm(request.POST)
-
-        if form.is_valid():
-            try:
-                pago = form.save()
-                messages.success(
-                    request, f"Pago {pago.numero_despacho} creado exitosamente."
-                )
-                return redirect("pago_list")
-
-            except Exception as e:
-                print(f"❌ ERROR DURING PAGO SAVE: {e}")
-                import traceback
-
-                traceback.print_exc()
-        else:
-            print("=== PAGO FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
-            if form.errors:
-                messages.error(request, f"Error en el formulario: {form.errors}")
-    else:
-        form = PagoForm()
+        liquidaciones = liquidaciones.buscar(search)
 
-    context = {"form": form, "title": "Crear Pago"}
-    return render(request, "liquidaciones/pago_form.html", context)
+    # Filtro por monto total (columna total_subtotal indexada)
+    minimo = _parse_monto(request.GET.get("monto_min", ""))
+    maximo = _parse_monto(request.GET.get("monto_max", ""))
+    if minimo is not None:
+        liquidaciones = liquidaciones.filter(total_subtotal__gte=minimo)
+    if maximo is not None:
+        liquidaciones = liquidaciones.filter(total_subtotal__lte=maximo)
+    return liquidaciones, search, orden
 
 
-def pago_list(request):
-    pagos = Pago.objects.select_related("liquidacion__cliente", "banco").order_by(
-        "-fecha"
-    )
+def liquidacion_list(request):
+    liquidaciones, search, orden = _liquidaciones_filtradas(request)
 
-    # Search functionality
-    search = request.GET.get("search", "")
+    # Pagination: keyset on (orden, id) unless results are ranked by the search
+    page_number = request.GET.get("page")
     if search:
-        pagos = pagos.filter(
-            models.Q(liquidacion__numero_despacho__icontains=search)
-            | models.Q(liquidacion__cliente__nombre__icontains=search)
-            | models.Q(banco__nombre__icontains=search)
-            | models.Q(referencia__icontains=search)
+        paginator = Paginator(liquidaciones, 10)  # Show 10 liquidaciones per page
+    else:
+        campo = ORDENES_LIQUIDACION[orden]
+        desempate = "-id" if campo.startswith("-") else "id"
+        paginator = KeysetPaginator(
+            liquidaciones, 10, orden=(campo, desempate), contar="estimado"
         )
-
-    # Pagination
-    paginator = Paginator(pagos, 10)  # Show 10 pagos per page
-    page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
 
-    context = {"page_obj": page_obj, "search": search, "title": "Lista de Pagos"}
-    return render(request, "liquidaciones/pago_list.html", context)
-
-
-def pago_detail(request, pk):
-    pago = get_object_or_404(
-        Pago.objects.select_related("liquidacion__cliente", "banco"), pk=pk
-    )
-    return render(request, "liquidaciones/pago_detail.html", {"pago": pago})
-
-
-def pago_edit(request, pk):
-    pago = get_object_or_404(
-        Pago.objects.select_related("liquidacion__cliente", "banco"), pk=pk
-    )
-
-    if request.method == "POST":
-        form = PagoForm(request.POST, instance=pago)
-
-        if form.is_valid():
-            try:
-                pago = form.save()
-                messages.success(request, "Pago actualizado exitosamente.")
-                return redirect("pago_detail", pk=pago.pk)
-
-            except Exception as e:
-                print(f"❌ ERROR DURING PAGO UPDATE: {e}")
-                import traceback
-
-                traceback.print_exc()
-        else:
-            print("=== PAGO FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
-            if form.errors:
-                messages.error(request, f"Error en el formulario: {form.errors}")
-    else:
-        form = PagoForm(instance=pago)
-
     context = {
-        "form": form,
-        "title": f"Editar Pago {pago.numero_despacho}",
-        "pago": pago,
-        "is_edit": True,
+        "page_obj": page_obj,
+        "search": search,
+        "orden": orden,
+        "monto_min": request.GET.get("monto_min", ""),
+        "monto_max": request.GET.get("monto_max", ""),
+        "title": "Lista de Liquidaciones",
     }
-    return render(request, "liquidaciones/pago_form.html", context)
+    return render(request, "liquidaciones/liquidacion_list.html", context)
 
 
-def pago_delete(request, pk):
-    pago = get_object_or_404(
-        Pago.objects.select_related("liquidacion__cliente", "banco"), pk=pk
-    )
+def liquidacion_export(request):
+    """Exporta la lista de liquidaciones filtrada (CSV o XLSX, en streaming)"""
+    liquidaciones, _, _ = _liquidaciones_filtradas(request)
+    columnas = [
+        ("Fecha", exportar.FECHA),
+        ("Nro. Liquidación", exportar.TEXTO),
+        ("Nro. Despacho", exportar.TEXTO),
+        ("Cliente", exportar.TEXTO),
+        ("RUC", exportar.TEXTO),
+        ("Clase", exportar.TEXTO),
+        ("Factura Comercial", exportar.TEXTO),
+        ("Monto", exportar.ENTERO),
+        ("IVA", exportar.ENTERO),
+        ("Retención", exportar.ENTERO),
+        ("Total", exportar.ENTERO),
+    ]
+    filas = liquidaciones.values_list(
+        "fecha",
+        "numero_liquidacion",
+        "numero_despacho",
+        "cliente__nombre",
+        "cliente__ruc",
+        "clase",
+        "numero_factura_comercial",
+        "total_monto",
+        "total_iva",
+        "total_retencion",
+        "total_subtotal",
+    ).iterator(chunk_size=exportar.FILAS_POR_CONSULTA)
+    return exportar.exportar(request, "liquidaciones", columnas, filas)
 
-    if request.method == "POST":
-        numero_despacho = pago.numero_despacho
-        pago.delete()
-        messages.success(request, f"Pago {numero_despacho} eliminado exitosamente.")
-        return redirect("pago_list")
 
-    context = {"pago": pago, "title": "Eliminar Pago"}
-    return render(request, "liquidaciones/pago_confirm_delete.html", context)
+def cliente_autocomplete(request):
+    results = autocompletar.CLIENTES.resultados(request.GET.get("q", ""))
+    return JsonResponse({"results": results})
 
 
 def proveedor_autocomplete(request):
-    query = request.GET.get("q", "")
-    if query:
-        proveedores = Proveedor.objects.select_related("procedencia").filter(
-            models.Q(nombre__icontains=query)
-            | models.Q(procedencia__nombre__icontains=query)
-        )[:10]
-
-        results = []
-        for proveedor in proveedores:
-            procedencia_nombre = (
-                proveedor.procedencia.nombre
-                if proveedor.procedencia
-                else "Sin especificar"
-            )
-            results.append(
-                {
-                    "id": proveedor.id,
-                    "text": f"{proveedor.nombre} ({procedencia_nombre})",
-                }
-            )
-    else:
-        results = []
-
+    results = autocompletar.PROVEEDORES.resultados(request.GET.get("q", ""))
     return JsonResponse({"results": results})
 
 
 def liquidacion_autocomplete(request):
-    query = request.GET.get("q", "")
     liquidacion_id = request.GET.get("id", "")
 
-    def format_amount(amount):
-        """Format amount with thousand separators and no decimals"""
-        return f"{int(amount):,}".replace(',', '.')
-    
     if liquidacion_id:
         # Fetch specific liquidacion by ID for restoration after form errors
-        try:
-            liquidacion = Liquidacion.objects.select_related("cliente").get(
-                id=liquidacion_id
-            )
-            formatted_amount = format_amount(liquidacion.valor_total_calculado)
-            results = [
-                {
-                    "id": liquidacion.id,
-                    "text": f"{liquidacion.numero_despacho} - {liquidacion.cliente.nombre}: {formatted_amount}",
-                }
-            ]
-        except Liquidacion.DoesNotExist:
-            results = []
-    elif query:
-        liquidaciones = Liquidacion.objects.select_related("cliente").filter(
-            models.Q(numero_despacho__icontains=query)
-            | models.Q(cliente__nombre__icontains=query)
-        )[:10]
-        results = [
-            {
-                "id": liq.id,
-                "text": f"{liq.numero_despacho} - {liq.cliente.nombre}: {format_amount(liq.valor_total_calculado)}",
-            }
-            for liq in liquidaciones
-        ]
+        liquidacion = (
+            autocompletar.LIQUIDACIONES.queryset().filter(id=liquidacion_id).first()
+        )
+        results = [autocompletar.LIQUIDACIONES.formatear(liquidacion)] if liquidacion else []
     else:
-        results = []
+        results = autocompletar.LIQUIDACIONES.resultados(request.GET.get("q", ""))
 
     return JsonResponse({"results": results})
 
@@ -583,14 +393,10 @@ def pago_create(request):
                 )
                 return redirect("pago_list")
 
-            except Exception as e:
-                print(f"❌ ERROR DURING PAGO SAVE: {e}")
-                import traceback
-
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error al crear el pago")
         else:
-            print("=== PAGO FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
+            _registrar_errores("pago", form)
             if form.errors:
                 messages.error(request, f"Error en el formulario: {form.errors}")
     else:
@@ -600,7 +406,8 @@ def pago_create(request):
     return render(request, "liquidaciones/pago_form.html", context)
 
 
-def pago_list(request):
+def _pagos_filtrados(request):
+    """Pagos con el filtro de búsqueda de la lista (?search)"""
     pagos = Pago.objects.select_related("liquidacion__cliente", "banco").order_by(
         "-fecha"
     )
@@ -608,22 +415,58 @@ def pago_list(request):
     # Search functionality
     search = request.GET.get("search", "")
     if search:
-        pagos = pagos.filter(
-            models.Q(liquidacion__numero_despacho__icontains=search)
-            | models.Q(liquidacion__cliente__nombre__icontains=search)
-            | models.Q(banco__nombre__icontains=search)
-            | models.Q(referencia__icontains=search)
+        pagos = buscar(
+            pagos,
+            search,
+            [
+                "liquidacion__numero_despacho",
+                "liquidacion__cliente__nombre",
+                "banco__nombre",
+                "referencia",
+            ],
         )
+    return pagos, search
 
-    # Pagination
-    paginator = Paginator(pagos, 10)  # Show 10 pagos per page
+
+def pago_list(request):
+    pagos, search = _pagos_filtrados(request)
+
+    # Pagination: keyset on (fecha, id) unless results are ranked by the search
     page_number = request.GET.get("page")
+    if search:
+        paginator = Paginator(pagos, 10)  # Show 10 pagos per page
+    else:
+        paginator = KeysetPaginator(pagos, 10, orden=("-fecha", "-id"))
     page_obj = paginator.get_page(page_number)
 
     context = {"page_obj": page_obj, "search": search, "title": "Lista de Pagos"}
     return render(request, "liquidaciones/pago_list.html", context)
 
 
+def pago_export(request):
+    """Exporta la lista de pagos filtrada (CSV o XLSX, en streaming)"""
+    pagos, _ = _pagos_filtrados(request)
+    columnas = [
+        ("Fecha", exportar.FECHA),
+        ("Nro. Despacho", exportar.TEXTO),
+        ("Cliente", exportar.TEXTO),
+        ("Banco", exportar.TEXTO),
+        ("Referencia", exportar.TEXTO),
+        ("Concepto", exportar.TEXTO),
+        ("Monto", exportar.ENTERO),
+    ]
+    filas = pagos.order_by("-fecha", "-id").values_list(
+        "fecha",
+        "liquidacion__numero_despacho",
+        "liquidacion__cliente__nombre",
+        "banco__nombre",
+        "referencia",
+        "concepto",
+        "monto",
+    ).iterator(chunk_size=exportar.FILAS_POR_CONSULTA)
+    return exportar.exportar(request, "pagos", columnas, filas)
+
+
 def pago_detail(request, pk):
     pago = get_object_or_404(
         Pago.objects.select_related("liquidacion__cliente", "banco"), pk=pk
@@ -645,14 +488,10 @@ def pago_edit(request, pk):
                 messages.success(request, "Pago actualizado exitosamente.")
                 return redirect("pago_detail", pk=pago.pk)
 
-            except Exception as e:
-                print(f"❌ ERROR DURING PAGO UPDATE: {e}")
-                import traceback
-
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error al actualizar el pago %s", pago.pk)
         else:
-            print("=== PAGO FORM VALIDATION FAILED ===")
-            print("Form errors:", dict(form.errors))
+            _registrar_errores("pago", form)
             if form.errors:
                 messages.error(request, f"Error en el formulario: {form.errors}")
     else:
@@ -689,11 +528,7 @@ def banco_list(request):
     # Search functionality
     search = request.GET.get("search", "")
     if search:
-        bancos = bancos.filter(
-            models.Q(nombre__icontains=search) |
-            models.Q(titular__icontains=search) |
-            models.Q(numero_cuenta__icontains=search)
-        )
+        bancos = buscar(bancos, search, ["nombre", "titular", "numero_cuenta"])
     
     # Pagination
     paginator = Paginator(bancos, 10)  # Show 10 bancos per page
@@ -780,10 +615,7 @@ def proveedor_list(request):
     # Search functionality
     search = request.GET.get("search", "")
     if search:
-        proveedores = proveedores.filter(
-            models.Q(nombre__icontains=search) |
-            models.Q(procedencia__nombre__icontains=search)
-        )
+        proveedores = buscar(proveedores, search, ["nombre", "procedencia__nombre"])
     
     # Pagination
     paginator = Paginator(proveedores, 10)  # Show 10 proveedores per page
@@ -870,7 +702,7 @@ def procedencia_list(request):
     # Search functionality
     search = request.GET.get("search", "")
     if search:
-        procedencias = procedencias.filter(nombre__icontains=search)
+        procedencias = buscar(procedencias, search, ["nombre"])
     
     # Pagination
     paginator = Paginator(procedencias, 10)  # Show 10 procedencias per page
@@ -951,15 +783,20 @@ def procedencia_delete(request, pk):
 
 
 # PlanillaGastos CRUD Views
-def planilla_gastos_list(request):
+def _planillas_filtradas(request):
+    """Planillas de gastos con el filtro de búsqueda de la lista (?search)"""
     planillas = PlanillaGastos.objects.all().order_by("-fecha")
     
     # Search functionality
     search = request.GET.get("search", "")
     if search:
-        planillas = planillas.filter(
-            models.Q(numero_planilla__icontains=search)
-        )
+        planillas = buscar(planillas, search, ["numero_planilla"])
+    return planillas, search
+
+
+def planilla_gastos_list(request):
+    planillas, search = _planillas_filtradas(request)
+    planillas = planillas.annotate(cantidad_gastos=Count("planillagastositem"))
     
     # Pagination
     paginator = Paginator(planillas, 10)  # Show 10 planillas per page
@@ -974,50 +811,42 @@ def planilla_gastos_list(request):
     return render(request, "liquidaciones/planilla_gastos_list.html", context)
 
 
+def planilla_gastos_export(request):
+    """Exporta las planillas de gastos filtradas, un renglón por gasto"""
+    planillas, _ = _planillas_filtradas(request)
+    columnas = [
+        ("Fecha", exportar.FECHA),
+        ("Nro. Planilla", exportar.TEXTO),
+        ("Descripción", exportar.TEXTO),
+        ("Monto", exportar.ENTERO),
+        ("Total Planilla", exportar.ENTERO),
+    ]
+    filas = PlanillaGastosItem.objects.filter(
+        planilla_gastos__in=planillas.values("pk")
+    ).order_by("-planilla_gastos__fecha", "planilla_gastos_id", "id").values_list(
+        "planilla_gastos__fecha",
+        "planilla_gastos__numero_planilla",
+        "descripcion",
+        "monto",
+        "planilla_gastos__total_gastos",
+    ).iterator(chunk_size=exportar.FILAS_POR_CONSULTA)
+    return exportar.exportar(request, "planillas_gastos", columnas, filas)
+
+
 def planilla_gastos_create(request):
     if request.method == "POST":
-        print("=== PLANILLA GASTOS CREATE VIEW CALLED ===")
-        print("Request method:", request.method)
-        print("POST data keys:", list(request.POST.keys()))
-        print("POST data values:", {k: v for k, v in request.POST.items() if k != "csrfmiddlewaretoken"})
-        
         form = PlanillaGastosForm(request.POST)
         formset = PlanillaGastosItemFormSet(request.POST)
         
-        print("Form valid:", form.is_valid())
-        if not form.is_valid():
-            print("Form errors:", dict(form.errors))
-
-        print("Formset valid:", formset.is_valid())
-        if not formset.is_valid():
-            print("Formset errors:", [dict(f.errors) for f in formset])
-            print("Formset non_form_errors:", formset.non_form_errors())
-        
         if form.is_valid() and formset.is_valid():
             try:
-                planilla = form.save()
-                
-                # Only save forms that have a description
-                instances = formset.save(commit=False)
-                print(f"✅ Formset instances to process: {len(instances)}")
-                saved_items = []
-                
-                for i, instance in enumerate(instances):
-                    print(f"Processing instance {i}: descripcion='{instance.descripcion}', monto='{instance.monto}'")
-                    if instance.descripcion:  # Only save if description is provided
-                        instance.planilla_gastos = planilla
-                        # Ensure numeric fields have default values if empty
-                        if not instance.monto:
-                            instance.monto = 0
-                        instance.save()
-                        saved_items.append(instance)
-                        print(f"✅ Saved instance {i}: {instance.descripcion}")
-                    else:
-                        print(f"⚠️ Skipping instance {i}: no description")
-                
-                # Also handle formset deletions
-                for obj in formset.deleted_objects:
-                    obj.delete()
+                with transaction.atomic():
+                    planilla = form.save()
+                    saved_items = _guardar_items(formset, planilla, _completar_item_planilla)
+                    items_planilla_guardados(planilla)
+                logger.info(
+                    "Planilla de gastos %s creada con %d item(s)", planilla.pk, len(saved_items)
+                )
                 
                 # Show appropriate message
                 if saved_items:
@@ -1038,11 +867,10 @@ def planilla_gastos_create(request):
                 return redirect("planilla_gastos_list")
                 
             except Exception as e:
-                print(f"❌ ERROR DURING PLANILLA GASTOS SAVE: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error al crear la planilla de gastos")
                 messages.error(request, f"Error al guardar la planilla: {e}")
         else:
+            _registrar_errores("planilla de gastos", form, formset)
             if not form.is_valid():
                 messages.error(request, f"Error en el formulario principal: {form.errors}")
             if not formset.is_valid():
@@ -1059,88 +887,36 @@ def planilla_gastos_create(request):
 
 def planilla_gastos_detail(request, pk):
     planilla = get_object_or_404(PlanillaGastos, pk=pk)
-    return render(request, "liquidaciones/planilla_gastos_detail.html", {"planilla": planilla})
+    context = {
+        "planilla": planilla,
+        "version": version("planilla_gastos", planilla.pk) if compartida() else None,
+    }
+    return render(request, "liquidaciones/planilla_gastos_detail.html", context)
 
 
 def planilla_gastos_edit(request, pk):
     planilla = get_object_or_404(PlanillaGastos, pk=pk)
     
     if request.method == "POST":
-        print(f"=== PLANILLA GASTOS EDIT VIEW CALLED (PK: {pk}) ===")
-        print("Request method:", request.method)
-        print("POST data keys:", list(request.POST.keys()))
-        print("POST data values:", {k: v for k, v in request.POST.items() if k != "csrfmiddlewaretoken"})
-        
         form = PlanillaGastosForm(request.POST, instance=planilla)
         formset = PlanillaGastosItemFormSet(request.POST, instance=planilla)
         
-        print("Form valid:", form.is_valid())
-        if not form.is_valid():
-            print("Form errors:", dict(form.errors))
-
-        # Check formset forms before validation
-        print(f"Number of forms in formset: {len(formset.forms)}")
-        for i, form_instance in enumerate(formset.forms):
-            print(f"Form {i} initial data: {form_instance.initial}")
-            if hasattr(form_instance, 'instance') and form_instance.instance.pk:
-                print(f"Form {i} instance: {form_instance.instance.pk} - {form_instance.instance}")
-
-        print("Formset valid:", formset.is_valid())
-        if not formset.is_valid():
-            print("Formset errors:", [dict(f.errors) for f in formset])
-            print("Formset non_form_errors:", formset.non_form_errors())
-            # Check individual form validity
-            for i, form_instance in enumerate(formset.forms):
-                print(f"Form {i} valid: {form_instance.is_valid()}")
-                if not form_instance.is_valid():
-                    print(f"Form {i} errors: {dict(form_instance.errors)}")
-                print(f"Form {i} cleaned_data: {getattr(form_instance, 'cleaned_data', 'No cleaned_data')}")
-        
         if form.is_valid() and formset.is_valid():
             try:
-                planilla = form.save()
-                
-                # Only save non-empty forms
-                instances = formset.save(commit=False)
-                print(f"✅ Formset instances to process: {len(instances)}")
-                
-                # Also check what forms were processed
-                print("Formset forms that will be processed:")
-                for i, form_instance in enumerate(formset.forms):
-                    if hasattr(form_instance, 'cleaned_data'):
-                        descripcion = form_instance.cleaned_data.get('descripcion', '')
-                        monto = form_instance.cleaned_data.get('monto', '')
-                        delete_checked = form_instance.cleaned_data.get('DELETE', False)
-                        print(f"Form {i}: descripcion='{descripcion}', monto='{monto}', DELETE={delete_checked}")
-                
-                saved_items = []
-                for i, instance in enumerate(instances):
-                    print(f"Processing instance {i}: descripcion='{instance.descripcion}', monto='{instance.monto}', pk='{instance.pk}'")
-                    if instance.descripcion:  # Only save if description is provided
-                        # Ensure numeric fields have default values if empty
-                        if not instance.monto:
-                            instance.monto = 0
-                        instance.save()
-                        saved_items.append(instance)
-                        print(f"✅ Saved instance {i}: {instance.descripcion}")
-                    else:
-                        print(f"⚠️ Skipping instance {i}: no description")
-                
-                # Delete items marked for deletion
-                print(f"Items marked for deletion: {len(formset.deleted_objects)}")
-                for i, obj in enumerate(formset.deleted_objects):
-                    print(f"Deleting item {i}: {obj.descripcion} - {obj.monto}")
-                    obj.delete()
+                with transaction.atomic():
+                    planilla = form.save()
+                    _guardar_items(formset, planilla, _completar_item_planilla)
+                    items_planilla_guardados(planilla)
+                logger.info("Planilla de gastos %s actualizada", planilla.pk)
                 
                 messages.success(request, "Planilla de Gastos actualizada exitosamente.")
                 return redirect("planilla_gastos_detail", pk=planilla.pk)
                 
             except Exception as e:
-                print(f"❌ ERROR DURING PLANILLA GASTOS UPDATE: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error al actualizar la planilla de gastos %s", planilla.pk)
                 messages.error(request, f"Error al actualizar la planilla: {e}")
         else:
+            _registrar_errores("planilla de gastos", form, formset)
             if not form.is_valid():
                 messages.error(request, f"Error en el formulario principal: {form.errors}")
             if not formset.is_valid():
@@ -1175,49 +951,144 @@ def planilla_gastos_delete(request, pk):
 
 
 def planilla_gastos_autocomplete(request):
-    query = request.GET.get("q", "")
     planilla_id = request.GET.get("id", "")
 
     if planilla_id:
         # Fetch specific planilla by ID for restoration after form errors
-        try:
-            planilla = PlanillaGastos.objects.get(id=planilla_id)
-            results = [
-                {
-                    "id": planilla.id,
-                    "text": f"{planilla.numero_planilla} - {planilla.fecha} (Total: {planilla.total_gastos:,.0f})",
-                }
-            ]
-        except PlanillaGastos.DoesNotExist:
-            results = []
-    elif query:
-        planillas = PlanillaGastos.objects.filter(
-            numero_planilla__icontains=query
-        )[:10]
-        results = [
-            {
-                "id": planilla.id,
-                "text": f"{planilla.numero_planilla} - {planilla.fecha} (Total: {planilla.total_gastos:,.0f})",
-            }
-            for planilla in planillas
-        ]
+        planilla = PlanillaGastos.objects.filter(id=planilla_id).first()
+        results = [autocompletar.PLANILLAS_GASTOS.formatear(planilla)] if planilla else []
     else:
-        results = []
+        results = autocompletar.PLANILLAS_GASTOS.resultados(request.GET.get("q", ""))
 
     return JsonResponse({"results": results})
 
 
 def liquidacion_pdf(request, pk):
-    """Genera un PDF de la liquidación"""
-    liquidacion = get_object_or_404(Liquidacion, pk=pk)
+    """
+    PDF de la liquidación, servido desde la cache de PDFs. El hash del
+    contenido es el ETag, así que un If-None-Match vigente responde 304 sin
+    generar ni leer el documento.
+    """
+    liquidacion = get_object_or_404(
+        Liquidacion.objects.select_related(
+            "cliente",
+            "proveedor__procedencia",
+            "moneda_valor_imponible",
+            "moneda_factura",
+        ).prefetch_related("liquidacionitem_set"),
+        pk=pk,
+    )
+    etag = pdf_cache.huella(liquidacion)
+    response = get_conditional_response(request, etag=quote_etag(etag))
+    if response is not None:
+        return response
+
+    pdf = pdf_cache.obtener(liquidacion, etag)
+    ultima_modificacion = int(pdf.generado.timestamp())
+    response = get_conditional_response(
+        request, etag=quote_etag(etag), last_modified=ultima_modificacion
+    )
+    if response is None:
+        # Crear la respuesta HTTP con el PDF
+        response = HttpResponse(pdf.contenido, content_type='application/pdf')
+        filename = f'Liquidacion_{liquidacion.numero_liquidacion or pk}.pdf'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response["ETag"] = quote_etag(etag)
+    response["Last-Modified"] = http_date(ultima_modificacion)
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
-    # Generar el PDF
-    buffer = generar_pdf_liquidacion(liquidacion)
 
-    # Crear la respuesta HTTP con el PDF
-    response = HttpResponse(buffer, content_type='application/pdf')
-    filename = f'Liquidacion_{liquidacion.numero_liquidacion or pk}.pdf'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+def liquidacion_pdf_lote(request):
+    """
+    PDFs de las liquidaciones del filtro (?cliente, ?desde, ?hasta,
+    ?planilla_gastos): ZIP en streaming (?formato=zip) o un PDF combinado
+    (?formato=pdf). Hasta PDF_LOTE_SINCRONO liquidaciones se renderizan en el
+    pedido, en este proceso; los lotes más grandes se encolan como
+    TrabajoPdf y se responde 202 como trabajo_pdf_encolar.
+    """
+    form = FiltroPdfLoteForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(" ".join(form.non_field_errors()) or form.errors.as_text())
+    try:
+        total = pdf_trabajos.total_lote(form.filtros())
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    if total > settings.PDF_LOTE_SINCRONO:
+        trabajo = pdf_trabajos.encolar_lote(form.filtros(), form.cleaned_data["formato"])
+        return JsonResponse(_trabajo_pdf_json(trabajo), status=202)
+
+    liquidaciones = pdf_lote.liquidaciones_para_pdf(**form.filtros())
+    if form.cleaned_data["formato"] == "pdf":
+        inicio = time.perf_counter()
+        response = HttpResponse(
+            pdf_lote.pdf_combinado(liquidaciones), content_type="application/pdf"
+        )
+        response["Content-Disposition"] = 'attachment; filename="Liquidaciones.pdf"'
+        response["Server-Timing"] = f"render;dur={(time.perf_counter() - inicio) * 1000:.0f}"
+        return response
 
+    resultados = pdf_lote.renderizar(liquidaciones, procesos=0)
+    response = StreamingHttpResponse(
+        pdf_lote.zip_en_streaming(resultados), content_type="application/zip"
+    )
+    response["Content-Disposition"] = 'attachment; filename="Liquidaciones.zip"'
     return response
 
+
+def _trabajo_pdf_json(trabajo):
+    datos = {
+        "id": trabajo.pk,
+        "estado": trabajo.estado,
+        "procesados": trabajo.procesados,
+        "total": trabajo.total,
+        "progreso": trabajo.progreso,
+        "url_estado": reverse("trabajo_pdf_estado", args=[trabajo.pk]),
+    }
+    if trabajo.estado == TrabajoPdf.EstadoChoices.TERMINADO:
+        datos["url_descarga"] = reverse("trabajo_pdf_descargar", args=[trabajo.pk])
+    if trabajo.estado == TrabajoPdf.EstadoChoices.ERROR:
+        datos["error"] = (trabajo.error.strip().splitlines() or [""])[-1]
+    return datos
+
+
+def trabajo_pdf_encolar(request):
+    """
+    Encola la generación de un PDF (POST ?liquidacion) o de un lote (POST
+    con los filtros de liquidacion_pdf_lote) y responde 202 sin renderizar.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    form = TrabajoPdfForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({"errores": form.errors.get_json_data()}, status=400)
+    if form.cleaned_data["liquidacion"]:
+        trabajo = pdf_trabajos.encolar_liquidacion(form.cleaned_data["liquidacion"])
+    else:
+        try:
+            trabajo = pdf_trabajos.encolar_lote(form.filtros(), form.cleaned_data["formato"])
+        except ValueError as error:
+            return JsonResponse(
+                {"errores": {"__all__": [{"message": str(error), "code": "maximo"}]}},
+                status=400,
+            )
+    return JsonResponse(_trabajo_pdf_json(trabajo), status=202)
+
+
+def trabajo_pdf_estado(request, pk):
+    trabajo = get_object_or_404(TrabajoPdf.objects.defer("contenido"), pk=pk)
+    return JsonResponse(_trabajo_pdf_json(trabajo))
+
+
+def trabajo_pdf_descargar(request, pk):
+    trabajo = get_object_or_404(TrabajoPdf, pk=pk)
+    if trabajo.estado != TrabajoPdf.EstadoChoices.TERMINADO:
+        return JsonResponse(_trabajo_pdf_json(trabajo), status=409)
+    content_type = (
+        "application/pdf"
+        if trabajo.formato == TrabajoPdf.FormatoChoices.PDF
+        else "application/zip"
+    )
+    response = HttpResponse(bytes(trabajo.contenido), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{trabajo.nombre_archivo}"'
+    return response
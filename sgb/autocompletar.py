@@ -0,0 +1,267 @@
+"""
+Índices de autocompletado en la memoria de cada proceso.
+
+Cada Autocompletado guarda el texto buscable de todas las filas de su
+entidad, normalizado (minúsculas, sin acentos), en el orden del queryset,
+y el vocabulario de esas filas: sus palabras distintas en un solo string y
+las filas donde aparece cada una. Cada palabra de la consulta se busca con
+str.find en el vocabulario (una palabra de la consulta puede estar en
+medio de una del texto, como con `icontains`) y se cruzan las filas de la
+más selectiva con las demás. Después se leen de la base solo las filas
+encontradas (una consulta por pk), para que las etiquetas estén al día y
+no aparezcan filas de transacciones revertidas.
+
+Cada índice se arma la primera vez que se usa y lleva la versión
+("autocompletar", nombre) de sgb.cache con que se armó. Las señales llaman
+a actualizar(), que incrementa la versión y corrige la fila en el índice
+del proceso; los demás procesos ven otra versión y lo rearman. Mientras un
+hilo arma el índice, las demás consultas se responden desde la base.
+
+Los resultados de cada consulta se guardan unos segundos en la cache
+"search", con la versión en la clave.
+
+Si las versiones no son compartidas entre procesos (sgb.cache.compartida),
+un proceso no se enteraría de los cambios hechos en otro: entonces no se
+arma el índice ni se guardan resultados, y cada consulta va a la base.
+"""
+
+from bisect import bisect_right
+import hashlib
+from collections import defaultdict
+from itertools import accumulate
+import threading
+
+from django.core.cache import caches
+
+from sgb.cache import compartida, invalidar, version
+from sgb.search import normalizar
+
+ALIAS_CACHE = "search"
+# Consultas más cortas no devuelven nada (el formulario tampoco las envía)
+MINIMO = 2
+LIMITE = 10
+# Hasta cuántas filas candidatas de varias palabras se ordenan en lugar de
+# recorrer todas las filas
+DISPERSA = 5000
+# Filas candidatas que se verifican antes de cruzar conjuntos
+PRUEBA = 500
+MAXIMO_RECIENTES = 500
+
+
+class _Vocabulario:
+    """
+    Palabras distintas de las filas de un índice, unidas en un string, con la
+    lista ordenada de filas donde aparece cada una.
+    """
+
+    def __init__(self, textos):
+        self.pks = list(textos)
+        self.filas = list(textos.values())
+        apariciones = defaultdict(list)
+        for fila, texto in enumerate(self.filas):
+            for palabra in set(texto.split()):
+                apariciones[palabra].append(fila)
+        palabras = list(apariciones)
+        self.apariciones = list(apariciones.values())
+        self.inicios = list(accumulate((len(palabra) + 1 for palabra in palabras[:-1]), initial=0))
+        self.texto = "\n".join(palabras)
+
+    def filas_con(self, subcadena):
+        """Listas de filas de cada palabra que contiene `subcadena`"""
+        listas = []
+        posicion = self.texto.find(subcadena)
+        while posicion != -1:
+            palabra = bisect_right(self.inicios, posicion) - 1
+            listas.append(self.apariciones[palabra])
+            if palabra + 1 == len(self.inicios):
+                break
+            posicion = self.texto.find(subcadena, self.inicios[palabra + 1])
+        return listas
+
+    def buscar(self, palabras):
+        """Filas, en orden, que contienen todas las `palabras`"""
+        candidatas = sorted((self.filas_con(palabra) for palabra in palabras), key=_apariciones)
+        listas = candidatas[0]
+        if not listas:
+            return
+        if len(listas) == 1:
+            filas = listas[0]
+        elif _apariciones(listas) <= DISPERSA:
+            filas = sorted(set().union(*listas))
+        else:
+            # Subcadena de muchas palabras: las coincidencias aparecen enseguida
+            filas = range(len(self.filas))
+        yield from self._verificar(filas[:PRUEBA], palabras)
+        restantes = filas[PRUEBA:]
+        if restantes and len(candidatas) > 1:
+            # Pocas coincidencias entre las primeras: la combinación es rara y
+            # conviene cruzar conjuntos antes de seguir verificando
+            comunes = set(restantes)
+            for otras in candidatas[1:]:
+                comunes.intersection_update(set().union(*otras))
+            restantes = sorted(comunes)
+        yield from self._verificar(restantes, palabras)
+
+    def _verificar(self, filas, palabras):
+        for fila in filas:
+            texto = self.filas[fila]
+            if all(palabra in texto for palabra in palabras):
+                yield self.pks[fila]
+
+
+def _apariciones(listas):
+    return sum(map(len, listas))
+
+
+class Indice:
+    """
+    Textos normalizados por pk, en orden. Se busca en el vocabulario de las
+    filas con que se compiló; las que cambian después quedan en `recientes`
+    y se recorren enteras, hasta que son más de MAXIMO_RECIENTES y la copia
+    siguiente se vuelve a compilar.
+    """
+
+    def __init__(self, textos, version, vocabulario=None, quitados=frozenset(), recientes=None):
+        self.textos = textos
+        self.version = version
+        self._vocabulario = vocabulario
+        self._quitados = quitados
+        self._recientes = recientes or {}
+
+    def con(self, pk, texto, version):
+        """Copia con la fila `pk` reemplazada (o quitada si texto es None)"""
+        textos = dict(self.textos)
+        recientes = dict(self._recientes)
+        textos.pop(pk, None)
+        recientes.pop(pk, None)
+        if texto is not None:
+            textos[pk] = recientes[pk] = texto
+        if self._vocabulario is None or len(recientes) > MAXIMO_RECIENTES:
+            return Indice(textos, version)
+        return Indice(textos, version, self._vocabulario, self._quitados | {pk}, recientes)
+
+    def buscar(self, consulta, limite):
+        """pks de las primeras filas que contienen todas las palabras de `consulta`"""
+        palabras = set(normalizar(consulta).split())
+        if not palabras or not self.textos:
+            return []
+        if self._vocabulario is None:
+            self._vocabulario = _Vocabulario(self.textos)
+        encontrados = []
+        for pk in self._vocabulario.buscar(palabras):
+            if pk not in self._quitados:
+                encontrados.append(pk)
+                if len(encontrados) == limite:
+                    return encontrados
+        for pk, texto in self._recientes.items():
+            if all(palabra in texto for palabra in palabras):
+                encontrados.append(pk)
+                if len(encontrados) == limite:
+                    break
+        return encontrados
+
+
+class Autocompletado:
+    """
+    Autocompletado de una entidad. Las subclases definen `nombre`, `campos`
+    (valores de values_list que forman el texto buscable), queryset(),
+    buscar_en_base() y formatear().
+    """
+
+    nombre = None
+    campos = ()
+
+    def __init__(self):
+        self._indice = None
+        self._bloqueo = threading.Lock()
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def buscar_en_base(self, consulta):
+        """Queryset con las coincidencias, para cuando no hay índice"""
+        raise NotImplementedError
+
+    def formatear(self, objeto):
+        """Resultado {"id", "text"} de un objeto de queryset()"""
+        raise NotImplementedError
+
+    def resultados(self, consulta):
+        consulta = consulta.strip()
+        if len(consulta) < MINIMO:
+            return []
+        if not compartida():
+            return [self.formatear(objeto) for objeto in self.buscar_en_base(consulta)[:LIMITE]]
+        actual = version("autocompletar", self.nombre)
+        huella = hashlib.sha1(normalizar(consulta).encode()).hexdigest()
+        clave = f"autocompletar:{self.nombre}:v{actual}:{huella}"
+        cache = caches[ALIAS_CACHE]
+        resultados = cache.get(clave)
+        if resultados is None:
+            resultados = [self.formatear(objeto) for objeto in self._buscar(consulta, actual)]
+            cache.set(clave, resultados)
+        return resultados
+
+    def _buscar(self, consulta, actual):
+        indice = self._indice_vigente(actual)
+        if indice is None:
+            return self.buscar_en_base(consulta)[:LIMITE]
+        pks = indice.buscar(consulta, LIMITE)
+        objetos = self.queryset().in_bulk(pks) if pks else {}
+        if len(objetos) < len(pks):
+            # Filas que ya no existen (borradas sin señales o de una
+            # transacción revertida): se rearma el índice una vez
+            if self._indice is indice:
+                self._indice = None
+            indice = self._indice_vigente(actual)
+            if indice is None:
+                return self.buscar_en_base(consulta)[:LIMITE]
+            pks = indice.buscar(consulta, LIMITE)
+            objetos = self.queryset().in_bulk(pks) if pks else {}
+        return [objetos[pk] for pk in pks if pk in objetos]
+
+    def _indice_vigente(self, actual):
+        indice = self._indice
+        if indice is not None and indice.version == actual:
+            return indice
+        if not self._bloqueo.acquire(blocking=False):
+            return None
+        try:
+            indice = self._indice
+            if indice is None or indice.version != actual:
+                indice = self._indice = Indice(dict(self._filas(self.queryset())), actual)
+            return indice
+        finally:
+            self._bloqueo.release()
+
+    def _filas(self, queryset):
+        if not queryset.query.order_by and not queryset.model._meta.ordering:
+            queryset = queryset.order_by("pk")
+        for pk, *valores in queryset.values_list("pk", *self.campos).iterator(2000):
+            # Sin saltos de línea: separan las filas en el texto compilado
+            yield pk, " ".join(normalizar(" ".join(str(valor) for valor in valores if valor)).split())
+
+    def actualizar(self, pk=None):
+        """
+        Nueva versión tras un cambio en la fila `pk` (o solo en su etiqueta,
+        si pk es None). Si nadie más cambió la versión, el índice del proceso
+        se corrige en lugar de rearmarse.
+        """
+        with self._bloqueo:
+            nueva = invalidar("autocompletar", self.nombre)
+            indice = self._indice
+            if indice is None:
+                return
+            if nueva != indice.version + 1:
+                self._indice = None
+            elif pk is None:
+                indice.version = nueva
+            else:
+                fila = next(self._filas(self.queryset().filter(pk=pk)), (pk, None))
+                self._indice = indice.con(*fila, nueva)
+
+    def descartar(self):
+        """Nueva versión y rearmado del índice, tras cambios en muchas filas"""
+        with self._bloqueo:
+            invalidar("autocompletar", self.nombre)
+            self._indice = None
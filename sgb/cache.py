@@ -0,0 +1,102 @@
+"""
+Claves versionadas e invalidación por señales sobre las caches de
+settings.CACHES.
+
+Cada objeto cacheado tiene un contador ("version:<nombre>:<pk>", en la
+cache "default") que forma parte de la clave de sus entradas: las de
+clave_versionada() en cualquier cache con nombre, o los fragmentos de
+{% cache %}. Al modificarse el objeto se incrementa el contador y las
+entradas viejas dejan de usarse; expiran solas. invalidar_con_senales()
+conecta ese incremento a post_save/post_delete de un modelo.
+
+Un contador que no está en la cache (nunca creado o desalojado) arranca en
+el instante actual en milisegundos, no en 1, para no volver a una versión
+ya usada por entradas que sigan en la cache.
+
+Los contadores solo invalidan en todos los procesos si la cache "default"
+es compartida (redis en producción, ver settings). Con locmem cada proceso
+tiene los suyos: compartida() es False, salvo que settings.CACHE_UN_PROCESO
+declare que la aplicación corre en un único proceso, y lo que guarda datos
+detrás de una versión debe ir a la base.
+"""
+
+from operator import attrgetter
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_delete, post_save
+
+ALIAS_VERSIONES = "default"
+
+
+def compartida():
+    """Si una versión incrementada en un proceso la ven todos los demás"""
+    return settings.CACHE_UN_PROCESO or not isinstance(caches[ALIAS_VERSIONES], LocMemCache)
+
+
+def _clave(nombre, pk):
+    return f"version:{nombre}:{pk}"
+
+
+def _inicial():
+    return time.time_ns() // 1_000_000
+
+
+def versiones(*objetos):
+    """
+    Versión actual de cada (nombre, pk), en una sola lectura de la cache.
+    Un pk None devuelve 0.
+    """
+    cache = caches[ALIAS_VERSIONES]
+    claves = [_clave(nombre, pk) for nombre, pk in objetos if pk is not None]
+    actuales = cache.get_many(claves)
+    faltantes = {clave: _inicial() for clave in claves if clave not in actuales}
+    if faltantes:
+        for clave, valor in faltantes.items():
+            # add() respeta el valor de otro proceso que lo haya creado antes
+            if not cache.add(clave, valor, None):
+                valor = cache.get(clave, valor)
+            actuales[clave] = valor
+    return [
+        actuales[_clave(nombre, pk)] if pk is not None else 0 for nombre, pk in objetos
+    ]
+
+
+def version(nombre, pk):
+    return versiones((nombre, pk))[0]
+
+
+def clave_versionada(nombre, pk, *partes):
+    """Clave "<nombre>:<pk>:v<versión>[:partes]" que cambia al invalidar (nombre, pk)"""
+    return ":".join([nombre, str(pk), f"v{version(nombre, pk)}", *map(str, partes)])
+
+
+def invalidar(nombre, pk):
+    """Pasa a una nueva versión de (nombre, pk) y la devuelve"""
+    if pk is None:
+        return None
+    cache = caches[ALIAS_VERSIONES]
+    clave = _clave(nombre, pk)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        inicial = _inicial()
+        return inicial if cache.add(clave, inicial, None) else cache.get(clave)
+
+
+def invalidar_con_senales(modelo, nombre, pk=attrgetter("pk"), al_borrar=True):
+    """
+    Invalida (nombre, pk(instancia)) en cada post_save (y post_delete, salvo
+    al_borrar=False) de `modelo`. Se llama desde AppConfig.ready() o desde
+    un módulo de señales.
+    """
+
+    def receptor(sender, instance, **kwargs):
+        invalidar(nombre, pk(instance))
+
+    uid = f"sgb.cache:{nombre}:{modelo._meta.label}"
+    post_save.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
+    if al_borrar:
+        post_delete.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
@@ -0,0 +1,450 @@
+"""
+Generador de carga: operadores simulados con asyncio contra un servidor
+HTTP (sgb.wsgi o sgb.asgi servidos localmente, ver el comando
+prueba_carga).
+
+Cada operador tiene su conexión HTTP/1.1 persistente y sus cookies (sesión,
+mensajes y csrftoken, como un navegador) y repite el recorrido de
+recorrido(): busca un cliente en el autocompletado, abre su estado de
+cuenta, crea una liquidación con ITEMS_POR_LIQUIDACION items, la busca,
+registra un pago y descarga el PDF. Cada paso se mide por separado; si uno
+falla (estado inesperado, error de conexión o tiempo agotado) el recorrido
+se abandona y empieza otro.
+
+El cliente HTTP es mínimo y solo usa la biblioteca estándar: alcanza para
+las respuestas de Django (Content-Length, chunked o hasta el cierre de la
+conexión). Las liquidaciones y pagos que se crean quedan en la base.
+"""
+
+import asyncio
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlencode, urlsplit
+import uuid
+
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import Banco, Liquidacion, Moneda, Proveedor
+
+ITEMS_POR_LIQUIDACION = 20
+# Clientes de la base entre los que eligen los operadores
+MUESTRA = 200
+
+PASOS = [
+    "buscar_cliente",
+    "estado_cuenta",
+    "formulario_liquidacion",
+    "crear_liquidacion",
+    "buscar_liquidacion",
+    "formulario_pago",
+    "registrar_pago",
+    "descargar_pdf",
+]
+
+
+class ErrorPaso(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Respuesta:
+    estado: int
+    cabeceras: dict
+    cuerpo: bytes
+
+
+class ClienteHTTP:
+    """Conexión HTTP/1.1 persistente con cookies, para un operador"""
+
+    def __init__(self, url, tiempo_maximo=30):
+        partes = urlsplit(url)
+        if partes.scheme != "http":
+            raise ValueError(f"Solo se admite http: {url}")
+        self.host = partes.hostname
+        self.puerto = partes.port or 80
+        self.prefijo = partes.path.rstrip("/")
+        self.tiempo_maximo = tiempo_maximo
+        self.cookies = {}
+        self._lector = self._escritor = None
+
+    async def pedir(self, metodo, ruta, datos=None):
+        return await asyncio.wait_for(
+            self._pedir(metodo, ruta, datos), timeout=self.tiempo_maximo
+        )
+
+    async def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._lector = self._escritor = None
+
+    async def _pedir(self, metodo, ruta, datos):
+        cuerpo = urlencode(datos, doseq=True).encode() if datos is not None else b""
+        peticion = self._peticion(metodo, ruta, cuerpo, datos is not None)
+        reutilizada = self._escritor is not None
+        try:
+            return await self._intercambio(peticion)
+        except ConnectionError:
+            await self.cerrar()
+            if not reutilizada:
+                raise
+        # El servidor cerró la conexión inactiva: se reintenta en una nueva
+        return await self._intercambio(peticion)
+
+    def _peticion(self, metodo, ruta, cuerpo, formulario):
+        lineas = [
+            f"{metodo} {self.prefijo}{ruta} HTTP/1.1",
+            f"Host: {self.host}:{self.puerto}",
+            "Accept-Encoding: identity",
+            "Connection: keep-alive",
+        ]
+        if self.cookies:
+            cookies = "; ".join(f"{nombre}={valor}" for nombre, valor in self.cookies.items())
+            lineas.append(f"Cookie: {cookies}")
+        if formulario:
+            lineas.append("Content-Type: application/x-www-form-urlencoded")
+            lineas.append(f"Content-Length: {len(cuerpo)}")
+        return ("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1") + cuerpo
+
+    async def _intercambio(self, peticion):
+        if self._escritor is None:
+            self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+        self._escritor.write(peticion)
+        await self._escritor.drain()
+        respuesta, persistente = await self._leer()
+        if not persistente:
+            await self.cerrar()
+        return respuesta
+
+    async def _leer(self):
+        lector = self._lector
+        linea = await lector.readline()
+        if not linea:
+            raise ConnectionError("El servidor cerró la conexión")
+        version, estado, *_ = linea.decode("latin-1").split(" ", 2)
+        cabeceras = {}
+        while True:
+            linea = (await lector.readline()).decode("latin-1").rstrip("\r\n")
+            if not linea:
+                break
+            nombre, _, valor = linea.partition(":")
+            nombre, valor = nombre.strip().lower(), valor.strip()
+            if nombre == "set-cookie":
+                self._guardar_cookie(valor)
+            cabeceras[nombre] = valor
+
+        estado = int(estado)
+        conexion = cabeceras.get("connection", "").lower()
+        persistente = conexion != "close" and (version == "HTTP/1.1" or conexion == "keep-alive")
+        if estado in (204, 304) or 100 <= estado < 200:
+            cuerpo = b""
+        elif cabeceras.get("transfer-encoding", "").lower() == "chunked":
+            cuerpo = await self._leer_chunked()
+        elif "content-length" in cabeceras:
+            cuerpo = await lector.readexactly(int(cabeceras["content-length"]))
+        else:
+            cuerpo = await lector.read()
+            persistente = False
+        return Respuesta(estado, cabeceras, cuerpo), persistente
+
+    async def _leer_chunked(self):
+        partes = []
+        while True:
+            tamano = int((await self._lector.readline()).split(b";")[0], 16)
+            if not tamano:
+                # Cabeceras finales (trailers) hasta la línea vacía
+                while (await self._lector.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(partes)
+            partes.append(await self._lector.readexactly(tamano))
+            await self._lector.readline()
+
+    def _guardar_cookie(self, valor):
+        par, *atributos = valor.split(";")
+        nombre, _, contenido = par.strip().partition("=")
+        atributos = {atributo.strip().lower() for atributo in atributos}
+        if "max-age=0" in atributos or contenido in ("", '""'):
+            self.cookies.pop(nombre, None)
+        else:
+            self.cookies[nombre] = contenido
+
+
+class Resultados:
+    """Latencias, estados y errores de cada paso"""
+
+    def __init__(self):
+        self.tiempos = defaultdict(list)
+        self.estados = defaultdict(Counter)
+        self.errores = defaultdict(Counter)
+        self.recorridos = 0
+
+    def registrar(self, paso, segundos, estado=None, error=None):
+        self.tiempos[paso].append(segundos * 1000)
+        if estado is not None:
+            self.estados[paso][str(estado)] += 1
+        if error is not None:
+            self.errores[paso][error] += 1
+
+    def resumen(self, duracion):
+        pasos = {}
+        for paso in PASOS:
+            tiempos = self.tiempos.get(paso, [])
+            errores = sum(self.errores[paso].values())
+            pasos[paso] = {
+                "peticiones": len(tiempos),
+                "por_segundo": round(len(tiempos) / duracion, 2),
+                "errores": errores,
+                "tasa_error": round(errores / len(tiempos), 4) if tiempos else 0,
+                **_percentiles(tiempos),
+                "estados": dict(self.estados[paso]),
+                "detalle_errores": dict(self.errores[paso]),
+            }
+        peticiones = sum(paso["peticiones"] for paso in pasos.values())
+        return {
+            "duracion_s": round(duracion, 2),
+            "recorridos": self.recorridos,
+            "peticiones": peticiones,
+            "por_segundo": round(peticiones / duracion, 2),
+            "errores": sum(paso["errores"] for paso in pasos.values()),
+            "pasos": pasos,
+        }
+
+
+def _percentiles(tiempos):
+    if not tiempos:
+        return {"p50_ms": None, "p90_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    if len(tiempos) == 1:
+        percentiles = tiempos * 99
+    else:
+        percentiles = statistics.quantiles(tiempos, n=100, method="inclusive")
+    return {
+        "p50_ms": round(percentiles[49], 2),
+        "p90_ms": round(percentiles[89], 2),
+        "p95_ms": round(percentiles[94], 2),
+        "p99_ms": round(percentiles[98], 2),
+        "max_ms": round(max(tiempos), 2),
+    }
+
+
+def preparar():
+    """
+    Datos de la base que necesitan los recorridos: una muestra de clientes
+    (ids y palabras de sus nombres, para buscar), proveedores, bancos y
+    monedas. Se llama antes de empezar, fuera del event loop.
+    """
+    clientes = list(Cliente.objects.order_by("?").values_list("pk", "nombre")[:MUESTRA])
+    datos = {
+        "clientes": [pk for pk, _ in clientes],
+        "textos": sorted(
+            {palabra for _, nombre in clientes for palabra in nombre.split() if len(palabra) > 3}
+        ),
+        "proveedores": list(
+            Proveedor.objects.order_by("?").values_list("pk", flat=True)[:MUESTRA]
+        ),
+        "bancos": list(Banco.objects.values_list("pk", flat=True)),
+        "monedas": list(Moneda.objects.values_list("pk", flat=True)),
+        "clases": Liquidacion.ClaseChoices.values,
+    }
+    faltan = [
+        nombre for nombre in ("clientes", "textos", "proveedores", "bancos") if not datos[nombre]
+    ]
+    if faltan:
+        raise ValueError(f"Faltan datos en la base ({', '.join(faltan)}): usar seed_bench")
+    return datos
+
+
+class _Operador:
+    def __init__(self, numero, http, datos, resultados, rng, pausa, ejecucion):
+        self.numero = numero
+        self.http = http
+        self.datos = datos
+        self.resultados = resultados
+        self.rng = rng
+        self.pausa = pausa
+        self.ejecucion = ejecucion
+        self.creadas = 0
+
+    async def paso(self, nombre, metodo, ruta, datos=None, esperado=200, validar=None):
+        """
+        Respuesta del paso; ErrorPaso si falla (ya registrado). `validar`
+        recibe la respuesta y devuelve el error, si lo hay.
+        """
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.http.pedir(metodo, ruta, datos)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as error:
+            await self.http.cerrar()
+            self.resultados.registrar(
+                nombre, time.perf_counter() - inicio, error=type(error).__name__
+            )
+            raise ErrorPaso(nombre)
+        if respuesta.estado != esperado:
+            error = f"estado {respuesta.estado}"
+        else:
+            error = validar(respuesta) if validar else None
+        self.resultados.registrar(
+            nombre, time.perf_counter() - inicio, respuesta.estado, error
+        )
+        if error:
+            raise ErrorPaso(nombre)
+        if self.pausa:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.pausa))
+        return respuesta
+
+    async def recorrido(self):
+        rng, datos = self.rng, self.datos
+
+        texto = rng.choice(datos["textos"])
+        respuesta = await self.paso(
+            "buscar_cliente",
+            "GET",
+            _ruta("cliente_autocomplete", q=texto[:6]),
+            validar=_resultados,
+        )
+        resultados = json.loads(respuesta.cuerpo)["results"]
+        cliente = rng.choice(resultados)["id"] if resultados else rng.choice(datos["clientes"])
+
+        await self.paso("estado_cuenta", "GET", _ruta("clientes:estado_cuenta", cliente))
+
+        await self.paso("formulario_liquidacion", "GET", _ruta("liquidacion_create"))
+        self.creadas += 1
+        numero = f"C{self.ejecucion}{self.numero:04d}{self.creadas:05d}"
+        await self.paso(
+            "crear_liquidacion",
+            "POST",
+            _ruta("liquidacion_create"),
+            self._liquidacion(cliente, numero),
+            esperado=302,
+        )
+
+        respuesta = await self.paso(
+            "buscar_liquidacion",
+            "GET",
+            _ruta("liquidacion_autocomplete", q=numero),
+            validar=lambda respuesta: _resultados(respuesta, numero),
+        )
+        liquidacion = json.loads(respuesta.cuerpo)["results"][0]["id"]
+
+        await self.paso("formulario_pago", "GET", _ruta("pago_create"))
+        await self.paso(
+            "registrar_pago",
+            "POST",
+            _ruta("pago_create"),
+            {
+                "csrfmiddlewaretoken": self.http.cookies.get("csrftoken", ""),
+                "liquidacion": liquidacion,
+                "banco": rng.choice(datos["bancos"]),
+                "fecha": date.today().isoformat(),
+                "monto": rng.randrange(100_000, 10_000_000),
+                "referencia": f"TRF-{numero}",
+                "concepto": "Prueba de carga",
+            },
+            esperado=302,
+        )
+
+        await self.paso(
+            "descargar_pdf",
+            "GET",
+            _ruta("liquidacion_pdf", liquidacion),
+            validar=lambda respuesta: (
+                None if respuesta.cuerpo.startswith(b"%PDF") else "no es un PDF"
+            ),
+        )
+        self.resultados.recorridos += 1
+
+    def _liquidacion(self, cliente, numero):
+        rng, datos = self.rng, self.datos
+        valor = rng.randrange(1_000, 200_000)
+        formulario = {
+            "csrfmiddlewaretoken": self.http.cookies.get("csrftoken", ""),
+            "fecha": date.today().isoformat(),
+            "cliente": cliente,
+            "numero_liquidacion": numero,
+            "numero_despacho": f"D{numero}",
+            "clase": rng.choice(datos["clases"]),
+            "numero_factura_comercial": f"F{numero}",
+            "partida_arancelaria": "8471.30.12",
+            "ad_valorem": "10%",
+            "factura": valor,
+            "flete": 0,
+            "seguro": 0,
+            "valor_imponible": valor,
+            "moneda_valor_imponible": rng.choice(datos["monedas"]),
+            "moneda_factura": rng.choice(datos["monedas"]),
+            "equivalente_gs": valor * 7400,
+            "tipo_cambio_despacho": "7400",
+            "tipo_cambio_factura": "7410",
+            "proveedor": rng.choice(datos["proveedores"]),
+            "liquidacionitem_set-TOTAL_FORMS": ITEMS_POR_LIQUIDACION,
+            "liquidacionitem_set-INITIAL_FORMS": 0,
+            "liquidacionitem_set-MIN_NUM_FORMS": 0,
+            "liquidacionitem_set-MAX_NUM_FORMS": 1000,
+        }
+        for i in range(ITEMS_POR_LIQUIDACION):
+            monto = rng.randrange(50_000, 5_000_000)
+            formulario.update({
+                f"liquidacionitem_set-{i}-item": f"Concepto {i + 1}",
+                f"liquidacionitem_set-{i}-monto": monto,
+                f"liquidacionitem_set-{i}-iva": monto // 10,
+                f"liquidacionitem_set-{i}-retencion": 0,
+            })
+        return formulario
+
+
+def _resultados(respuesta, texto=None):
+    """Error de una respuesta de autocompletado; con `texto`, debe estar en el primero"""
+    try:
+        resultados = json.loads(respuesta.cuerpo)["results"]
+    except (ValueError, KeyError, TypeError):
+        return "JSON inválido"
+    if texto is not None and not (resultados and texto in resultados[0]["text"]):
+        return "sin resultados"
+    return None
+
+
+def _ruta(nombre, *args, **parametros):
+    ruta = reverse(nombre, args=args)
+    return f"{ruta}?{urlencode(parametros)}" if parametros else ruta
+
+
+async def ejecutar(url, datos, usuarios=10, duracion=30, pausa=0, rampa=0, semilla=0,
+                   tiempo_maximo=30):
+    """
+    `usuarios` operadores repiten el recorrido durante `duracion` segundos
+    (los recorridos en curso terminan). Con `rampa` los operadores empiezan
+    escalonados a lo largo de esos segundos; `pausa` es el tiempo medio de
+    espera entre pasos. Devuelve el resumen de Resultados.
+    """
+    resultados = Resultados()
+    ejecucion = uuid.uuid4().hex[:6]
+    bucle = asyncio.get_running_loop()
+    fin = bucle.time() + duracion
+
+    async def operar(numero):
+        await asyncio.sleep(rampa * numero / usuarios)
+        operador = _Operador(
+            numero,
+            ClienteHTTP(url, tiempo_maximo),
+            datos,
+            resultados,
+            random.Random(f"{semilla}-{numero}"),
+            pausa,
+            ejecucion,
+        )
+        try:
+            while bucle.time() < fin:
+                try:
+                    await operador.recorrido()
+                except ErrorPaso:
+                    pass
+        finally:
+            await operador.http.cerrar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(operar(numero) for numero in range(usuarios)))
+    return resultados.resumen(time.perf_counter() - inicio)
@@ -0,0 +1,122 @@
+"""
+Conteo de consultas SQL por petición o por bloque de código.
+
+medir() cuenta las consultas de todas las conexiones, y su duración,
+mientras dura un bloque, con connection.execute_wrapper: funciona con
+DEBUG apagado. PresupuestoConsultasMiddleware compara las consultas de
+cada petición con settings.CONSULTAS_MAXIMO, o con el máximo de su ruta en
+CONSULTAS_MAXIMO_RUTAS, y al excederlo lo registra en "sgb.consultas" o
+levanta ConsultasExcedidas, según CONSULTAS_EXCEDIDAS. assert_max_queries
+aplica un máximo a un bloque o a una función en los tests.
+"""
+
+from contextlib import ContextDecorator, ExitStack, contextmanager
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class ConsultasExcedidas(AssertionError):
+    pass
+
+
+class Medicion:
+    """execute_wrapper que cuenta las consultas y suma su duración"""
+
+    def __init__(self, guardar_sql=False):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.sql = [] if guardar_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.segundos += time.perf_counter() - inicio
+            if self.sql is not None:
+                self.sql.append(sql)
+
+    def excedida(self, maximo, descripcion):
+        """ConsultasExcedidas con las consultas hechas, si las hay"""
+        mensaje = f"{descripcion}: {self.consultas} consultas, máximo {maximo}"
+        if self.sql:
+            mensaje += "".join(f"\n{i}. {sql}" for i, sql in enumerate(self.sql, 1))
+        return ConsultasExcedidas(mensaje)
+
+
+@contextmanager
+def medir(guardar_sql=False):
+    """Medicion de las consultas del bloque en todas las conexiones"""
+    medicion = Medicion(guardar_sql)
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(medicion))
+        yield medicion
+
+
+class _Maximo(ContextDecorator):
+    def __init__(self, maximo):
+        self.maximo = maximo
+
+    def __enter__(self):
+        self._bloque = medir(guardar_sql=True)
+        self.medicion = self._bloque.__enter__()
+        return self.medicion
+
+    def __exit__(self, *excepcion):
+        self._bloque.__exit__(*excepcion)
+        if excepcion[0] is None and self.medicion.consultas > self.maximo:
+            raise self.medicion.excedida(self.maximo, "Bloque")
+
+
+def assert_max_queries(maximo):
+    """
+    Falla con ConsultasExcedidas (un AssertionError, con el SQL ejecutado)
+    si el bloque hace más de `maximo` consultas:
+
+        with assert_max_queries(3):
+            ...
+
+        @assert_max_queries(3)
+        def test_...():
+    """
+    return _Maximo(maximo)
+
+
+class PresupuestoConsultasMiddleware:
+    """No mide nada si no hay CONSULTAS_MAXIMO ni CONSULTAS_MAXIMO_RUTAS"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        general = settings.CONSULTAS_MAXIMO
+        por_ruta = settings.CONSULTAS_MAXIMO_RUTAS
+        if not general and not por_ruta:
+            return self.get_response(request)
+
+        error = settings.CONSULTAS_EXCEDIDAS == "error"
+        with medir(guardar_sql=error) as medicion:
+            response = self.get_response(request)
+
+        coincidencia = request.resolver_match
+        ruta = coincidencia.view_name if coincidencia else None
+        maximo = por_ruta.get(ruta, general)
+        if maximo and medicion.consultas > maximo:
+            descripcion = f"{request.method} {ruta or request.path}"
+            if error:
+                raise medicion.excedida(maximo, descripcion)
+            logger.warning(
+                "%s: %d consultas, máximo %d",
+                descripcion,
+                medicion.consultas,
+                maximo,
+                extra={"ruta": ruta, "consultas": medicion.consultas, "maximo": maximo},
+            )
+        return response
@@ -0,0 +1,93 @@
+"""
+Backend PostgreSQL que toma las conexiones de un pool de psycopg2.
+
+Django 4.2 no trae pool propio (OPTIONS["pool"] llega en Django 5.1 y solo
+con psycopg 3), así que este backend reemplaza psycopg2.connect() por
+ThreadedConnectionPool.getconn() y, al cerrar la conexión, la devuelve al
+pool en lugar de cerrarla. Hay un pool por proceso y por conjunto de
+parámetros de conexión.
+
+Se activa con DB_POOL=1 (ver sgb/settings.py). OPTIONS["pool"] admite
+min_size, max_size (conexiones abiertas como máximo; el pool no espera, así
+que debe cubrir los hilos del servidor) y check (SELECT 1 al tomar una
+conexión, para descartar las que cortó el servidor).
+"""
+
+import threading
+
+import psycopg2
+from django.db.backends.postgresql import base
+from psycopg2 import pool as psycopg2_pool
+
+_POOLS = {}
+_BLOQUEO = threading.Lock()
+
+
+def obtener_pool(conn_params, min_size, max_size):
+    clave = tuple(sorted((nombre, repr(valor)) for nombre, valor in conn_params.items()))
+    with _BLOQUEO:
+        if clave not in _POOLS:
+            _POOLS[clave] = psycopg2_pool.ThreadedConnectionPool(
+                min_size, max_size, **conn_params
+            )
+        return _POOLS[clave]
+
+
+class Psycopg2ConPool:
+    """
+    Se usa como DatabaseWrapper.Database: connect() toma del pool y el resto
+    de los atributos (excepciones, extensiones) son los de psycopg2.
+    """
+
+    def __init__(self, min_size=1, max_size=10, check=True):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.check = check
+        self._origen = {}
+
+    def __getattr__(self, nombre):
+        return getattr(psycopg2, nombre)
+
+    def connect(self, **conn_params):
+        pool = obtener_pool(conn_params, self.min_size, self.max_size)
+        conexion = pool.getconn()
+        if self.check and not self._usable(conexion):
+            pool.putconn(conexion, close=True)
+            conexion = pool.getconn()
+        self._origen[id(conexion)] = pool
+        return conexion
+
+    def devolver(self, conexion):
+        pool = self._origen.pop(id(conexion), None)
+        if pool is None:
+            conexion.close()
+        else:
+            # putconn() hace ROLLBACK si quedó una transacción abierta
+            pool.putconn(conexion, close=bool(conexion.closed))
+
+    def _usable(self, conexion):
+        if conexion.closed:
+            return False
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conexion.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.Database = Psycopg2ConPool(**self.settings_dict["OPTIONS"].get("pool", {}))
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.Database.devolver(self.connection)
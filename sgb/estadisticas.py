@@ -0,0 +1,155 @@
+"""
+Estadísticas del dashboard, cacheadas en la cache "reports".
+
+Los conteos se calculan todos en una sola consulta (subconsultas escalares)
+cuando falta alguno en la cache y desde ahí los mantienen post_save y
+post_delete con incr/decr, al confirmarse la transacción. Las operaciones
+que no envían señales (bulk_create, update) se corrigen al expirar las
+entradas (timeout de la cache "reports"), o antes con descartar().
+
+Los importes salen de SaldoMensual: liquidado y cobrado en el mes actual y
+saldo pendiente (liquidaciones - pagos) de todos los clientes. Se guardan
+por mes y se descartan cuando cambia cualquier SaldoMensual.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import DecimalField, F, Func, IntegerField, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from clientes.models import Cliente
+from liquidaciones.models import (
+    Banco,
+    Liquidacion,
+    Pago,
+    Procedencia,
+    Proveedor,
+    SaldoMensual,
+)
+
+ALIAS_CACHE = "reports"
+
+CONTEOS = {
+    "users": User,
+    "clientes": Cliente,
+    "liquidaciones": Liquidacion,
+    "procedencias": Procedencia,
+    "proveedores": Proveedor,
+    "bancos": Banco,
+    "pagos": Pago,
+}
+IMPORTES = ("liquidado_mes", "cobrado_mes", "saldo_pendiente")
+
+
+def _clave_conteo(nombre):
+    return f"estadisticas:conteo:{nombre}"
+
+
+def _clave_importes(mes):
+    return f"estadisticas:importes:{mes:%Y-%m}"
+
+
+def _mes_actual():
+    return timezone.localdate().replace(day=1)
+
+
+# COUNT y SUM como Func y no como Count/Sum: sin GROUP BY, cada subconsulta
+# devuelve una fila aunque la tabla esté vacía
+def _contar():
+    return Func(F("pk"), function="COUNT", output_field=IntegerField())
+
+
+def _sumar(expresion):
+    return Coalesce(
+        Func(expresion, function="SUM", output_field=DecimalField(max_digits=16, decimal_places=2)),
+        Value(Decimal("0")),
+    )
+
+
+def _escalar(queryset, expresion):
+    return Subquery(queryset.order_by().values(valor=expresion))
+
+
+def calcular(mes=None):
+    """Conteos e importes del mes (por defecto el actual) en una consulta"""
+    mes = mes or _mes_actual()
+    saldos_mes = SaldoMensual.objects.filter(mes=mes)
+    # La consulta externa cuenta la primera tabla; las demás son subconsultas
+    (primero, base), *resto = CONTEOS.items()
+    return base.objects.order_by().values(
+        **{primero: _contar()},
+        **{nombre: _escalar(modelo.objects.all(), _contar()) for nombre, modelo in resto},
+        liquidado_mes=_escalar(saldos_mes, _sumar(F("total_liquidaciones"))),
+        cobrado_mes=_escalar(saldos_mes, _sumar(F("total_pagos"))),
+        saldo_pendiente=_escalar(
+            SaldoMensual.objects.all(), _sumar(F("total_liquidaciones") - F("total_pagos"))
+        ),
+    ).get()
+
+
+def obtener():
+    """Estadísticas desde la cache; las recalcula si falta alguna entrada"""
+    cache = caches[ALIAS_CACHE]
+    mes = _mes_actual()
+    claves = [_clave_conteo(nombre) for nombre in CONTEOS] + [_clave_importes(mes)]
+    guardadas = cache.get_many(claves)
+    if len(guardadas) == len(claves):
+        importes = guardadas.pop(_clave_importes(mes))
+        return {
+            **{nombre: guardadas[_clave_conteo(nombre)] for nombre in CONTEOS},
+            **importes,
+        }
+
+    estadisticas = calcular(mes)
+    entradas = {_clave_conteo(nombre): estadisticas[nombre] for nombre in CONTEOS}
+    entradas[_clave_importes(mes)] = {nombre: estadisticas[nombre] for nombre in IMPORTES}
+    cache.set_many(entradas)
+    return estadisticas
+
+
+def _sumar_al_conteo(nombre, delta):
+    try:
+        caches[ALIAS_CACHE].incr(_clave_conteo(nombre), delta)
+    except ValueError:
+        # No está en la cache: se recalcula en la próxima lectura
+        pass
+
+
+def contar_con_senales(modelo, nombre):
+    """Mantiene el conteo `nombre` con las altas y bajas de `modelo`"""
+
+    def al_guardar(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            transaction.on_commit(lambda: _sumar_al_conteo(nombre, 1))
+
+    def al_borrar(sender, instance, **kwargs):
+        transaction.on_commit(lambda: _sumar_al_conteo(nombre, -1))
+
+    uid = f"sgb.estadisticas:{nombre}"
+    post_save.connect(al_guardar, sender=modelo, weak=False, dispatch_uid=uid)
+    post_delete.connect(al_borrar, sender=modelo, weak=False, dispatch_uid=uid)
+
+
+def descartar_importes(sender=None, **kwargs):
+    transaction.on_commit(
+        lambda: caches[ALIAS_CACHE].delete(_clave_importes(_mes_actual()))
+    )
+
+
+def descartar():
+    """Borra conteos e importes de la cache, tras cambios en lote sin señales"""
+    claves = [_clave_conteo(nombre) for nombre in CONTEOS]
+    caches[ALIAS_CACHE].delete_many(claves + [_clave_importes(_mes_actual())])
+
+
+def conectar_senales():
+    for nombre, modelo in CONTEOS.items():
+        contar_con_senales(modelo, nombre)
+    uid = "sgb.estadisticas:importes"
+    post_save.connect(descartar_importes, sender=SaldoMensual, dispatch_uid=uid)
+    post_delete.connect(descartar_importes, sender=SaldoMensual, dispatch_uid=uid)
@@ -0,0 +1,181 @@
+"""
+Paginación por keyset (seek) para las listas ordenadas por fecha.
+
+`Paginator` hace un COUNT(*) y un OFFSET por página, que se vuelve más lento
+cuanto más profunda es la página. KeysetPaginator filtra a partir de la
+última fila vista ((fecha, id) < (f, i)) y entrega cursores opacos en lugar
+de números de página. KeysetPage imita la API de `Page`, de modo que las
+plantillas existentes funcionan sin cambios: next_page_number() y
+previous_page_number() devuelven cursores y page_range está vacío.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils.functional import cached_property
+
+from .search import es_postgres
+
+SIGUIENTE = "n"
+ANTERIOR = "p"
+
+
+class KeysetPaginator:
+    """
+    `orden` son los campos del keyset, todos en la misma dirección y con una
+    clave única al final (por defecto ("-fecha", "-id")).
+
+    `contar` define cómo se obtiene `count`: "exacto" (COUNT(*) en cada
+    página), "cache" (COUNT(*) guardado en la cache por `cache_timeout`
+    segundos) o "estimado" (estimación del planificador de PostgreSQL,
+    también cacheada; en otros motores equivale a "cache").
+    """
+
+    page_range = []
+    num_pages = None
+
+    def __init__(
+        self,
+        queryset,
+        per_page,
+        orden=("-fecha", "-id"),
+        contar="cache",
+        cache_timeout=300,
+    ):
+        descendentes = {campo.startswith("-") for campo in orden}
+        if len(descendentes) != 1:
+            raise ValueError("Todos los campos del keyset deben tener la misma dirección")
+        if contar not in ("exacto", "cache", "estimado"):
+            raise ValueError(f"Modo de conteo desconocido: {contar}")
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.descendente = descendentes.pop()
+        self.campos = [
+            queryset.model._meta.get_field(campo.lstrip("-")) for campo in orden
+        ]
+        self.contar = contar
+        self.cache_timeout = cache_timeout
+
+    @cached_property
+    def count(self):
+        if self.contar == "exacto":
+            return self.queryset.count()
+        sql, params = self.queryset.query.sql_with_params()
+        clave = "keyset-count:%s" % hashlib.md5(
+            f"{self.contar}:{sql}:{params}".encode()
+        ).hexdigest()
+        total = cache.get(clave)
+        if total is None:
+            total = self._estimar() if self.contar == "estimado" else None
+            if total is None:
+                total = self.queryset.count()
+            cache.set(clave, total, self.cache_timeout)
+        return total
+
+    def _estimar(self):
+        """Filas estimadas por el planificador de PostgreSQL, o None"""
+        if not es_postgres(self.queryset.db):
+            return None
+        plan = json.loads(self.queryset.order_by().explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_page(self, cursor=None):
+        """Devuelve la página indicada por `cursor`; la primera si es inválido"""
+        direccion, valores = self.decodificar(cursor)
+        hacia_atras = direccion == ANTERIOR
+        queryset = self.queryset
+        if valores is not None:
+            queryset = queryset.filter(self._condicion(valores, hacia_atras))
+
+        # Hacia atrás se recorre en el orden inverso y luego se da vuelta
+        descendente = self.descendente != hacia_atras
+        prefijo = "-" if descendente else ""
+        queryset = queryset.order_by(*[prefijo + campo.name for campo in self.campos])
+        filas = list(queryset[: self.per_page + 1])
+        hay_mas = len(filas) > self.per_page
+        filas = filas[: self.per_page]
+        if hacia_atras:
+            filas.reverse()
+            return KeysetPage(filas, self, has_next=True, has_previous=hay_mas)
+        return KeysetPage(
+            filas, self, has_next=hay_mas, has_previous=valores is not None
+        )
+
+    def _condicion(self, valores, hacia_atras):
+        """(c1, c2, ...) > / < (v1, v2, ...) expresado con Q"""
+        mayor = self.descendente == hacia_atras
+        operador = "gt" if mayor else "lt"
+        condicion = models.Q()
+        iguales = {}
+        for campo, valor in zip(self.campos, valores):
+            condicion |= models.Q(**iguales, **{f"{campo.name}__{operador}": valor})
+            iguales[campo.name] = valor
+        # Cota redundante sobre el primer campo para que el índice acote el rango
+        primero = self.campos[0].name
+        cota = models.Q(**{f"{primero}__{operador}e": valores[0]})
+        return cota & condicion
+
+    def codificar(self, direccion, fila):
+        valores = [campo.value_to_string(fila) for campo in self.campos]
+        datos = json.dumps([direccion, valores], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(datos).decode().rstrip("=")
+
+    def decodificar(self, cursor):
+        """Devuelve (dirección, valores) del cursor, o (SIGUIENTE, None)"""
+        if not cursor:
+            return SIGUIENTE, None
+        try:
+            relleno = "=" * (-len(cursor) % 4)
+            direccion, valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+            if direccion not in (SIGUIENTE, ANTERIOR) or len(valores) != len(self.campos):
+                raise ValueError(cursor)
+            valores = [
+                campo.to_python(valor) for campo, valor in zip(self.campos, valores)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            return SIGUIENTE, None
+        return direccion, valores
+
+
+class KeysetPage:
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __repr__(self):
+        return f"<KeysetPage ({len(self.object_list)} filas)>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_page_number(self):
+        """Cursor de la página siguiente (se usa como ?page=)"""
+        return self.paginator.codificar(SIGUIENTE, self.object_list[-1])
+
+    def previous_page_number(self):
+        """Cursor de la página anterior (se usa como ?page=)"""
+        return self.paginator.codificar(ANTERIOR, self.object_list[0])
@@ -0,0 +1,79 @@
+"""
+Registro (logging) estructurado.
+
+FormatoJSON escribe cada registro como una línea JSON, con los campos que
+se pasan en `extra`. TiempoPeticionMiddleware registra en el logger
+"sgb.peticiones", a nivel INFO, una línea por petición con el método, la
+ruta (nombre de la URL), el estado, la duración y las consultas a la base
+con su tiempo (ver sgb.consultas). La configuración está en
+settings.LOGGING.
+"""
+
+import json
+import logging
+import time
+
+from sgb.consultas import medir
+
+logger = logging.getLogger("sgb.peticiones")
+
+# Atributos de todo LogRecord: lo demás viene de `extra`
+_ATRIBUTOS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro; los valores que no son JSON se pasan a str"""
+
+    def format(self, record):
+        datos = {
+            "momento": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS and not clave.startswith("_"):
+                datos[clave] = valor
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class TiempoPeticionMiddleware:
+    """
+    Mide cada petición si "sgb.peticiones" registra INFO; si no, no agrega
+    nada al camino de la petición.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not logger.isEnabledFor(logging.INFO):
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        with medir() as medicion:
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        coincidencia = request.resolver_match
+        ruta = coincidencia.view_name if coincidencia else None
+        nivel = logging.WARNING if response.status_code >= 500 else logging.INFO
+        logger.log(
+            nivel,
+            "%s %s %s %.1f ms",
+            request.method,
+            ruta or request.path,
+            response.status_code,
+            duracion * 1000,
+            extra={
+                "metodo": request.method,
+                "ruta": ruta,
+                "estado": response.status_code,
+                "duracion_ms": round(duracion * 1000, 2),
+                "consultas": medicion.consultas,
+                "tiempo_db_ms": round(medicion.segundos * 1000, 2),
+            },
+        )
+        return response
@@ -0,0 +1,228 @@
+"""
+Búsqueda de texto compartida por las vistas de listas y los autocompletes.
+
+Las búsquedas no distinguen mayúsculas ni acentos: se compara
+Normalizado(campo) con el texto pasado por normalizar(). En PostgreSQL
+Normalizado es LOWER(sgb_unaccent(campo)), la expresión de los índices GIN
+pg_trgm de CrearIndiceNormalizado, y los resultados se ordenan por
+similitud trigram. En SQLite (los tests) es la función sgb_normalizar, que
+registrar_funciones() define en cada conexión con normalizar(), y se
+conserva el orden original del queryset.
+"""
+
+import re
+import unicodedata
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections, models
+from django.db.migrations.operations.base import Operation
+from django.db.models.functions import Greatest
+
+
+def es_postgres(alias="default"):
+    return connections[alias].vendor == "postgresql"
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos: "José María" -> "jose maria" """
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+class Normalizado(models.Func):
+    """`expresion` en minúsculas y sin acentos, del lado de la base"""
+
+    output_field = models.TextField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotImplementedError(
+            f"Normalizado no está disponible en {connection.vendor}"
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="LOWER(sgb_unaccent(%(expressions)s::text))",
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function="sgb_normalizar", **extra_context
+        )
+
+
+def _sgb_normalizar(texto):
+    return None if texto is None else normalizar(str(texto))
+
+
+def registrar_funciones(sender, connection, **kwargs):
+    """Receptor de connection_created: define sgb_normalizar en SQLite"""
+    if connection.vendor == "sqlite":
+        connection.connection.create_function(
+            "sgb_normalizar", 1, _sgb_normalizar, deterministic=True
+        )
+
+
+def buscar(queryset, texto, campos):
+    """
+    Filtra `queryset` por las filas donde alguno de `campos` contiene `texto`
+    (sin distinguir mayúsculas ni acentos). En PostgreSQL anota `similitud`
+    y ordena por ella antes del orden original.
+    """
+    texto = normalizar(texto)
+    normalizados = {f"_busqueda_{i}": Normalizado(campo) for i, campo in enumerate(campos)}
+    condicion = models.Q()
+    for alias in normalizados:
+        condicion |= models.Q(**{f"{alias}__contains": texto})
+    queryset = queryset.alias(**normalizados).filter(condicion)
+
+    if not es_postgres(queryset.db):
+        return queryset
+
+    similitudes = [TrigramSimilarity(alias, texto) for alias in normalizados]
+    similitud = Greatest(*similitudes) if len(similitudes) > 1 else similitudes[0]
+    orden = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.annotate(similitud=similitud).order_by("-similitud", *orden)
+
+
+def consulta_prefijos(texto):
+    """
+    Convierte el texto tipeado en una tsquery `raw` donde cada palabra es un
+    prefijo ("des-20" -> "'des':* & '20':*"). Devuelve None si no hay palabras.
+    """
+    palabras = re.findall(r"\w+", normalizar(texto))
+    if not palabras:
+        return None
+    return " & ".join(f"'{palabra}':*" for palabra in palabras)
+
+
+class CrearIndiceGin(Operation):
+    """
+    Crea un índice GIN sobre una columna solo en PostgreSQL; en otros motores
+    no hace nada (SQLite no soporta `USING gin`).
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, campo, nombre):
+        self.model_name = model_name
+        self.campo = campo
+        self.nombre = nombre
+
+    def deconstruct(self):
+        return (
+            self.__class__.__name__,
+            [],
+            {"model_name": self.model_name, "campo": self.campo, "nombre": self.nombre},
+        )
+
+    def expresion(self, columna):
+        return columna
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        columna = schema_editor.quote_name(model._meta.get_field(self.campo).column)
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS %s ON %s USING gin (%s)"
+            % (
+                schema_editor.quote_name(self.nombre),
+                schema_editor.quote_name(model._meta.db_table),
+                self.expresion(columna),
+            )
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        schema_editor.execute(
+            "DROP INDEX IF EXISTS %s" % schema_editor.quote_name(self.nombre)
+        )
+
+    def describe(self):
+        return f"Crea el índice GIN {self.nombre} sobre {self.model_name}.{self.campo}"
+
+    @property
+    def migration_name_fragment(self):
+        return self.nombre.lower()
+
+
+class CrearIndiceTrigram(CrearIndiceGin):
+    """
+    Índice GIN `gin_trgm_ops` sobre UPPER(columna), la expresión que Django
+    usa en PostgreSQL para `icontains`. Requiere la extensión pg_trgm
+    (TrigramExtension).
+    """
+
+    def expresion(self, columna):
+        return "(UPPER(%s::text)) gin_trgm_ops" % columna
+
+
+class CrearIndiceNormalizado(CrearIndiceGin):
+    """
+    Índice GIN `gin_trgm_ops` sobre LOWER(sgb_unaccent(columna)), la
+    expresión de Normalizado en PostgreSQL. Requiere pg_trgm, unaccent y
+    CrearFuncionUnaccent.
+    """
+
+    def expresion(self, columna):
+        return "(LOWER(sgb_unaccent(%s::text))) gin_trgm_ops" % columna
+
+
+class BorrarIndiceTrigram(CrearIndiceTrigram):
+    """Borra un índice de CrearIndiceTrigram; al revertir lo vuelve a crear"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"Borra el índice {self.nombre} sobre {self.model_name}.{self.campo}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"borrar_{self.nombre.lower()}"
+
+
+class CrearFuncionUnaccent(Operation):
+    """
+    Crea sgb_unaccent(text), un envoltorio IMMUTABLE de unaccent() (que es
+    STABLE y no se puede usar en índices), solo en PostgreSQL. Requiere la
+    extensión unaccent (UnaccentExtension). Al revertir no la borra: la
+    pueden usar índices de otras apps.
+    """
+
+    reversible = True
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [], {})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        schema_editor.execute(
+            "CREATE OR REPLACE FUNCTION sgb_unaccent(text) RETURNS text AS "
+            "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        pass
+
+    def describe(self):
+        return "Crea la función sgb_unaccent"
+
+    @property
+    def migration_name_fragment(self):
+        return "funcion_sgb_unaccent"
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -48,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "sgb.registro.TiempoPeticionMiddleware",
+    "sgb.consultas.PresupuestoConsultasMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -80,17 +83,169 @@ WSGI_APPLICATION = "sgb.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+#
+# Conexiones: DB_CONN_MAX_AGE son los segundos que se reutiliza una conexión
+# entre peticiones (0 = una conexión por petición) y DB_CONN_HEALTH_CHECKS
+# verifica una conexión reutilizada antes de la primera consulta de cada
+# petición. Con DB_POOL=1 las conexiones salen de un pool de psycopg2
+# (sgb.db.postgresql_pool) de DB_POOL_MIN_SIZE a DB_POOL_MAX_SIZE
+# conexiones por proceso; Django las devuelve al pool al final de cada
+# petición, por eso CONN_MAX_AGE queda en 0.
+
+
+def _activado(variable, defecto):
+    return os.getenv(variable, defecto).strip().lower() in ("1", "true", "si", "sí", "yes")
+
+
+def _database():
+    database = {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": os.getenv("DB_NAME", "sgb_db"),
         "USER": os.getenv("DB_USER", "postgres"),
         "PASSWORD": os.getenv("DB_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": _activado("DB_CONN_HEALTH_CHECKS", "1"),
     }
+    if _activado("DB_POOL", "0"):
+        database["ENGINE"] = "sgb.db.postgresql_pool"
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+                "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                "check": database["CONN_HEALTH_CHECKS"],
+            }
+        }
+    return database
+
+
+DATABASES = {"default": _database()}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# CACHE_BACKEND: "locmem" (desarrollo, por proceso), "file" (directorio
+# compartido por los procesos del servidor) o "redis" (requiere el paquete
+# redis; sirve cualquier servidor compatible). CACHE_LOCATION es el
+# directorio base o la URL de Redis. Cada cache con nombre se puede mover a
+# otro backend con CACHE_<NOMBRE>_BACKEND y CACHE_<NOMBRE>_LOCATION.
+#
+# - default: contadores de versión (sgb.cache), fragmentos y conteos
+# - pdf: PDFs renderizados (liquidaciones.pdf_cache)
+# - search: resultados de búsqueda y autocompletado
+# - reports: estadísticas del dashboard y reportes
+#
+# "default" y "reports" guardan contadores (versiones de sgb.cache, conteos
+# de sgb.estadisticas) que se incrementan en el proceso que atiende un
+# cambio y tienen que verlos todos los demás. locmem es de cada proceso y
+# FileBasedCache.incr no es atómico (lee y reescribe el archivo), así que
+# sin DEBUG esas dos caches tienen que ser redis. En desarrollo con locmem,
+# lo que depende de las versiones (fragmentos de detalle, índices de
+# autocompletado) solo se usa con CACHE_UN_PROCESO=1, que declara que la
+# aplicación corre en un único proceso (runserver); ver sgb.cache.compartida().
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+
+
+def _cache(nombre, timeout):
+    variable = f"CACHE_{nombre.upper()}"
+    backend = os.getenv(f"{variable}_BACKEND", os.getenv("CACHE_BACKEND", "locmem"))
+    location = os.getenv(f"{variable}_LOCATION", os.getenv("CACHE_LOCATION", ""))
+    if backend not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            f"{variable}_BACKEND/CACHE_BACKEND debe ser uno de {', '.join(CACHE_BACKENDS)}"
+        )
+    if backend == "locmem":
+        location = f"sgb-{nombre}"
+    elif backend == "file":
+        location = str(Path(location or BASE_DIR / "cache") / nombre)
+    else:
+        location = location or "redis://127.0.0.1:6379/0"
+    return {
+        "BACKEND": CACHE_BACKENDS[backend],
+        "LOCATION": location,
+        "TIMEOUT": timeout,
+        "KEY_PREFIX": f"sgb-{nombre}",
+    }
+
+
+CACHES = {
+    "default": _cache("default", 300),
+    "pdf": _cache("pdf", 60 * 60 * 24 * 30),
+    "search": _cache("search", 60),
+    "reports": _cache("reports", 300),
+}
+CACHES_CONTADORES = ("default", "reports")
+CACHE_UN_PROCESO = os.getenv("CACHE_UN_PROCESO", "0") == "1"
+
+
+def _contadores_compartidos(caches):
+    for alias in CACHES_CONTADORES:
+        if caches[alias]["BACKEND"] != CACHE_BACKENDS["redis"]:
+            raise ImproperlyConfigured(
+                f"La cache {alias!r} guarda contadores compartidos entre procesos: "
+                f"sin DEBUG, CACHE_BACKEND (o CACHE_{alias.upper()}_BACKEND) tiene "
+                "que ser redis"
+            )
+
+
+if not DEBUG:
+    _contadores_compartidos(CACHES)
+
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+#
+# Cada módulo usa logging.getLogger(__name__). LOG_NIVEL es el nivel de los
+# loggers de la aplicación (sgb, clientes, items, liquidaciones) y
+# LOG_FORMATO "json" (una línea JSON por registro, ver sgb.registro) o
+# "texto". sgb.peticiones registra cada petición a nivel INFO (método,
+# ruta, estado, duración, consultas y tiempo en la base); LOG_PETICIONES=0
+# lo apaga y el middleware deja de medir.
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+LOG_FORMATO = os.getenv("LOG_FORMATO", "json")
+if LOG_FORMATO not in ("json", "texto"):
+    raise ImproperlyConfigured("LOG_FORMATO debe ser json o texto")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "sgb.registro.FormatoJSON"},
+        "texto": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "consola": {"class": "logging.StreamHandler", "formatter": LOG_FORMATO},
+    },
+    "loggers": {
+        **{
+            nombre: {"handlers": ["consola"], "level": LOG_NIVEL, "propagate": False}
+            for nombre in ("sgb", "clientes", "items", "liquidaciones")
+        },
+        "sgb.peticiones": {
+            "handlers": ["consola"],
+            "level": "INFO" if _activado("LOG_PETICIONES", "1") else "WARNING",
+            "propagate": False,
+        },
+    },
 }
 
+# Presupuesto de consultas SQL por petición (sgb.consultas): máximo para
+# cualquier ruta (0 = sin control) y máximos por nombre de URL. Al
+# excederlo se registra un warning en sgb.consultas o, con
+# CONSULTAS_EXCEDIDAS=error (desarrollo, CI), la petición falla.
+CONSULTAS_MAXIMO = int(os.getenv("CONSULTAS_MAXIMO", "50"))
+CONSULTAS_MAXIMO_RUTAS = {}
+CONSULTAS_EXCEDIDAS = os.getenv("CONSULTAS_EXCEDIDAS", "log")
+if CONSULTAS_EXCEDIDAS not in ("log", "error"):
+    raise ImproperlyConfigured("CONSULTAS_EXCEDIDAS debe ser log o error")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,3 +292,20 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Login URLs
 LOGIN_URL = "/admin/login/"
 LOGIN_REDIRECT_URL = "/"
+
+# PDFs por lote (liquidaciones.pdf_lote): procesos de render del worker de
+# la cola (sin definir = uno por núcleo, 0 = en el mismo proceso), máximo de
+# liquidaciones por lote y hasta cuántas se renderizan dentro del pedido web
+# (los lotes más grandes van a la cola)
+PDF_LOTE_PROCESOS = (
+    int(os.environ["PDF_LOTE_PROCESOS"]) if os.getenv("PDF_LOTE_PROCESOS") else None
+)
+PDF_LOTE_MAXIMO = int(os.getenv("PDF_LOTE_MAXIMO", "1000"))
+PDF_LOTE_SINCRONO = int(os.getenv("PDF_LOTE_SINCRONO", "20"))
+
+# Cola de PDFs (liquidaciones.pdf_trabajos): días que se conservan los
+# trabajos finalizados antes de que procesar_trabajos_pdf los borre, y
+# segundos que un trabajo puede estar procesando antes de que otro worker lo
+# retome (debe superar el render del lote más grande)
+PDF_TRABAJOS_DIAS = int(os.getenv("PDF_TRABAJOS_DIAS", "7"))
+PDF_TRABAJOS_PLAZO = int(os.getenv("PDF_TRABAJOS_PLAZO", "1800"))
@@ -0,0 +1,36 @@
+from liquidaciones.models import Liquidacion, LiquidacionItem, Moneda
+
+
+def campos_liquidacion(cliente, proveedor, numero, **campos):
+    """
+    Fields of a valid Liquidacion; `numero` completes LIQ-, DES- and FAC-.
+    Any field can be overridden through `campos`.
+    """
+    if 'moneda_valor_imponible' not in campos:
+        campos['moneda_valor_imponible'] = Moneda.objects.get(codigo='USD')
+    return {
+        'fecha': '2026-01-10',
+        'cliente': cliente,
+        'numero_liquidacion': f'LIQ-{numero}',
+        'numero_despacho': f'DES-{numero}',
+        'clase': Liquidacion.ClaseChoices.IMPORTACION,
+        'numero_factura_comercial': f'FAC-{numero}',
+        'partida_arancelaria': '1234.56',
+        'ad_valorem': '10%',
+        'valor_imponible': '1000.00',
+        'equivalente_gs': '7000000',
+        'tipo_cambio_despacho': '7000',
+        'tipo_cambio_factura': '7100',
+        'proveedor': proveedor,
+        **campos,
+    }
+
+
+def crear_liquidacion(cliente, proveedor, numero, monto=None, **campos):
+    """Creates a Liquidacion and, given `monto`, one 'Honorarios' item"""
+    liquidacion = Liquidacion.objects.create(
+        **campos_liquidacion(cliente, proveedor, numero, **campos)
+    )
+    if monto is not None:
+        LiquidacionItem.objects.create(liquidacion=liquidacion, item='Honorarios', monto=monto)
+    return liquidacion
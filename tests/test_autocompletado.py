@@ -0,0 +1,125 @@
+from django.core.cache import caches
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones import autocompletar
+from liquidaciones.models import Procedencia, Proveedor
+from sgb import autocompletar as motor
+from sgb.cache import invalidar
+
+
+class IndiceTestCase(TestCase):
+    """Tests for the in-memory autocomplete index"""
+
+    def test_normalizar(self):
+        self.assertEqual(motor.normalizar('José MARÍA Núñez'), 'jose maria nunez')
+
+    def test_substrings_of_every_word_in_order(self):
+        indice = motor.Indice({
+            1: 'maria garcia lopez', 2: 'pedro martinez', 3: 'juan perez', 4: 'ana lopez',
+        }, 1)
+        self.assertEqual(indice.buscar('ar', 10), [1, 2])
+        self.assertEqual(indice.buscar('López MAR', 10), [1])
+        self.assertEqual(indice.buscar('lopez', 1), [1])
+        self.assertEqual(indice.buscar('xyz', 10), [])
+
+    def test_changes_after_compiling(self):
+        indice = motor.Indice({1: 'juan perez', 2: 'juana diaz'}, 1)
+        indice.buscar('juan', 10)
+        nuevo = indice.con(3, 'juan gomez', 2).con(1, 'pedro perez', 3).con(2, None, 4)
+        self.assertEqual(nuevo.version, 4)
+        self.assertEqual(nuevo.buscar('juan', 10), [3])
+        self.assertEqual(nuevo.buscar('perez', 10), [1])
+        # The original index is not modified
+        self.assertEqual(indice.buscar('juan', 10), [1, 2])
+
+    def test_dense_and_rare_combinations(self):
+        textos = {pk: f'cliente {pk} {"par" if pk % 2 else "impar"}' for pk in range(3000)}
+        indice = motor.Indice(textos, 1)
+        self.assertEqual(indice.buscar('cliente impar', 3), [0, 2, 4])
+        self.assertEqual(indice.buscar('2999 par cliente', 10), [2999])
+
+
+@override_settings(CACHE_UN_PROCESO=True)
+class AutocompletadoTestCase(TestCase):
+    """Tests for the cached autocomplete endpoints"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        for autocompletado in (autocompletar.CLIENTES, autocompletar.PROVEEDORES):
+            autocompletado._indice = None
+        self.jose = Cliente.objects.create(nombre='José María Fernández', ruc='1')
+        Cliente.objects.create(nombre='Juan Pérez', ruc='2')
+
+    def buscar(self, texto, nombre='cliente_autocomplete'):
+        response = self.client.get(reverse(nombre), {'q': texto})
+        return [resultado['text'] for resultado in response.json()['results']]
+
+    def test_accent_insensitive(self):
+        self.assertEqual(self.buscar('jose'), ['José María Fernández'])
+        self.assertEqual(self.buscar('FERNÁNDEZ maria'), ['José María Fernández'])
+        self.assertEqual(self.buscar('j'), [])
+
+    def test_index_and_result_cache(self):
+        with self.assertNumQueries(2):
+            # Loads the index, then reads the matching rows
+            self.buscar('pérez')
+        with self.assertNumQueries(1):
+            self.buscar('juan')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buscar('juan'), ['Juan Pérez'])
+
+    def test_signals_update_the_index(self):
+        self.buscar('juan')
+        self.jose.nombre = 'Juana Gómez'
+        self.jose.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buscar('juan'), ['Juan Pérez', 'Juana Gómez'])
+        self.jose.delete()
+        self.assertEqual(self.buscar('juan'), ['Juan Pérez'])
+
+    def test_other_processes_changes_reload_the_index(self):
+        self.buscar('juan')
+        Cliente.objects.bulk_create([Cliente(nombre='Juan Benítez', ruc='3')])
+        self.assertEqual(self.buscar('juan'), ['Juan Pérez'])
+        invalidar('autocompletar', 'cliente')
+        with self.assertNumQueries(2):
+            self.assertEqual(self.buscar('juan'), ['Juan Pérez', 'Juan Benítez'])
+
+    def test_rolled_back_rows_are_not_returned(self):
+        self.buscar('juan')
+        with transaction.atomic():
+            Cliente.objects.create(nombre='Juan Benítez', ruc='3')
+            transaction.set_rollback(True)
+        self.assertEqual(self.buscar('juan'), ['Juan Pérez'])
+
+    def test_database_fallback_while_loading(self):
+        with autocompletar.CLIENTES._bloqueo:
+            self.assertEqual(self.buscar('juan'), ['Juan Pérez'])
+        self.assertIsNone(autocompletar.CLIENTES._indice)
+
+    @override_settings(CACHE_UN_PROCESO=False)
+    def test_database_search_with_per_process_versions(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buscar('juan'), ['Juan Pérez'])
+        self.assertIsNone(autocompletar.CLIENTES._indice)
+        # A row another process added without a version bump seen here
+        Cliente.objects.bulk_create([Cliente(nombre='Juan Benítez', ruc='3')])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buscar('juan'), ['Juan Pérez', 'Juan Benítez'])
+
+    def test_procedencia_changes_reach_proveedores(self):
+        procedencia = Procedencia.objects.create(nombre='São Paulo')
+        Proveedor.objects.create(nombre='Proveedora Ltda', procedencia=procedencia)
+        self.assertEqual(
+            self.buscar('sao', 'proveedor_autocomplete'), ['Proveedora Ltda (São Paulo)']
+        )
+        procedencia.nombre = 'Asunción'
+        procedencia.save()
+        self.assertEqual(self.buscar('sao', 'proveedor_autocomplete'), [])
+        self.assertEqual(
+            self.buscar('asuncion', 'proveedor_autocomplete'), ['Proveedora Ltda (Asunción)']
+        )
@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import Banco, Pago, Procedencia, Proveedor, Liquidacion
+from sgb.search import CrearIndiceNormalizado, buscar, consulta_prefijos
+from tests import fabricas
+
+
+class BusquedaTestCase(TestCase):
+    """Tests for the shared search used by list views and autocompletes"""
+
+    def setUp(self):
+        self.client = Client()
+        self.cliente1 = Cliente.objects.create(nombre='Juan Pérez', ruc='80012345-6')
+        self.cliente2 = Cliente.objects.create(nombre='Comercial del Este', ruc='80099999-1')
+        procedencia = Procedencia.objects.create(nombre='Brasil')
+        self.proveedor = Proveedor.objects.create(nombre='Importadora Sur', procedencia=procedencia)
+        self.banco = Banco.objects.create(nombre='Banco Itaú', titular='SGB', numero_cuenta='123')
+        self.liquidacion = fabricas.crear_liquidacion(
+            self.cliente1, self.proveedor, '777',
+            numero_despacho='DES-2026-001', numero_factura_comercial='FAC-001',
+        )
+        self.pago = Pago.objects.create(
+            liquidacion=self.liquidacion, banco=self.banco, fecha='2026-01-15',
+            monto=Decimal('500000'), referencia='TRF-9911'
+        )
+
+    def test_buscar_matches_any_field(self):
+        clientes = buscar(Cliente.objects.order_by('nombre'), '99999', ['nombre', 'ruc'])
+        self.assertEqual(list(clientes), [self.cliente2])
+
+    def test_buscar_follows_relations(self):
+        pagos = buscar(Pago.objects.all(), 'juan', ['referencia', 'liquidacion__cliente__nombre'])
+        self.assertEqual(list(pagos), [self.pago])
+
+    def test_buscar_keeps_original_ordering(self):
+        clientes = buscar(Cliente.objects.order_by('-nombre'), '800', ['ruc'])
+        self.assertEqual(list(clientes), [self.cliente1, self.cliente2])
+
+    def test_list_views_search(self):
+        casos = [
+            (reverse('clientes:cliente_list'), '80012345', self.cliente1),
+            (reverse('liquidacion_list'), 'LIQ-777', self.liquidacion),
+            (reverse('pago_list'), 'TRF-99', self.pago),
+            (reverse('proveedor_list'), 'sur', self.proveedor),
+            (reverse('banco_list'), 'itaú', self.banco),
+        ]
+        for url, texto, esperado in casos:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'search': texto})
+                self.assertEqual(list(response.context['page_obj']), [esperado])
+
+    def test_consulta_prefijos(self):
+        self.assertEqual(consulta_prefijos('DES-20'), "'des':* & '20':*")
+        self.assertIsNone(consulta_prefijos(' & '))
+
+    def test_liquidacion_buscar_covers_document_fields(self):
+        """Liquidaciones are found by cliente RUC and proveedor name"""
+        for texto in ['80012345', 'importadora', 'FAC-001', 'des-2026']:
+            with self.subTest(texto=texto):
+                self.assertEqual(
+                    list(Liquidacion.objects.buscar(texto)), [self.liquidacion]
+                )
+
+
+class BusquedaNormalizadaTestCase(TestCase):
+    """Tests for the accent- and case-insensitive search"""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='80012345-6')
+        self.banco = Banco.objects.create(nombre='Banco Itaú', titular='SGB', numero_cuenta='1')
+
+    def test_accents_and_case_are_ignored(self):
+        for texto in ['perez', 'PÉREZ', 'pérez', 'Juan Perez']:
+            with self.subTest(texto=texto):
+                self.assertEqual(
+                    list(buscar(Cliente.objects.all(), texto, ['nombre'])), [self.cliente]
+                )
+
+    def test_list_views_ignore_accents(self):
+        response = Client().get(reverse('banco_list'), {'search': 'ITAU'})
+        self.assertEqual(list(response.context['page_obj']), [self.banco])
+        response = Client().get(reverse('clientes:cliente_list'), {'search': 'perez'})
+        self.assertEqual(list(response.context['page_obj']), [self.cliente])
+
+    def test_postgresql_expression_matches_the_indexes(self):
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        connection = DatabaseWrapper({
+            'ENGINE': 'django.db.backends.postgresql', 'NAME': 'sgb', 'USER': '',
+            'PASSWORD': '', 'HOST': '', 'PORT': '', 'OPTIONS': {}, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False,
+            'TIME_ZONE': None, 'TEST': {},
+        })
+        consulta = buscar(Cliente.objects.all(), 'Pérez', ['nombre']).query
+        sql, params = consulta.get_compiler(connection=connection).as_sql()
+        indice = CrearIndiceNormalizado('cliente', 'nombre', 'x').expresion(
+            '"clientes_cliente"."nombre"'
+        )
+        self.assertIn(indice.split(' gin_trgm_ops')[0][1:-1] + '::text LIKE', sql)
+        self.assertIn('%perez%', params)
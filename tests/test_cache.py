@@ -0,0 +1,88 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from clientes.models import Cliente
+from liquidaciones.models import PlanillaGastos, PlanillaGastosItem
+from sgb import settings as sgb_settings
+from sgb.cache import clave_versionada, compartida
+
+
+class CacheSettingsTestCase(SimpleTestCase):
+    """Tests for the env-configured CACHES"""
+
+    def test_named_caches(self):
+        self.assertEqual(
+            set(sgb_settings.CACHES), {'default', 'pdf', 'search', 'reports'}
+        )
+
+    def test_backends_from_env(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            entorno = {'CACHE_BACKEND': 'file', 'CACHE_LOCATION': directorio}
+            with mock.patch.dict(os.environ, entorno):
+                configuracion = sgb_settings._cache('pdf', 60)
+            self.assertEqual(
+                configuracion['BACKEND'],
+                'django.core.cache.backends.filebased.FileBasedCache',
+            )
+            self.assertEqual(configuracion['LOCATION'], os.path.join(directorio, 'pdf'))
+
+        entorno = {'CACHE_BACKEND': 'file', 'CACHE_SEARCH_BACKEND': 'redis'}
+        with mock.patch.dict(os.environ, entorno):
+            configuracion = sgb_settings._cache('search', 60)
+        self.assertEqual(configuracion['LOCATION'], 'redis://127.0.0.1:6379/0')
+
+        with mock.patch.dict(os.environ, {'CACHE_BACKEND': 'memcached'}):
+            with self.assertRaises(ImproperlyConfigured):
+                sgb_settings._cache('default', 60)
+
+
+    def test_counter_caches_must_be_shared_without_debug(self):
+        redis = {'BACKEND': sgb_settings.CACHE_BACKENDS['redis']}
+        sgb_settings._contadores_compartidos({'default': redis, 'reports': redis})
+        for backend in ('locmem', 'file'):
+            with self.subTest(backend=backend):
+                configuracion = {'BACKEND': sgb_settings.CACHE_BACKENDS[backend]}
+                with self.assertRaisesMessage(ImproperlyConfigured, "'reports'"):
+                    sgb_settings._contadores_compartidos(
+                        {'default': redis, 'reports': configuracion}
+                    )
+
+    def test_locmem_versions_are_per_process(self):
+        self.assertFalse(compartida())
+        with override_settings(CACHE_UN_PROCESO=True):
+            self.assertTrue(compartida())
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo = {'BACKEND': sgb_settings.CACHE_BACKENDS['file'], 'LOCATION': directorio}
+            with override_settings(CACHES={**sgb_settings.CACHES, 'default': archivo}):
+                self.assertTrue(compartida())
+
+
+class ClaveVersionadaTestCase(TestCase):
+    """Tests for versioned keys invalidated by model signals"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_item_changes_bump_the_version(self):
+        planilla = PlanillaGastos.objects.create(fecha='2026-01-31', numero_planilla='PG-1')
+        clave = clave_versionada('planilla_gastos', planilla.pk, 'resumen')
+        self.assertTrue(clave.endswith(':resumen'))
+        caches['reports'].set(clave, 'viejo')
+        self.assertEqual(clave_versionada('planilla_gastos', planilla.pk, 'resumen'), clave)
+
+        PlanillaGastosItem.objects.create(planilla_gastos=planilla, descripcion='Flete', monto=1)
+        nueva = clave_versionada('planilla_gastos', planilla.pk, 'resumen')
+        self.assertNotEqual(nueva, clave)
+        self.assertIsNone(caches['reports'].get(nueva))
+
+    def test_related_models_bump_their_own_version(self):
+        cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='1')
+        clave = clave_versionada('cliente', cliente.pk)
+        cliente.save()
+        self.assertNotEqual(clave_versionada('cliente', cliente.pk), clave)
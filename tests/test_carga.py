@@ -0,0 +1,136 @@
+import asyncio
+from io import StringIO
+import json
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from liquidaciones import sembrado
+from liquidaciones.models import Liquidacion, LiquidacionItem, Pago
+from sgb import carga
+
+
+class ClienteHTTPTestCase(SimpleTestCase):
+    """Tests for the minimal asyncio HTTP client of the load generator"""
+
+    def pedir(self, respuestas, pedidos):
+        """Serves `respuestas` in order over one connection per accept"""
+        recibidas = []
+
+        async def atender(lector, escritor):
+            while respuestas:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                cabeceras = []
+                while (cabecera := await lector.readline()) != b'\r\n':
+                    cabeceras.append(cabecera.decode().strip())
+                recibidas.append((linea.decode().strip(), cabeceras))
+                respuesta, cerrar = respuestas.pop(0)
+                escritor.write(respuesta)
+                await escritor.drain()
+                if cerrar:
+                    break
+            escritor.close()
+
+        async def principal():
+            servidor = await asyncio.start_server(atender, '127.0.0.1', 0)
+            puerto = servidor.sockets[0].getsockname()[1]
+            http = carga.ClienteHTTP(f'http://127.0.0.1:{puerto}', tiempo_maximo=5)
+            try:
+                return [await http.pedir(*pedido) for pedido in pedidos], http.cookies
+            finally:
+                await http.cerrar()
+                servidor.close()
+                await servidor.wait_closed()
+
+        resultado = asyncio.run(principal())
+        return (*resultado, recibidas)
+
+    def test_chunked_cookies_and_reconnection(self):
+        respuestas = [
+            (b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n'
+             b'Set-Cookie: csrftoken=abc; Path=/\r\n\r\n'
+             b'4\r\n%PDF\r\n3\r\n-1.\r\n0\r\n\r\n', False),
+            (b'HTTP/1.1 302 Found\r\nLocation: /\r\nContent-Length: 0\r\n'
+             b'Set-Cookie: messages=""; Max-Age=0\r\nConnection: close\r\n\r\n', True),
+            (b'HTTP/1.0 200 OK\r\n\r\nhasta el cierre', True),
+        ]
+        (primera, segunda, tercera), cookies, recibidas = self.pedir(
+            respuestas,
+            [('GET', '/pdf/'), ('POST', '/crear/', {'item': 'Ñandutí'}), ('GET', '/')],
+        )
+        self.assertEqual(primera.cuerpo, b'%PDF-1.')
+        self.assertEqual(segunda.estado, 302)
+        self.assertEqual(tercera.cuerpo, b'hasta el cierre')
+        self.assertEqual(cookies, {'csrftoken': 'abc'})
+        self.assertIn('Cookie: csrftoken=abc', recibidas[1][1])
+        self.assertIn('Content-Type: application/x-www-form-urlencoded', recibidas[1][1])
+
+    def test_percentiles_and_error_rate(self):
+        resultados = carga.Resultados()
+        for milisegundos in range(1, 101):
+            resultados.registrar('estado_cuenta', milisegundos / 1000, 200)
+        resultados.registrar('registrar_pago', 0.2, 200, 'estado 200')
+        resultados.registrar('registrar_pago', 0.1, 302)
+        resumen = resultados.resumen(duracion=10)
+
+        estado_cuenta = resumen['pasos']['estado_cuenta']
+        self.assertEqual(estado_cuenta['p50_ms'], 50.5)
+        self.assertEqual(estado_cuenta['max_ms'], 100)
+        self.assertEqual(estado_cuenta['por_segundo'], 10)
+        pago = resumen['pasos']['registrar_pago']
+        self.assertEqual(pago['tasa_error'], 0.5)
+        self.assertEqual(pago['detalle_errores'], {'estado 200': 1})
+        self.assertEqual(resumen['pasos']['descargar_pdf']['peticiones'], 0)
+        self.assertEqual(resumen['errores'], 1)
+
+
+class PruebaCargaTestCase(LiveServerTestCase):
+    """Tests for the scripted journeys against a live server"""
+
+    # Keeps the monedas of the data migrations across the table flushes
+    serialized_rollback = True
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        sembrado.sembrar(sembrado.volumenes(20))
+
+    def test_journeys_go_through_every_step(self):
+        salida = StringIO()
+        call_command(
+            'prueba_carga', url=self.live_server_url, usuarios=1, duracion=0.5, json=True,
+            stdout=salida,
+        )
+        resultado = json.loads(salida.getvalue())
+
+        self.assertGreaterEqual(resultado['recorridos'], 1)
+        self.assertEqual(resultado['errores'], 0, resultado['pasos'])
+        for paso in carga.PASOS:
+            with self.subTest(paso=paso):
+                self.assertGreaterEqual(resultado['pasos'][paso]['peticiones'], 1)
+                self.assertIsNotNone(resultado['pasos'][paso]['p95_ms'])
+        # Seeded liquidaciones are numbered LIQ-; each journey creates one C...
+        creadas = Liquidacion.objects.filter(numero_liquidacion__startswith='C')
+        self.assertEqual(creadas.count(), resultado['recorridos'])
+        self.assertEqual(
+            LiquidacionItem.objects.filter(liquidacion__in=creadas).count(),
+            carga.ITEMS_POR_LIQUIDACION * resultado['recorridos'],
+        )
+        self.assertEqual(
+            Pago.objects.filter(liquidacion__in=creadas).count(), resultado['recorridos']
+        )
+
+    def test_failed_step_ends_the_journey(self):
+        datos = carga.preparar()
+        datos['bancos'] = [0]
+        resultado = asyncio.run(
+            carga.ejecutar(self.live_server_url, datos, usuarios=1, duracion=0.3)
+        )
+        pago = resultado['pasos']['registrar_pago']
+        self.assertEqual(pago['tasa_error'], 1)
+        self.assertEqual(set(pago['detalle_errores']), {'estado 200'})
+        self.assertEqual(resultado['pasos']['descargar_pdf']['peticiones'], 0)
+        self.assertEqual(resultado['recorridos'], 0)
@@ -0,0 +1,99 @@
+import json
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase
+
+from sgb import settings as sgb_settings
+from sgb.db.postgresql_pool import base as pool_base
+
+
+class DatabaseSettingsTestCase(SimpleTestCase):
+    """Tests for the env-configured database connections"""
+
+    def test_persistent_connections_by_default(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            database = sgb_settings._database()
+        self.assertEqual(database['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(database['CONN_MAX_AGE'], 60)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('OPTIONS', database)
+
+    def test_env_overrides(self):
+        entorno = {'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': 'false'}
+        with mock.patch.dict(os.environ, entorno):
+            database = sgb_settings._database()
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertFalse(database['CONN_HEALTH_CHECKS'])
+
+    def test_pool(self):
+        entorno = {'DB_POOL': '1', 'DB_POOL_MAX_SIZE': '20', 'DB_CONN_MAX_AGE': '600'}
+        with mock.patch.dict(os.environ, entorno):
+            database = sgb_settings._database()
+        self.assertEqual(database['ENGINE'], 'sgb.db.postgresql_pool')
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(
+            database['OPTIONS']['pool'], {'min_size': 1, 'max_size': 20, 'check': True}
+        )
+
+
+class PoolBackendTestCase(SimpleTestCase):
+    """Tests for the psycopg2 pool backend, with the pool itself mocked"""
+
+    def setUp(self):
+        pool_base._POOLS.clear()
+        self.addCleanup(pool_base._POOLS.clear)
+        parche = mock.patch.object(pool_base.psycopg2_pool, 'ThreadedConnectionPool')
+        self.ThreadedConnectionPool = parche.start()
+        self.addCleanup(parche.stop)
+        self.pool = self.ThreadedConnectionPool.return_value
+
+    def wrapper(self, **pool):
+        return pool_base.DatabaseWrapper({
+            'ENGINE': 'sgb.db.postgresql_pool', 'NAME': 'sgb', 'USER': 'sgb',
+            'PASSWORD': '', 'HOST': 'db', 'PORT': '5432', 'OPTIONS': {'pool': pool},
+            'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True,
+            'ATOMIC_REQUESTS': False, 'TIME_ZONE': None, 'TEST': {},
+        })
+
+    def test_connections_come_from_one_pool_per_process(self):
+        wrapper = self.wrapper(min_size=2, max_size=5)
+        params = wrapper.get_connection_params()
+        self.assertNotIn('pool', params)
+
+        conexion = wrapper.Database.connect(**params)
+        self.assertIs(conexion, self.pool.getconn.return_value)
+        self.ThreadedConnectionPool.assert_called_once_with(2, 5, **params)
+
+        self.wrapper().Database.connect(**params)
+        self.ThreadedConnectionPool.assert_called_once()
+
+    def test_close_returns_the_connection(self):
+        wrapper = self.wrapper(check=False)
+        wrapper.connection = wrapper.Database.connect(**wrapper.get_connection_params())
+        wrapper.connection.closed = 0
+        wrapper._close()
+        self.pool.putconn.assert_called_once_with(wrapper.connection, close=False)
+
+    def test_broken_connections_are_discarded(self):
+        rota, sana = mock.Mock(closed=1), mock.Mock(closed=0)
+        self.pool.getconn.side_effect = [rota, sana]
+        wrapper = self.wrapper(check=True)
+        self.assertIs(wrapper.Database.connect(**wrapper.get_connection_params()), sana)
+        self.pool.putconn.assert_called_once_with(rota, close=True)
+
+    def test_psycopg2_attributes_are_kept(self):
+        self.assertIs(self.wrapper().Database.Error, pool_base.psycopg2.Error)
+
+
+class BenchmarkConexionesTestCase(TransactionTestCase):
+    """Tests for the connection benchmark command"""
+
+    def test_reports_percentiles(self):
+        out = StringIO()
+        call_command('benchmark_conexiones', '--peticiones', '5', '--json', stdout=out)
+        resultado = json.loads(out.getvalue())['actual']
+        self.assertEqual(resultado['peticiones'], 5)
+        self.assertLessEqual(resultado['p50'], resultado['p99'])
@@ -0,0 +1,314 @@
+from decimal import Decimal
+import logging
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from clientes.models import Cliente
+from clientes.urls import urlpatterns as urls_clientes
+from items.models import Item
+from items.urls import urlpatterns as urls_items
+from liquidaciones.models import (
+    Banco, Liquidacion, LiquidacionItem, Moneda, Pago, PlanillaGastos,
+    PlanillaGastosItem, Procedencia, Proveedor, TrabajoPdf,
+)
+from liquidaciones.urls import urlpatterns as urls_liquidaciones
+from sgb import urls
+from sgb.consultas import ConsultasExcedidas, assert_max_queries, medir
+from tests import fabricas
+
+# items.urls is not mounted in sgb.urls; it is checked under /items/
+urlpatterns = urls.urlpatterns + [path('items/', include('items.urls'))]
+
+
+def sembrar(n):
+    """n clientes with liquidaciones, items, pagos and planillas"""
+    usd = Moneda.objects.get(codigo='USD')
+    procedencia = Procedencia.objects.create(nombre=f'Procedencia {n}')
+    banco = Banco.objects.create(nombre=f'Banco {n}', titular='SGB', numero_cuenta=str(n))
+    planilla = PlanillaGastos.objects.create(fecha='2026-01-05', numero_planilla=f'PG-{n}')
+    PlanillaGastosItem.objects.bulk_create(
+        PlanillaGastosItem(planilla_gastos=planilla, descripcion=f'Gasto {i}', monto=100)
+        for i in range(4)
+    )
+    Item.objects.bulk_create(Item(descripcion=f'Concepto {n}-{i}') for i in range(5))
+    for c in range(n):
+        cliente = Cliente.objects.create(nombre=f'Cliente {n}-{c}', ruc=f'{n}{c:04d}')
+        proveedor = Proveedor.objects.create(nombre=f'Proveedor {n}-{c}', procedencia=procedencia)
+        for i in range(3):
+            liquidacion = fabricas.crear_liquidacion(
+                cliente, proveedor, f'{n}-{c}-{i}', fecha=f'2026-0{i + 1}-10',
+                moneda_valor_imponible=usd, planilla_gastos=planilla,
+            )
+            for concepto in ('Honorarios', 'Gastos', 'Tasas'):
+                LiquidacionItem.objects.create(
+                    liquidacion=liquidacion, item=concepto,
+                    monto=Decimal('1000'), iva=Decimal('100'),
+                )
+            Pago.objects.create(
+                liquidacion=liquidacion, banco=banco, fecha=f'2026-0{i + 1}-20',
+                monto=Decimal('500'), referencia=f'REF-{n}-{c}-{i}',
+            )
+    liquidacion = Liquidacion.objects.filter(cliente__nombre__startswith=f'Cliente {n}-').first()
+    TrabajoPdf.objects.create(
+        liquidacion=liquidacion, formato=TrabajoPdf.FormatoChoices.PDF, total=1,
+        estado=TrabajoPdf.EstadoChoices.TERMINADO, nombre_archivo='liquidacion.pdf',
+        contenido=b'%PDF-1.4',
+    )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PresupuestoRutasTestCase(TestCase):
+    """
+    Query counts of every URL in liquidaciones.urls, clientes.urls and
+    items.urls with seeded data. Each route stays within its budget, and
+    the count does not change when the data grows (no per-row queries).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(8)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def objetos(self):
+        liquidacion = Liquidacion.objects.order_by('pk').first()
+        return {
+            'liquidacion': liquidacion.pk,
+            'pago': Pago.objects.order_by('pk').first().pk,
+            'banco': Banco.objects.order_by('pk').first().pk,
+            'proveedor': liquidacion.proveedor_id,
+            'procedencia': Procedencia.objects.order_by('pk').first().pk,
+            'planilla': PlanillaGastos.objects.order_by('pk').first().pk,
+            'trabajo': TrabajoPdf.objects.order_by('pk').first().pk,
+            'cliente': liquidacion.cliente_id,
+            'item': Item.objects.order_by('pk').first().pk,
+        }
+
+    def peticiones(self):
+        """(URL name, method, path) of the requests to check, by route"""
+        o = self.objetos()
+        rutas = {
+            'liquidacion_list': [reverse('liquidacion_list'),
+                                 reverse('liquidacion_list') + '?search=Cliente&orden=-total'],
+            'liquidacion_export': [reverse('liquidacion_export') + '?formato=csv'],
+            'liquidacion_create': [reverse('liquidacion_create')],
+            'liquidacion_detail': [reverse('liquidacion_detail', args=[o['liquidacion']])],
+            'liquidacion_edit': [reverse('liquidacion_edit', args=[o['liquidacion']])],
+            'liquidacion_delete': [reverse('liquidacion_delete', args=[o['liquidacion']])],
+            'liquidacion_pdf': [reverse('liquidacion_pdf', args=[o['liquidacion']])],
+            'liquidacion_pdf_lote': [reverse('liquidacion_pdf_lote') + f'?cliente={o["cliente"]}'],
+            'trabajo_pdf_encolar': [('POST', reverse('trabajo_pdf_encolar'),
+                                     {'liquidacion': o['liquidacion']})],
+            'trabajo_pdf_estado': [reverse('trabajo_pdf_estado', args=[o['trabajo']])],
+            'trabajo_pdf_descargar': [reverse('trabajo_pdf_descargar', args=[o['trabajo']])],
+            'pago_list': [reverse('pago_list')],
+            'pago_export': [reverse('pago_export') + '?formato=csv'],
+            'pago_create': [reverse('pago_create')],
+            'pago_detail': [reverse('pago_detail', args=[o['pago']])],
+            'pago_edit': [reverse('pago_edit', args=[o['pago']])],
+            'pago_delete': [reverse('pago_delete', args=[o['pago']])],
+            'banco_list': [reverse('banco_list')],
+            'banco_create': [reverse('banco_create')],
+            'banco_detail': [reverse('banco_detail', args=[o['banco']])],
+            'banco_edit': [reverse('banco_edit', args=[o['banco']])],
+            'banco_delete': [reverse('banco_delete', args=[o['banco']])],
+            'proveedor_list': [reverse('proveedor_list')],
+            'proveedor_create': [reverse('proveedor_create')],
+            'proveedor_detail': [reverse('proveedor_detail', args=[o['proveedor']])],
+            'proveedor_edit': [reverse('proveedor_edit', args=[o['proveedor']])],
+            'proveedor_delete': [reverse('proveedor_delete', args=[o['proveedor']])],
+            'procedencia_list': [reverse('procedencia_list')],
+            'procedencia_create': [reverse('procedencia_create')],
+            'procedencia_detail': [reverse('procedencia_detail', args=[o['procedencia']])],
+            'procedencia_edit': [reverse('procedencia_edit', args=[o['procedencia']])],
+            'procedencia_delete': [reverse('procedencia_delete', args=[o['procedencia']])],
+            'planilla_gastos_list': [reverse('planilla_gastos_list')],
+            'planilla_gastos_export': [reverse('planilla_gastos_export') + '?formato=csv'],
+            'planilla_gastos_create': [reverse('planilla_gastos_create')],
+            'planilla_gastos_detail': [reverse('planilla_gastos_detail', args=[o['planilla']])],
+            'planilla_gastos_edit': [reverse('planilla_gastos_edit', args=[o['planilla']])],
+            'planilla_gastos_delete': [reverse('planilla_gastos_delete', args=[o['planilla']])],
+            'cliente_autocomplete': [reverse('cliente_autocomplete') + '?q=cliente'],
+            'proveedor_autocomplete': [reverse('proveedor_autocomplete') + '?q=proveedor'],
+            'liquidacion_autocomplete': [reverse('liquidacion_autocomplete') + '?q=liq'],
+            'planilla_gastos_autocomplete': [reverse('planilla_gastos_autocomplete') + '?q=pg'],
+            'clientes:cliente_list': [reverse('clientes:cliente_list')],
+            'clientes:cliente_create': [reverse('clientes:cliente_create')],
+            'clientes:cliente_detail': [reverse('clientes:cliente_detail', args=[o['cliente']])],
+            'clientes:cliente_edit': [reverse('clientes:cliente_edit', args=[o['cliente']])],
+            'clientes:cliente_delete': [reverse('clientes:cliente_delete', args=[o['cliente']])],
+            'clientes:estado_cuenta': [reverse('clientes:estado_cuenta', args=[o['cliente']])],
+            'clientes:estado_cuenta_export': [
+                reverse('clientes:estado_cuenta_export', args=[o['cliente']]) + '?formato=csv'
+            ],
+            'item_list': [reverse('item_list')],
+            'item_create': [reverse('item_create')],
+            'item_detail': [reverse('item_detail', args=[o['item']])],
+            'item_edit': [reverse('item_edit', args=[o['item']])],
+            'item_delete': [reverse('item_delete', args=[o['item']])],
+        }
+        for nombre, pedidos in rutas.items():
+            for pedido in pedidos:
+                metodo, url, datos = pedido if isinstance(pedido, tuple) else ('GET', pedido, None)
+                yield nombre, metodo, url, datos
+
+    def consultas(self, metodo, url, datos):
+        cliente = self.client.post if metodo == 'POST' else self.client.get
+        with medir() as medicion:
+            response = cliente(url, datos)
+            if hasattr(response, 'streaming_content'):
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url)
+        return medicion.consultas
+
+    def test_every_route_has_a_budget(self):
+        nombres = {p.name for p in urls_liquidaciones + urls_items}
+        nombres |= {f'clientes:{p.name}' for p in urls_clientes}
+        self.assertEqual(nombres, set(PRESUPUESTOS))
+        self.assertEqual(nombres, {nombre for nombre, *_ in self.peticiones()})
+
+    def test_routes_within_budget(self):
+        for nombre, metodo, url, datos in self.peticiones():
+            with self.subTest(url=url):
+                with assert_max_queries(PRESUPUESTOS[nombre]):
+                    self.consultas(metodo, url, datos)
+
+    def test_query_counts_do_not_grow_with_the_data(self):
+        antes = [self.consultas(*pedido) for _, *pedido in self.peticiones()]
+        sembrar(20)
+        for cache in caches.all():
+            cache.clear()
+        despues = [self.consultas(*pedido) for _, *pedido in self.peticiones()]
+        for (nombre, _, url, _), n, m in zip(self.peticiones(), antes, despues):
+            with self.subTest(url=url):
+                self.assertEqual(n, m)
+
+    def test_pago_admin_changelist(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@sgb.com', 'x'))
+        url = reverse('admin:liquidaciones_pago_changelist')
+        antes = self.consultas('GET', url, None)
+        sembrar(20)
+        self.assertEqual(self.consultas('GET', url, None), antes)
+
+
+# Maximum queries per route with the data of sembrar(8)
+PRESUPUESTOS = {
+    'liquidacion_list': 2,
+    'liquidacion_export': 1,
+    'liquidacion_create': 7,
+    'liquidacion_detail': 2,
+    'liquidacion_edit': 10,
+    'liquidacion_delete': 2,
+    'liquidacion_pdf': 2,
+    'liquidacion_pdf_lote': 4,
+    'trabajo_pdf_encolar': 2,
+    'trabajo_pdf_estado': 1,
+    'trabajo_pdf_descargar': 1,
+    'pago_list': 1,
+    'pago_export': 1,
+    'pago_create': 1,
+    'pago_detail': 1,
+    'pago_edit': 2,
+    'pago_delete': 1,
+    'banco_list': 2,
+    'banco_create': 0,
+    'banco_detail': 1,
+    'banco_edit': 1,
+    'banco_delete': 1,
+    'proveedor_list': 2,
+    'proveedor_create': 1,
+    'proveedor_detail': 1,
+    'proveedor_edit': 2,
+    'proveedor_delete': 2,
+    'procedencia_list': 2,
+    'procedencia_create': 0,
+    'procedencia_detail': 1,
+    'procedencia_edit': 1,
+    'procedencia_delete': 1,
+    'planilla_gastos_list': 2,
+    'planilla_gastos_export': 1,
+    'planilla_gastos_create': 0,
+    'planilla_gastos_detail': 2,
+    'planilla_gastos_edit': 2,
+    'planilla_gastos_delete': 4,
+    'cliente_autocomplete': 2,
+    'proveedor_autocomplete': 2,
+    'liquidacion_autocomplete': 2,
+    'planilla_gastos_autocomplete': 2,
+    'clientes:cliente_list': 2,
+    'clientes:cliente_create': 0,
+    'clientes:cliente_detail': 1,
+    'clientes:cliente_edit': 1,
+    'clientes:cliente_delete': 1,
+    'clientes:estado_cuenta': 3,
+    'clientes:estado_cuenta_export': 3,
+    'item_list': 2,
+    'item_create': 0,
+    'item_detail': 1,
+    'item_edit': 1,
+    'item_delete': 1,
+}
+
+
+class AssertMaxQueriesTestCase(TestCase):
+    """Tests for the assert_max_queries helper"""
+
+    def test_context_manager(self):
+        with assert_max_queries(2) as medicion:
+            list(Cliente.objects.all())
+            list(Banco.objects.all())
+        self.assertEqual(medicion.consultas, 2)
+
+        with self.assertRaises(ConsultasExcedidas) as contexto:
+            with assert_max_queries(1):
+                list(Cliente.objects.all())
+                list(Banco.objects.all())
+        self.assertIn('2 consultas, máximo 1', str(contexto.exception))
+        self.assertIn('clientes_cliente', str(contexto.exception))
+
+    def test_decorator(self):
+        @assert_max_queries(0)
+        def consultar():
+            return Cliente.objects.count()
+
+        with self.assertRaises(AssertionError):
+            consultar()
+
+
+class PresupuestoConsultasMiddlewareTestCase(TestCase):
+    """Tests for the per-request query budget"""
+
+    def setUp(self):
+        sembrar(1)
+        self.url = reverse('liquidacion_detail', args=[Liquidacion.objects.first().pk])
+
+    def test_within_budget(self):
+        with self.settings(CONSULTAS_MAXIMO=10), self.assertNoLogs('sgb.consultas'):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_logs_when_exceeded(self):
+        with self.settings(CONSULTAS_MAXIMO=1), \
+                self.assertLogs('sgb.consultas', logging.WARNING) as registros:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        entrada, = registros.records
+        self.assertEqual(entrada.ruta, 'liquidacion_detail')
+        self.assertEqual(entrada.maximo, 1)
+        self.assertGreater(entrada.consultas, 1)
+
+    def test_route_budget_and_error_mode(self):
+        rutas = {'liquidacion_detail': 1}
+        with self.settings(CONSULTAS_MAXIMO=0, CONSULTAS_MAXIMO_RUTAS=rutas,
+                           CONSULTAS_EXCEDIDAS='error'):
+            with self.assertRaisesMessage(ConsultasExcedidas, 'GET liquidacion_detail'):
+                self.client.get(self.url)
+            self.assertEqual(self.client.get(reverse('liquidacion_list')).status_code, 200)
+
+    def test_disabled(self):
+        with self.settings(CONSULTAS_MAXIMO=0), \
+                self.assertNoLogs('sgb.consultas'):
+            self.client.get(self.url)
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import (
+    Procedencia, Proveedor, LiquidacionItem, PlanillaGastos, PlanillaGastosItem,
+)
+from sgb.cache import invalidar, version
+from tests import fabricas
+
+
+@override_settings(CACHE_UN_PROCESO=True)
+class DetalleCacheTestCase(TestCase):
+    """Tests for the cached liquidacion and planilla detail fragments"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        self.planilla = PlanillaGastos.objects.create(fecha='2026-01-31', numero_planilla='PG-1')
+        self.gasto = PlanillaGastosItem.objects.create(
+            planilla_gastos=self.planilla, descripcion='Flete', monto=Decimal('250000')
+        )
+        proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Brasil')
+        )
+        self.liquidacion = fabricas.crear_liquidacion(
+            self.cliente, proveedor, '001', planilla_gastos=self.planilla
+        )
+        self.item = LiquidacionItem.objects.create(
+            liquidacion=self.liquidacion, item='Honorarios', monto=Decimal('1000000')
+        )
+
+    def test_liquidacion_detail_queries(self):
+        url = reverse('liquidacion_detail', args=[self.liquidacion.pk])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, 'Honorarios')
+        self.assertContains(response, 'Brasil')
+        self.assertContains(response, 'PG-1')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).content, response.content)
+
+    def test_liquidacion_detail_invalidation(self):
+        url = reverse('liquidacion_detail', args=[self.liquidacion.pk])
+        self.client.get(url)
+
+        self.item.item = 'Despacho aduanero'
+        self.item.save()
+        self.assertContains(self.client.get(url), 'Despacho aduanero')
+
+        self.cliente.nombre = 'Juan Pérez e Hijos'
+        self.cliente.save()
+        self.assertContains(self.client.get(url), 'Juan Pérez e Hijos')
+
+        PlanillaGastosItem.objects.create(
+            planilla_gastos=self.planilla, descripcion='Seguro', monto=Decimal('50000')
+        )
+        self.assertContains(self.client.get(url), '300.000')
+
+    def test_planilla_detail(self):
+        url = reverse('planilla_gastos_detail', args=[self.planilla.pk])
+        with self.assertNumQueries(2):
+            self.assertContains(self.client.get(url), 'Flete')
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        self.gasto.delete()
+        self.assertContains(self.client.get(url), 'No hay gastos')
+
+    @override_settings(CACHE_UN_PROCESO=False)
+    def test_no_fragment_cache_with_per_process_versions(self):
+        url = reverse('liquidacion_detail', args=[self.liquidacion.pk])
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        # A change whose version bump another process would never see
+        LiquidacionItem.objects.filter(pk=self.item.pk).update(item='Despacho aduanero')
+        with self.assertNumQueries(2):
+            self.assertContains(self.client.get(url), 'Despacho aduanero')
+
+        url = reverse('planilla_gastos_detail', args=[self.planilla.pk])
+        self.client.get(url)
+        PlanillaGastosItem.objects.filter(pk=self.gasto.pk).update(descripcion='Seguro')
+        self.assertContains(self.client.get(url), 'Seguro')
+
+    def test_version_counter(self):
+        inicial = version('planilla_gastos', 999)
+        self.assertGreater(inicial, 1)
+        self.assertEqual(version('planilla_gastos', 999), inicial)
+        invalidar('planilla_gastos', 999)
+        self.assertEqual(version('planilla_gastos', 999), inicial + 1)
@@ -0,0 +1,76 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import Banco, Pago, Proveedor
+from sgb import estadisticas
+from tests import fabricas
+
+HOY = date(2026, 3, 20)
+
+
+@mock.patch('django.utils.timezone.localdate', return_value=HOY)
+class EstadisticasTestCase(TestCase):
+    """Tests for the cached dashboard statistics"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.usuario = User.objects.create_user('admin', password='x')
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        self.proveedor = Proveedor.objects.create(nombre='Proveedor S.A.')
+        self.banco = Banco.objects.create(nombre='Banco', titular='SGB', numero_cuenta='1')
+        self.febrero = self.crear_liquidacion('2026-02-10', Decimal('1000'))
+        self.marzo = self.crear_liquidacion('2026-03-05', Decimal('500'))
+        Pago.objects.create(
+            liquidacion=self.febrero, banco=self.banco, fecha='2026-03-15', monto=Decimal('800')
+        )
+
+    def crear_liquidacion(self, fecha, monto):
+        return fabricas.crear_liquidacion(
+            self.cliente, self.proveedor, fecha, monto, fecha=fecha
+        )
+
+    def test_single_query_then_cached(self, localdate):
+        with self.assertNumQueries(1):
+            stats = estadisticas.obtener()
+        self.assertEqual(stats['users'], 1)
+        self.assertEqual(stats['clientes'], 1)
+        self.assertEqual(stats['liquidaciones'], 2)
+        self.assertEqual(stats['pagos'], 1)
+        self.assertEqual(stats['liquidado_mes'], Decimal('500'))
+        self.assertEqual(stats['cobrado_mes'], Decimal('800'))
+        self.assertEqual(stats['saldo_pendiente'], Decimal('700'))
+        with self.assertNumQueries(0):
+            self.assertEqual(estadisticas.obtener(), stats)
+
+    def test_counters_follow_saves_and_deletes(self, localdate):
+        estadisticas.obtener()
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.create(nombre='María', ruc='2')
+            self.marzo.delete()
+        with self.assertNumQueries(1):
+            # Only the amounts are recomputed, the counts come from the counters
+            stats = estadisticas.obtener()
+        self.assertEqual(stats['clientes'], 2)
+        self.assertEqual(stats['liquidaciones'], 1)
+        self.assertEqual(stats['liquidado_mes'], Decimal('0'))
+        self.assertEqual(stats['saldo_pendiente'], Decimal('200'))
+        self.assertEqual(stats, estadisticas.calcular())
+
+    def test_rolled_back_changes_are_not_counted(self, localdate):
+        estadisticas.obtener()
+        Cliente.objects.create(nombre='María', ruc='2')
+        self.assertEqual(estadisticas.obtener()['clientes'], 1)
+
+    def test_dashboard(self, localdate):
+        self.client.force_login(self.usuario)
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, '500 Gs.')
+        self.assertContains(response, '700 Gs.')
@@ -0,0 +1,123 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from clientes import estado_cuenta
+from clientes.models import Cliente
+from liquidaciones.models import Banco, Pago, Procedencia, Proveedor
+from tests import fabricas
+
+
+class EstadoCuentaTestCase(TestCase):
+    """Tests for the SQL ledger behind the estado de cuenta"""
+
+    def setUp(self):
+        self.client = Client()
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        self.otro = Cliente.objects.create(nombre='Otro Cliente', ruc='87654321')
+        self.proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Brasil')
+        )
+        self.banco = Banco.objects.create(nombre='Banco Itaú', titular='SGB', numero_cuenta='1')
+        self.l2025 = self.crear_liquidacion(self.cliente, '2025-06-10', Decimal('1000'))
+        self.l2026a = self.crear_liquidacion(self.cliente, '2026-01-05', Decimal('2500.50'))
+        self.l2026b = self.crear_liquidacion(self.cliente, '2026-02-01', Decimal('300'))
+        self.crear_liquidacion(self.otro, '2026-01-05', Decimal('999'))
+        self.p2025 = self.crear_pago(self.l2025, '2025-07-01', Decimal('400'), 'TRF-1')
+        self.p2026a = self.crear_pago(self.l2026a, '2026-01-05', Decimal('2000'), '')
+        self.p2026b = self.crear_pago(self.l2026b, '2026-03-01', Decimal('300.25'), 'TRF-3')
+
+    def crear_liquidacion(self, cliente, fecha, monto):
+        return fabricas.crear_liquidacion(cliente, self.proveedor, fecha, monto, fecha=fecha)
+
+    def crear_pago(self, liquidacion, fecha, monto, referencia):
+        return Pago.objects.create(
+            liquidacion=liquidacion, banco=self.banco, fecha=fecha,
+            monto=monto, referencia=referencia
+        )
+
+    def test_running_balance_matches_python(self):
+        movimientos = list(estado_cuenta.movimientos(self.cliente.pk))
+        self.assertEqual(
+            [(m['tipo'], m['id']) for m in movimientos],
+            [
+                ('liquidacion', self.l2025.pk), ('pago', self.p2025.pk),
+                ('liquidacion', self.l2026a.pk), ('pago', self.p2026a.pk),
+                ('liquidacion', self.l2026b.pk), ('pago', self.p2026b.pk),
+            ],
+        )
+        saldo = Decimal('0')
+        for movimiento in movimientos:
+            saldo += movimiento['pagos'] - movimiento['liquidacion']
+            self.assertEqual(movimiento['saldo'], saldo)
+        self.assertEqual(saldo, Decimal('-1100.25'))
+
+    def test_row_columns(self):
+        liquidacion, pago = list(estado_cuenta.movimientos(self.cliente.pk))[2:4]
+        self.assertEqual(liquidacion['origen'], 'Brasil')
+        self.assertEqual(liquidacion['factura'], 'FAC-2026-01-05')
+        self.assertEqual(liquidacion['referencia'], '260105')
+        self.assertEqual(liquidacion['liquidacion'], Decimal('2500.50'))
+        self.assertEqual(pago['bco'], 'BAN')
+        self.assertEqual(pago['prof'], 'DES-2026-01-05')
+        self.assertEqual(pago['referencia'], '260105')
+        self.assertEqual(pago['pagos'], Decimal('2000.00'))
+
+    def test_resumen_opening_balance(self):
+        totales = estado_cuenta.resumen(self.cliente.pk, date(2026, 1, 1), date(2026, 12, 31))
+        self.assertEqual(totales, {
+            'saldo_inicial': Decimal('-600.00'),
+            'total_pagos': Decimal('2300.25'),
+            'total_liquidaciones': Decimal('2800.50'),
+            'total_saldo': Decimal('-1100.25'),
+        })
+
+    def test_period_rows_continue_from_opening_balance(self):
+        movimientos = list(estado_cuenta.movimientos(
+            self.cliente.pk, date(2026, 1, 1), date(2026, 1, 31),
+            saldo_inicial=Decimal('-600'),
+        ))
+        self.assertEqual([m['saldo'] for m in movimientos], [Decimal('-3100.50'), Decimal('-1100.50')])
+
+    def test_view_defaults_to_full_history(self):
+        url = reverse('clientes:estado_cuenta', args=[self.cliente.pk])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertIsNone(response.context['desde'])
+        self.assertEqual(response.context['total_saldo'], Decimal('-1100.25'))
+        contenido = b''.join(response.streaming_content).decode()
+        self.assertIn('todo el historial', contenido)
+        self.assertIn('FAC-2025-06-10', contenido)
+        self.assertIn('FAC-2026-02-01', contenido)
+
+    def test_view_streams_rows_in_blocks(self):
+        url = reverse('clientes:estado_cuenta', args=[self.cliente.pk])
+        with mock.patch('clientes.views.TAMANO_BLOQUE', 4):
+            contenido = b''.join(self.client.get(url).streaming_content).decode()
+        facturas = ['FAC-2025-06-10', 'FAC-2026-01-05', 'FAC-2026-02-01']
+        posiciones = [contenido.index(factura) for factura in facturas]
+        self.assertEqual(posiciones, sorted(posiciones))
+        self.assertLess(posiciones[-1], contenido.index('TOTALES'))
+        self.assertNotIn('<!-- movimientos -->', contenido)
+
+        otro = Cliente.objects.create(nombre='Sin Movimientos', ruc='1')
+        response = self.client.get(reverse('clientes:estado_cuenta', args=[otro.pk]))
+        self.assertContains(response, 'No se encontraron liquidaciones')
+
+    def test_view_date_range(self):
+        url = reverse('clientes:estado_cuenta', args=[self.cliente.pk])
+        response = self.client.get(url, {'desde': '2025-01-01', 'hasta': '2025-12-31'})
+        contenido = b''.join(response.streaming_content).decode()
+        self.assertIn('FAC-2025-06-10', contenido)
+        self.assertNotIn('FAC-2026-01-05', contenido)
+        self.assertIn('>Todo</a>', contenido)
+        self.assertEqual(response.context['total_saldo'], Decimal('-600.00'))
+        self.assertEqual(response.context['anio_siguiente'], 2026)
+
+        response = self.client.get(url, {'desde': '2025-13-45'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['desde'])
@@ -0,0 +1,106 @@
+import csv
+from decimal import Decimal
+from io import BytesIO, StringIO
+import zipfile
+from xml.etree import ElementTree
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import (
+    Banco, Pago, Procedencia, Proveedor, LiquidacionItem, PlanillaGastos, PlanillaGastosItem,
+)
+from tests import fabricas
+
+NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+class ExportarTestCase(TestCase):
+    """Tests for the streaming CSV/XLSX exports"""
+
+    def setUp(self):
+        self.client = Client()
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='80012345-6')
+        proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Brasil')
+        )
+        self.liquidacion = fabricas.crear_liquidacion(self.cliente, proveedor, '001')
+        LiquidacionItem.objects.create(
+            liquidacion=self.liquidacion, item='Honorarios',
+            monto=Decimal('1500000'), iva=Decimal('150000')
+        )
+        banco = Banco.objects.create(nombre='Banco Itaú', titular='SGB', numero_cuenta='1')
+        Pago.objects.create(
+            liquidacion=self.liquidacion, banco=banco, fecha='2026-01-20',
+            monto=Decimal('1000000'), referencia='TRF-1; "urgente"'
+        )
+        planilla = PlanillaGastos.objects.create(fecha='2026-01-05', numero_planilla='PG-1')
+        PlanillaGastosItem.objects.create(planilla_gastos=planilla, descripcion='Flete', monto=Decimal('250000'))
+
+    def leer_csv(self, response):
+        self.assertTrue(response.streaming)
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(StringIO(contenido), delimiter=';'))
+
+    def leer_xlsx(self, response):
+        self.assertTrue(response.streaming)
+        libro = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(libro.testzip())
+        hoja = ElementTree.fromstring(libro.read('xl/worksheets/sheet1.xml'))
+        filas = []
+        for fila in hoja.iterfind('.//x:row', NS):
+            filas.append([
+                ''.join(celda.itertext()) for celda in fila.iterfind('x:c', NS)
+            ])
+        return filas
+
+    def test_liquidaciones_csv(self):
+        response = self.client.get(reverse('liquidacion_export'), {'formato': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('liquidaciones.csv', response['Content-Disposition'])
+        filas = self.leer_csv(response)
+        self.assertEqual(filas[0][0], 'Fecha')
+        self.assertEqual(filas[1], [
+            '10/01/2026', 'LIQ-001', 'DES-001', 'Juan Pérez', '80012345-6', 'importacion',
+            'FAC-001', '1.500.000', '150.000', '0', '1.650.000',
+        ])
+
+    def test_list_filters_apply_to_export(self):
+        response = self.client.get(reverse('liquidacion_export'), {'monto_min': '2.000.000'})
+        self.assertEqual(len(self.leer_csv(response)), 1)
+        response = self.client.get(reverse('pago_export'), {'search': 'itaú'})
+        filas = self.leer_csv(response)
+        self.assertEqual(filas[1][3:], ['Banco Itaú', 'TRF-1; "urgente"', '', '1.000.000'])
+
+    def test_planillas_csv(self):
+        filas = self.leer_csv(self.client.get(reverse('planilla_gastos_export')))
+        self.assertEqual(filas[1], ['05/01/2026', 'PG-1', 'Flete', '250.000', '250.000'])
+
+    def test_estado_cuenta_csv(self):
+        url = reverse('clientes:estado_cuenta_export', args=[self.cliente.pk])
+        filas = self.leer_csv(self.client.get(url, {'desde': '2026-01-01', 'hasta': '2026-12-31'}))
+        self.assertEqual(filas[1][6:], ['Saldo anterior', '', '', '0'])
+        self.assertEqual(filas[2][9], '-1.650.000')
+        self.assertEqual(filas[3][7:], ['1.000.000', '', '-650.000'])
+        self.assertEqual(filas[-1][6:], ['Totales', '1.000.000', '1.650.000', '-650.000'])
+
+    def test_xlsx(self):
+        response = self.client.get(reverse('liquidacion_export'), {'formato': 'xlsx'})
+        self.assertEqual(
+            response['Content-Type'],
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+        filas = self.leer_xlsx(response)
+        self.assertEqual(filas[0][1], 'Nro. Liquidación')
+        # Dates are Excel serial numbers and amounts stay numeric
+        self.assertEqual(filas[1][0], '46032')
+        self.assertEqual(Decimal(filas[1][-1]), Decimal('1650000'))
+
+        url = reverse('clientes:estado_cuenta_export', args=[self.cliente.pk])
+        filas = self.leer_xlsx(self.client.get(url, {'formato': 'xlsx'}))
+        self.assertEqual(filas[-1][6], 'Totales')
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('pago_export'), {'formato': 'pdf'})
+        self.assertEqual(response.status_code, 404)
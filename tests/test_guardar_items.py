@@ -0,0 +1,169 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.forms import LiquidacionForm
+from liquidaciones.models import (
+    Liquidacion, LiquidacionItem, PlanillaGastos, PlanillaGastosItem, Procedencia, Proveedor,
+    SaldoMensual,
+)
+from tests import fabricas
+
+
+def datos_formset(prefijo, filas, iniciales=0):
+    datos = {
+        f'{prefijo}-TOTAL_FORMS': str(len(filas)),
+        f'{prefijo}-INITIAL_FORMS': str(iniciales),
+        f'{prefijo}-MIN_NUM_FORMS': '0',
+        f'{prefijo}-MAX_NUM_FORMS': '1000',
+    }
+    for i, fila in enumerate(filas):
+        datos.update({f'{prefijo}-{i}-{campo}': valor for campo, valor in fila.items()})
+    return datos
+
+
+class GuardarItemsLiquidacionTestCase(TestCase):
+    """Tests for the batched item writes of liquidacion_create/edit"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        self.proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Paraguay')
+        )
+        self.liquidacion = fabricas.crear_liquidacion(self.cliente, self.proveedor, '001')
+        self.items = [
+            LiquidacionItem.objects.create(
+                liquidacion=self.liquidacion, item=f'Item {i}', monto=Decimal('100')
+            )
+            for i in range(3)
+        ]
+
+    def datos(self, filas, iniciales=0, **cambios):
+        campos = LiquidacionForm._meta.exclude
+        datos = {
+            campo: valor
+            for campo, valor in model_to_dict(self.liquidacion, exclude=campos).items()
+            if campo != 'id' and valor is not None
+        }
+        datos.update(cambios)
+        datos.update(datos_formset('liquidacionitem_set', filas, iniciales))
+        return datos
+
+    def test_edit_creates_updates_and_deletes_items(self):
+        primero, segundo, tercero = self.items
+        filas = [
+            {'id': primero.pk, 'item': 'Item 0', 'monto': '250', 'iva': '25', 'retencion': '0'},
+            {'id': segundo.pk, 'item': 'Item 1', 'monto': '100', 'iva': '0', 'DELETE': 'on'},
+            {'id': tercero.pk, 'item': 'Item 2', 'monto': '100', 'iva': '0'},
+            {'item': 'Nuevo', 'monto': '40', 'iva': '4'},
+            {'item': 'Nuevo 2', 'monto': '60', 'iva': '0'},
+        ]
+        url = reverse('liquidacion_edit', args=[self.liquidacion.pk])
+        response = self.client.post(url, self.datos(filas, iniciales=3))
+        self.assertRedirects(response, reverse('liquidacion_detail', args=[self.liquidacion.pk]))
+
+        items = dict(self.liquidacion.liquidacionitem_set.values_list('item', 'monto'))
+        self.assertEqual(items, {
+            'Item 0': Decimal('250'), 'Item 2': Decimal('100'),
+            'Nuevo': Decimal('40'), 'Nuevo 2': Decimal('60'),
+        })
+        self.liquidacion.refresh_from_db()
+        self.assertEqual(self.liquidacion.total_subtotal, Decimal('479'))
+        saldo = SaldoMensual.objects.get(cliente=self.cliente)
+        self.assertEqual(saldo.total_liquidaciones, Decimal('479'))
+
+    def test_item_queries_do_not_grow_with_items(self):
+        """Writes take the same queries for 2 or 20 new items"""
+        url = reverse('liquidacion_edit', args=[self.liquidacion.pk])
+
+        def editar(cantidad):
+            # Validating the formset reads each existing item: keep them fixed
+            self.liquidacion.liquidacionitem_set.all().delete()
+            primero, segundo, tercero = [
+                LiquidacionItem.objects.create(liquidacion=self.liquidacion, item=f'Item {i}')
+                for i in range(3)
+            ]
+            filas = [
+                {'id': primero.pk, 'item': 'Item 0', 'monto': '5', 'iva': '0'},
+                {'id': segundo.pk, 'item': 'Item 1', 'monto': '5', 'iva': '0'},
+                {'id': tercero.pk, 'item': 'Item 2', 'monto': '0', 'iva': '0', 'DELETE': 'on'},
+            ]
+            filas += [{'item': f'Nuevo {i}', 'monto': '10', 'iva': '0'} for i in range(cantidad)]
+            with CaptureQueriesContext(connection) as consultas:
+                self.client.post(url, self.datos(filas, iniciales=3))
+            return len(consultas)
+
+        editar(1)
+        self.assertEqual(editar(2), editar(20))
+        self.liquidacion.refresh_from_db()
+        self.assertEqual(self.liquidacion.total_subtotal, Decimal('210'))
+
+    def test_error_rolls_back_the_whole_save(self):
+        filas = [{'item': 'Nuevo', 'monto': '40', 'iva': '0'}]
+        datos = self.datos(filas, numero_liquidacion='LIQ-CAMBIADA')
+        url = reverse('liquidacion_edit', args=[self.liquidacion.pk])
+        fallo = RuntimeError('fallo de base')
+        with mock.patch.object(LiquidacionItem.objects, 'bulk_create', side_effect=fallo):
+            response = self.client.post(url, datos)
+        self.assertEqual(response.status_code, 200)
+        self.liquidacion.refresh_from_db()
+        self.assertEqual(self.liquidacion.numero_liquidacion, 'LIQ-001')
+        self.assertEqual(self.liquidacion.liquidacionitem_set.count(), 3)
+
+    def test_create_saves_items_and_totals(self):
+        filas = [
+            {'item': 'Honorarios', 'monto': '1000', 'iva': '100'},
+            {'item': 'Gastos', 'monto': '500', 'iva': '50', 'retencion': '25'},
+        ]
+        datos = self.datos(filas, numero_liquidacion='LIQ-002', numero_despacho='DES-002')
+        response = self.client.post(reverse('liquidacion_create'), datos)
+        self.assertRedirects(response, reverse('liquidacion_list'))
+        liquidacion = Liquidacion.objects.get(numero_liquidacion='LIQ-002')
+        self.assertEqual(
+            dict(liquidacion.liquidacionitem_set.values_list('item', 'retencion')),
+            {'Honorarios': Decimal('0'), 'Gastos': Decimal('25')},
+        )
+        self.assertEqual(liquidacion.total_subtotal, Decimal('1625'))
+
+
+class GuardarItemsPlanillaTestCase(TestCase):
+    """Tests for the batched item writes of planilla_gastos_create/edit"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.planilla = PlanillaGastos.objects.create(fecha='2026-01-01', numero_planilla='PG-001')
+        self.items = [
+            PlanillaGastosItem.objects.create(
+                planilla_gastos=self.planilla, descripcion=f'Gasto {i}', monto=Decimal('100')
+            )
+            for i in range(2)
+        ]
+
+    def test_edit_creates_updates_and_deletes_items(self):
+        primero, segundo = self.items
+        datos = {'fecha': '2026-01-01', 'numero_planilla': 'PG-001'}
+        datos.update(datos_formset('planillagastositem_set', [
+            {'id': primero.pk, 'descripcion': 'Flete', 'monto': '300'},
+            {'id': segundo.pk, 'descripcion': 'Gasto 1', 'monto': '100', 'DELETE': 'on'},
+            {'descripcion': 'Estiba', 'monto': '50'},
+        ], iniciales=2))
+        url = reverse('planilla_gastos_edit', args=[self.planilla.pk])
+        response = self.client.post(url, datos)
+        self.assertRedirects(response, reverse('planilla_gastos_detail', args=[self.planilla.pk]))
+
+        self.assertEqual(
+            dict(self.planilla.planillagastositem_set.values_list('descripcion', 'monto')),
+            {'Flete': Decimal('300'), 'Estiba': Decimal('50')},
+        )
+        self.planilla.refresh_from_db()
+        self.assertEqual(self.planilla.total_gastos, Decimal('350'))
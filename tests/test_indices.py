@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+from decimal import Decimal
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import (
+    Banco, Moneda, Pago, Procedencia, Proveedor, Liquidacion, LiquidacionItem,
+)
+from tests import fabricas
+
+
+class IndicesTestCase(TestCase):
+    """The composite indexes exist in the database"""
+
+    def columnas_indexadas(self, tabla):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, tabla)
+        return [tuple(c['columns']) for c in constraints.values() if c['index']]
+
+    def test_composite_indexes(self):
+        esperados = {
+            'liquidaciones_liquidacion': [
+                ('cliente_id', 'fecha'), ('fecha', 'id'), ('total_subtotal', 'id'),
+            ],
+            'liquidaciones_pago': [('liquidacion_id', 'fecha'), ('fecha', 'id')],
+            'liquidaciones_planillagastos': [('fecha',)],
+            'liquidaciones_liquidacionitem': [('liquidacion_id',)],
+        }
+        for tabla, indices in esperados.items():
+            existentes = self.columnas_indexadas(tabla)
+            for columnas in indices:
+                with self.subTest(tabla=tabla, columnas=columnas):
+                    self.assertIn(columnas, existentes)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans require PostgreSQL')
+class PlanesSinSeqScanTestCase(TestCase):
+    """The hot views never sequentially scan the large tables"""
+
+    TABLAS_GRANDES = (
+        'liquidaciones_liquidacion', 'liquidaciones_pago', 'liquidaciones_liquidacionitem',
+    )
+    CLIENTES = 200
+    LIQUIDACIONES_POR_CLIENTE = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        moneda = Moneda.objects.get(codigo='USD')
+        proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Paraguay')
+        )
+        banco = Banco.objects.create(nombre='Banco', titular='SGB', numero_cuenta='1')
+        clientes = Cliente.objects.bulk_create(
+            Cliente(nombre=f'Cliente {i:04d}', ruc=f'800{i:05d}') for i in range(cls.CLIENTES)
+        )
+        inicio = date(2020, 1, 1)
+        liquidaciones = Liquidacion.objects.bulk_create(
+            Liquidacion(**fabricas.campos_liquidacion(
+                cliente, proveedor, f'{i:04d}-{j:03d}',
+                fecha=inicio + timedelta(days=j),
+                moneda_valor_imponible=moneda,
+                moneda_factura=moneda,
+                total_subtotal=Decimal(1000 + j),
+            ))
+            for i, cliente in enumerate(clientes)
+            for j in range(cls.LIQUIDACIONES_POR_CLIENTE)
+        )
+        LiquidacionItem.objects.bulk_create(
+            LiquidacionItem(liquidacion=liquidacion, item='Honorarios', monto=Decimal('1000'))
+            for liquidacion in liquidaciones
+        )
+        Pago.objects.bulk_create(
+            Pago(liquidacion=liquidacion, banco=banco, fecha=liquidacion.fecha, monto=Decimal('500'))
+            for liquidacion in liquidaciones
+        )
+        Liquidacion.objects.actualizar_busqueda()
+        with connection.cursor() as cursor:
+            for tabla in cls.TABLAS_GRANDES:
+                cursor.execute(f'ANALYZE {tabla}')
+        cls.cliente = clientes[len(clientes) // 2]
+        cls.liquidacion = liquidaciones[len(liquidaciones) // 2]
+
+    def assertSinSeqScan(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + sql)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+            for tabla in self.TABLAS_GRANDES:
+                self.assertNotIn(f'Seq Scan on {tabla}', plan, f'{url}\n{sql}\n{plan}')
+
+    def test_estado_cuenta(self):
+        self.assertSinSeqScan(reverse('clientes:estado_cuenta', args=[self.cliente.pk]))
+
+    def test_liquidacion_list(self):
+        self.assertSinSeqScan(reverse('liquidacion_list'))
+        self.assertSinSeqScan(reverse('liquidacion_list'), {'orden': '-total'})
+
+    def test_pago_list(self):
+        self.assertSinSeqScan(reverse('pago_list'))
+
+    def test_liquidacion_autocomplete(self):
+        self.assertSinSeqScan(
+            reverse('liquidacion_autocomplete'), {'q': self.liquidacion.numero_despacho}
+        )
+        self.assertSinSeqScan(reverse('liquidacion_autocomplete'), {'id': self.liquidacion.pk})
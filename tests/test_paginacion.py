@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import Banco, Pago, Procedencia, Proveedor
+from sgb.pagination import KeysetPaginator
+from tests import fabricas
+
+
+class KeysetPaginatorTestCase(TestCase):
+    """Tests for keyset (seek) pagination"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Paraguay')
+        )
+        liquidacion = fabricas.crear_liquidacion(cliente, proveedor, '001', fecha='2026-01-01')
+        banco = Banco.objects.create(nombre='Banco', titular='SGB', numero_cuenta='1')
+        # Several pagos share the same fecha so the id tie-breaker matters
+        for i in range(25):
+            Pago.objects.create(
+                liquidacion=liquidacion, banco=banco,
+                fecha=date(2026, 1, 1) + timedelta(days=i // 3),
+                monto=Decimal('1000'), referencia=f'REF-{i:02d}'
+            )
+        self.esperados = list(
+            Pago.objects.order_by('-fecha', '-id').values_list('pk', flat=True)
+        )
+
+    def recorrer(self, paginator):
+        """Walk forward through every page, returning the page id lists"""
+        paginas = []
+        page = paginator.get_page(None)
+        paginas.append([pago.pk for pago in page])
+        while page.has_next():
+            page = paginator.get_page(page.next_page_number())
+            paginas.append([pago.pk for pago in page])
+        return paginas, page
+
+    def test_forward_pages_cover_all_rows_in_order(self):
+        paginas, _ = self.recorrer(KeysetPaginator(Pago.objects.all(), 10))
+        self.assertEqual([len(p) for p in paginas], [10, 10, 5])
+        self.assertEqual(sum(paginas, []), self.esperados)
+
+    def test_backward_pages(self):
+        paginator = KeysetPaginator(Pago.objects.all(), 10)
+        paginas, page = self.recorrer(paginator)
+        self.assertFalse(page.has_next())
+        page = paginator.get_page(page.previous_page_number())
+        self.assertEqual([pago.pk for pago in page], paginas[1])
+        self.assertTrue(page.has_previous())
+        page = paginator.get_page(page.previous_page_number())
+        self.assertEqual([pago.pk for pago in page], paginas[0])
+        self.assertFalse(page.has_previous())
+
+    def test_ascending_order(self):
+        paginas, _ = self.recorrer(
+            KeysetPaginator(Pago.objects.all(), 7, orden=('fecha', 'id'))
+        )
+        self.assertEqual(sum(paginas, []), self.esperados[::-1])
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(Pago.objects.all(), 10)
+        for cursor in ['2', 'no-es-un-cursor', 'W10']:
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual([pago.pk for pago in page], self.esperados[:10])
+
+    def test_mixed_directions_are_rejected(self):
+        with self.assertRaises(ValueError):
+            KeysetPaginator(Pago.objects.all(), 10, orden=('-fecha', 'id'))
+
+    def test_cached_count(self):
+        paginator = KeysetPaginator(Pago.objects.all(), 10)
+        self.assertEqual(paginator.count, 25)
+        with self.assertNumQueries(0):
+            self.assertEqual(KeysetPaginator(Pago.objects.all(), 10).count, 25)
+
+    def test_pago_list_next_link(self):
+        url = reverse('pago_list')
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertEqual([pago.pk for pago in page], self.esperados[:10])
+
+        response = self.client.get(url, {'page': page.next_page_number()})
+        self.assertEqual(
+            [pago.pk for pago in response.context['page_obj']], self.esperados[10:20]
+        )
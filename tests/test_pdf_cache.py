@@ -0,0 +1,83 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones import pdf_cache, pdf_utils
+from liquidaciones.models import Procedencia, Proveedor, Liquidacion, LiquidacionItem
+from tests import fabricas
+
+
+class PdfCacheTestCase(TestCase):
+    """Tests for the content-addressed liquidacion PDF cache"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['pdf'].clear()
+        self.client = Client()
+        proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Brasil')
+        )
+        self.liquidacion = fabricas.crear_liquidacion(
+            Cliente.objects.create(nombre='Juan Pérez', ruc='12345678'), proveedor, '001'
+        )
+        self.item = LiquidacionItem.objects.create(
+            liquidacion=self.liquidacion, item='Honorarios', monto=Decimal('1000000'),
+            iva=Decimal('100000')
+        )
+        self.url = reverse('liquidacion_pdf', args=[self.liquidacion.pk])
+
+    def get_pdf(self, **headers):
+        with mock.patch.object(
+            pdf_utils, 'generar_pdf_liquidacion', wraps=pdf_utils.generar_pdf_liquidacion
+        ) as generar:
+            response = self.client.get(self.url, **headers)
+        return response, generar.call_count
+
+    def test_second_request_is_served_from_cache(self):
+        response, renders = self.get_pdf()
+        self.assertEqual(renders, 1)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        otra, renders = self.get_pdf()
+        self.assertEqual(renders, 0)
+        self.assertEqual(otra.content, response.content)
+        self.assertEqual(otra['ETag'], response['ETag'])
+
+    def test_conditional_requests(self):
+        response, _ = self.get_pdf()
+        no_modificado, renders = self.get_pdf(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+        self.assertEqual(renders, 0)
+
+        no_modificado, _ = self.get_pdf(HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(no_modificado.status_code, 304)
+
+        response, _ = self.get_pdf(HTTP_IF_NONE_MATCH='"otro"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_editing_an_item_invalidates(self):
+        response, _ = self.get_pdf()
+        huella = response['ETag'].strip('"')
+        self.assertIsNotNone(caches['pdf'].get(f'pdf:{huella}'))
+
+        self.item.monto = Decimal('2000000')
+        self.item.save()
+        self.assertIsNone(caches['pdf'].get(f'pdf:{huella}'))
+        self.assertIsNone(caches['pdf'].get(f'pdf:liquidacion:{self.liquidacion.pk}'))
+
+        nuevo, renders = self.get_pdf(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(nuevo.status_code, 200)
+        self.assertEqual(renders, 1)
+        self.assertNotEqual(nuevo['ETag'], response['ETag'])
+
+    def test_fingerprint_includes_code_version(self):
+        liquidacion = Liquidacion.objects.get(pk=self.liquidacion.pk)
+        huella = pdf_cache.huella(liquidacion)
+        self.assertEqual(huella, pdf_cache.huella(liquidacion))
+        with mock.patch.object(pdf_cache, 'VERSION', 'otra'):
+            self.assertNotEqual(pdf_cache.huella(liquidacion), huella)
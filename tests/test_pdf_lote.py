@@ -0,0 +1,131 @@
+from decimal import Decimal
+from io import BytesIO, StringIO
+import os
+import tempfile
+import zipfile
+
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones import pdf_lote
+from liquidaciones.models import (
+    Procedencia, Proveedor, LiquidacionItem, PlanillaGastos, TrabajoPdf,
+)
+from tests import fabricas
+
+
+@override_settings(PDF_LOTE_PROCESOS=0)
+class PdfLoteTestCase(TestCase):
+    """Tests for batch PDF generation"""
+
+    def setUp(self):
+        self.client = Client()
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        otro = Cliente.objects.create(nombre='Otro', ruc='1')
+        proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Brasil')
+        )
+        self.planilla = PlanillaGastos.objects.create(fecha='2026-01-31', numero_planilla='PG-1')
+        self.liquidaciones = []
+        for i, cliente in enumerate([self.cliente, self.cliente, self.cliente, otro]):
+            liquidacion = fabricas.crear_liquidacion(
+                cliente, proveedor, f'{i:03d}', fecha=f'2026-01-{i + 10}',
+                planilla_gastos=self.planilla if i == 0 else None,
+            )
+            LiquidacionItem.objects.create(
+                liquidacion=liquidacion, item='Honorarios', monto=Decimal('1000000'),
+                iva=Decimal('100000')
+            )
+            self.liquidaciones.append(liquidacion)
+
+    def test_zip_endpoint(self):
+        url = reverse('liquidacion_pdf_lote')
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'cliente': self.cliente.pk})
+            contenido = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archivo = zipfile.ZipFile(BytesIO(contenido))
+        self.assertEqual(archivo.namelist(), [
+            'Liquidacion_LIQ-000.pdf', 'Liquidacion_LIQ-001.pdf', 'Liquidacion_LIQ-002.pdf',
+            'tiempos.csv',
+        ])
+        self.assertTrue(archivo.read('Liquidacion_LIQ-000.pdf').startswith(b'%PDF'))
+        tiempos = archivo.read('tiempos.csv').decode().splitlines()
+        self.assertEqual(len(tiempos), 4)
+
+    def test_filters(self):
+        casos = [
+            ({'planilla_gastos': self.planilla.pk}, ['LIQ-000']),
+            ({'desde': '2026-01-12'}, ['LIQ-002', 'LIQ-003']),
+            ({'cliente': self.cliente.pk, 'hasta': '2026-01-11'}, ['LIQ-000', 'LIQ-001']),
+        ]
+        for filtros, esperados in casos:
+            with self.subTest(filtros=filtros):
+                filtros = {clave: valor for clave, valor in filtros.items()}
+                if 'cliente' in filtros:
+                    filtros['cliente'] = Cliente.objects.get(pk=filtros['cliente'])
+                if 'planilla_gastos' in filtros:
+                    filtros['planilla_gastos'] = self.planilla
+                liquidaciones = pdf_lote.liquidaciones_para_pdf(**filtros)
+                self.assertEqual(
+                    [liq.numero_liquidacion for liq in liquidaciones], esperados
+                )
+
+    def test_merged_pdf_endpoint(self):
+        response = self.client.get(
+            reverse('liquidacion_pdf_lote'), {'desde': '2026-01-01', 'formato': 'pdf'}
+        )
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertIn('render;dur=', response['Server-Timing'])
+        self.assertGreaterEqual(response.content.count(b'/Type /Page\n'), 4)
+
+    def test_requires_a_filter(self):
+        response = self.client.get(reverse('liquidacion_pdf_lote'))
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PDF_LOTE_MAXIMO=2)
+    def test_batch_size_limit(self):
+        # Only a COUNT (and the cliente of the filter) before rejecting
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('liquidacion_pdf_lote'), {'cliente': self.cliente.pk}
+            )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PDF_LOTE_SINCRONO=2)
+    def test_large_batch_goes_to_the_queue(self):
+        response = self.client.get(
+            reverse('liquidacion_pdf_lote'), {'cliente': self.cliente.pk, 'formato': 'pdf'}
+        )
+        self.assertEqual(response.status_code, 202)
+        trabajo = TrabajoPdf.objects.get(pk=response.json()['id'])
+        self.assertEqual(trabajo.estado, TrabajoPdf.EstadoChoices.PENDIENTE)
+        self.assertEqual(trabajo.formato, TrabajoPdf.FormatoChoices.PDF)
+        self.assertEqual(trabajo.filtros['cliente'], self.cliente.pk)
+
+    def test_process_pool(self):
+        liquidaciones = list(pdf_lote.liquidaciones_para_pdf(cliente=self.cliente))
+        resultados = list(pdf_lote.renderizar(liquidaciones, procesos=2))
+        self.assertEqual(
+            [r.liquidacion_id for r in resultados], [liq.pk for liq in liquidaciones]
+        )
+        self.assertTrue(all(r.contenido.startswith(b'%PDF') for r in resultados))
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = os.path.join(directorio, 'lote.zip')
+            out = StringIO()
+            call_command(
+                'generar_pdfs', salida, '--cliente', str(self.cliente.pk),
+                '--procesos', '0', stdout=out
+            )
+            self.assertEqual(len(zipfile.ZipFile(salida).namelist()), 4)
+            self.assertIn('Liquidacion_LIQ-002.pdf:', out.getvalue())
+
+            salida = os.path.join(directorio, 'lote.pdf')
+            call_command('generar_pdfs', salida, '--desde', '2026-01-01', stdout=StringIO())
+            with open(salida, 'rb') as archivo:
+                self.assertTrue(archivo.read().startswith(b'%PDF'))
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+import zipfile
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from clientes.models import Cliente
+from liquidaciones import pdf_lote
+from liquidaciones.models import Procedencia, Proveedor, TrabajoPdf
+from tests import fabricas
+
+
+@override_settings(PDF_LOTE_PROCESOS=0)
+class TrabajoPdfTestCase(TestCase):
+    """Tests for the database-backed PDF job queue"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['pdf'].clear()
+        self.client = Client()
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Brasil')
+        )
+        self.liquidaciones = []
+        for i in range(3):
+            liquidacion = fabricas.crear_liquidacion(
+                self.cliente, proveedor, f'{i:03d}', Decimal('1000000'),
+                fecha=f'2026-01-{i + 10}',
+            )
+            self.liquidaciones.append(liquidacion)
+
+    def encolar(self, datos):
+        with mock.patch.object(pdf_lote, 'renderizar') as renderizar:
+            response = self.client.post(reverse('trabajo_pdf_encolar'), datos)
+        # Nothing is rendered during the request
+        renderizar.assert_not_called()
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def procesar(self):
+        call_command('procesar_trabajos_pdf', '--una-vez', stdout=StringIO(), stderr=StringIO())
+
+    def test_single_liquidacion(self):
+        trabajo = self.encolar({'liquidacion': self.liquidaciones[0].pk})
+        self.assertEqual(trabajo['estado'], 'pendiente')
+        self.assertNotIn('url_descarga', trabajo)
+        descarga = reverse('trabajo_pdf_descargar', args=[trabajo['id']])
+        self.assertEqual(self.client.get(descarga).status_code, 409)
+
+        self.procesar()
+        estado = self.client.get(trabajo['url_estado']).json()
+        self.assertEqual((estado['estado'], estado['progreso']), ('terminado', 100))
+        response = self.client.get(estado['url_descarga'])
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('Liquidacion_LIQ-000.pdf', response['Content-Disposition'])
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_batch_zip_reports_progress(self):
+        trabajo = self.encolar({'cliente': self.cliente.pk, 'formato': 'zip'})
+        self.procesar()
+        estado = self.client.get(trabajo['url_estado']).json()
+        self.assertEqual((estado['procesados'], estado['total']), (3, 3))
+        archivo = zipfile.ZipFile(BytesIO(self.client.get(estado['url_descarga']).content))
+        self.assertEqual(len(archivo.namelist()), 4)
+
+        trabajo = self.encolar({'desde': '2026-01-11', 'formato': 'pdf'})
+        self.procesar()
+        self.assertEqual(TrabajoPdf.objects.get(pk=trabajo['id']).total, 2)
+
+    def test_jobs_are_taken_in_order(self):
+        primero = self.encolar({'liquidacion': self.liquidaciones[0].pk})
+        self.encolar({'liquidacion': self.liquidaciones[1].pk})
+        trabajo = TrabajoPdf.objects.tomar()
+        self.assertEqual(trabajo.pk, primero['id'])
+        self.assertEqual(trabajo.estado, 'procesando')
+        self.assertNotEqual(TrabajoPdf.objects.tomar().pk, primero['id'])
+        self.assertIsNone(TrabajoPdf.objects.tomar())
+
+    @override_settings(PDF_TRABAJOS_PLAZO=60)
+    def test_abandoned_jobs_are_taken_again(self):
+        trabajo = self.encolar({'cliente': self.cliente.pk})
+        self.assertEqual(trabajo['total'], 3)
+        tomado = TrabajoPdf.objects.tomar()
+        TrabajoPdf.objects.filter(pk=tomado.pk).update(procesados=2)
+        # A job still within the lease is not taken by another worker
+        self.assertIsNone(TrabajoPdf.objects.tomar())
+
+        TrabajoPdf.objects.filter(pk=tomado.pk).update(
+            iniciado=timezone.now() - timedelta(seconds=61)
+        )
+        retomado = TrabajoPdf.objects.tomar()
+        self.assertEqual(retomado.pk, tomado.pk)
+        self.assertEqual(retomado.procesados, 0)
+        self.assertIsNone(TrabajoPdf.objects.tomar())
+
+    @override_settings(PDF_LOTE_MAXIMO=2)
+    def test_batch_limit_when_enqueuing(self):
+        response = self.client.post(reverse('trabajo_pdf_encolar'), {'cliente': self.cliente.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('el máximo es 2', response.json()['errores']['__all__'][0]['message'])
+        self.assertFalse(TrabajoPdf.objects.exists())
+
+    def test_batch_limit_when_processing(self):
+        trabajo = self.encolar({'cliente': self.cliente.pk})
+        with override_settings(PDF_LOTE_MAXIMO=2), \
+                self.assertLogs('liquidaciones.pdf_trabajos', 'ERROR'):
+            self.procesar()
+        estado = self.client.get(trabajo['url_estado']).json()
+        self.assertEqual(estado['estado'], 'error')
+        self.assertIn('el máximo es 2', estado['error'])
+
+    def test_error_without_message(self):
+        trabajo = self.encolar({'liquidacion': self.liquidaciones[0].pk})
+        TrabajoPdf.objects.filter(pk=trabajo['id']).update(
+            estado=TrabajoPdf.EstadoChoices.ERROR, error='  \n'
+        )
+        self.assertEqual(self.client.get(trabajo['url_estado']).json()['error'], '')
+
+    def test_render_error(self):
+        trabajo = self.encolar({'cliente': self.cliente.pk})
+        with mock.patch.object(pdf_lote, 'renderizar', side_effect=ValueError('sin fuentes')), \
+                self.assertLogs('liquidaciones.pdf_trabajos', 'ERROR'):
+            self.procesar()
+        estado = self.client.get(trabajo['url_estado']).json()
+        self.assertEqual(estado['estado'], 'error')
+        self.assertEqual(estado['error'], 'ValueError: sin fuentes')
+
+    def test_invalid_requests(self):
+        url = reverse('trabajo_pdf_encolar')
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url, {}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'liquidacion': 999}).status_code, 400)
+
+    @override_settings(PDF_TRABAJOS_DIAS=7)
+    def test_old_jobs_are_purged(self):
+        trabajo = self.encolar({'liquidacion': self.liquidaciones[0].pk})
+        self.procesar()
+        TrabajoPdf.objects.filter(pk=trabajo['id']).update(
+            terminado=timezone.now() - timedelta(days=8)
+        )
+        self.procesar()
+        self.assertFalse(TrabajoPdf.objects.exists())
@@ -0,0 +1,147 @@
+from decimal import Decimal
+from io import StringIO
+import random
+import re
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from reportlab import rl_config
+
+from liquidaciones import pdf_utils
+from liquidaciones.pdf_utils import numero_a_letras
+from liquidaciones.models import Liquidacion
+
+
+class KitRenderTestCase(TestCase):
+    """Tests for the process-wide ReportLab render kit"""
+
+    def test_kit_is_built_once_per_process(self):
+        kit = pdf_utils.kit_render()
+        self.assertIs(pdf_utils.kit_render(), kit)
+        self.assertIsNotNone(kit.logo)
+        with mock.patch.object(pdf_utils, 'getSampleStyleSheet') as hoja:
+            pdf_utils.kit_render()
+        hoja.assert_not_called()
+
+    def test_ascii85_setting_is_restored(self):
+        liquidacion = mock.MagicMock()
+        with mock.patch.object(pdf_utils, 'contenido_pdf_liquidacion', return_value=[]), \
+                mock.patch.object(pdf_utils, 'SimpleDocTemplate') as documento:
+            documento.return_value.build.side_effect = (
+                lambda story: self.assertEqual(rl_config.useA85, 0)
+            )
+            pdf_utils.generar_pdf_liquidacion(liquidacion)
+            pdf_utils.generar_pdf_liquidaciones([liquidacion])
+            documento.return_value.build.side_effect = (
+                lambda story: self.assertEqual(rl_config.useA85, 1)
+            )
+            pdf_utils.generar_pdf_liquidacion(liquidacion, ascii85=True)
+        self.assertEqual(documento.return_value.build.call_count, 3)
+        self.assertEqual(rl_config.useA85, 1)
+
+    def test_shared_kit_renders_the_same_document(self):
+        out = StringIO()
+        call_command('benchmark_pdf', '--repeticiones', '1', '--items', '1', '3', stdout=out)
+        self.assertIn('1 item(s): antes', out.getvalue())
+        self.assertIn('3 item(s):', out.getvalue())
+        # Benchmark data is rolled back
+        self.assertFalse(Liquidacion.objects.exists())
+
+
+VALORES = {
+    texto: valor for valor, texto in enumerate(pdf_utils._GRUPOS[:30]) if texto
+}
+VALORES.update({
+    texto: valor * 10 for valor, texto in enumerate(pdf_utils._DECENAS) if texto
+})
+VALORES.update({
+    texto: valor * 100 for valor, texto in enumerate(pdf_utils._CENTENAS) if texto
+})
+VALORES.update({'un': 1, 'veintiún': 21, 'cien': 100, 'cero': 0})
+ESCALAS = {
+    'millón': 10**6, 'millones': 10**6, 'billón': 10**12, 'billones': 10**12,
+    'trillón': 10**18, 'trillones': 10**18,
+}
+
+# Double spaces, a trailing apocope and "uno mil" / "un mil" / "uno millones"
+MAL_FORMADO = re.compile(
+    r'  | un$|veintiún$|\buno (mil|millón|millones|billones|trillones)\b'
+    r'|(^|, |menos )un mil\b'
+)
+
+
+def letras_a_numero(texto):
+    """Inverse of numero_a_letras, used to check round trips"""
+    signo = 1
+    if texto.startswith('menos '):
+        signo, texto = -1, texto[len('menos '):]
+    texto, _, centavos = texto.partition(' con ')
+    total = bloque = grupo = 0
+    for palabra in texto.replace(',', '').split():
+        if palabra == 'y':
+            continue
+        if palabra == 'mil':
+            bloque += (grupo or 1) * 1000
+            grupo = 0
+        elif palabra in ESCALAS:
+            total += (bloque + grupo) * ESCALAS[palabra]
+            bloque = grupo = 0
+        else:
+            grupo += VALORES[palabra]
+    total += bloque + grupo
+    if centavos:
+        total += Decimal(letras_a_numero(centavos.rsplit(' ', 1)[0])) / 100
+    return signo * total
+
+
+class NumeroALetrasTestCase(TestCase):
+    """Tests for the table-driven numero_a_letras"""
+
+    def assertBienFormado(self, numero, texto):
+        if letras_a_numero(texto) != numero or MAL_FORMADO.search(texto):
+            self.fail(f'{numero}: {texto!r}')
+
+    def test_known_values(self):
+        casos = [
+            (0, 'cero'),
+            (16, 'dieciséis'),
+            (100, 'cien'),
+            (101, 'ciento uno'),
+            (21000, 'veintiún mil'),
+            (1234567, 'un millón, doscientos treinta y cuatro mil, quinientos sesenta y siete'),
+            (1500000000, 'mil quinientos millones'),
+            (2 * 10**12 + 31 * 10**6, 'dos billones, treinta y un millones'),
+            (10**18, 'un trillón'),
+            (Decimal('1250.50'), 'mil, doscientos cincuenta con cincuenta centavos'),
+            (Decimal('0.01'), 'cero con un centavo'),
+            (Decimal('-21.999'), 'menos veintidós'),
+        ]
+        for numero, esperado in casos:
+            with self.subTest(numero=numero):
+                self.assertEqual(numero_a_letras(numero), esperado)
+
+    def test_every_amount_below_a_million(self):
+        for numero in range(1_000_000):
+            self.assertBienFormado(numero, numero_a_letras(numero))
+
+    def test_every_group_at_every_scale(self):
+        for grupo in range(1, 1000):
+            for escala in (10**3, 10**6, 10**9, 10**12, 10**15, 10**18, 10**21):
+                numero = grupo * escala + grupo
+                self.assertBienFormado(numero, numero_a_letras(numero))
+
+    def test_random_amounts_with_cents(self):
+        generador = random.Random(0)
+        for _ in range(20000):
+            numero = Decimal(generador.randrange(10**26)) / 100 * generador.choice([1, -1])
+            self.assertBienFormado(numero, numero_a_letras(numero))
+
+    def test_limit(self):
+        with self.assertRaises(ValueError):
+            numero_a_letras(10**24)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_letras', '--cantidad', '1000', stdout=out)
+        self.assertIn('1000 importes en', out.getvalue())
@@ -0,0 +1,90 @@
+from contextlib import redirect_stdout
+from io import StringIO
+import json
+import logging
+import sys
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from clientes.models import Cliente
+from sgb import registro
+from sgb.registro import FormatoJSON
+
+
+class FormatoJSONTestCase(TestCase):
+    """Tests for the JSON log formatter"""
+
+    def registro(self, **kwargs):
+        return logging.makeLogRecord({
+            'name': 'liquidaciones.views', 'levelno': logging.INFO, 'levelname': 'INFO',
+            'msg': 'Liquidación %s creada', 'args': (7,), **kwargs,
+        })
+
+    def test_one_json_line_with_extra_fields(self):
+        linea = FormatoJSON().format(self.registro(consultas=3, ruta='liquidacion_create'))
+        self.assertNotIn('\n', linea)
+        datos = json.loads(linea)
+        self.assertEqual(datos['mensaje'], 'Liquidación 7 creada')
+        self.assertEqual(datos['logger'], 'liquidaciones.views')
+        self.assertEqual(datos['nivel'], 'INFO')
+        self.assertEqual(datos['consultas'], 3)
+        self.assertEqual(datos['ruta'], 'liquidacion_create')
+        self.assertNotIn('args', datos)
+
+    def test_exception_and_non_json_values(self):
+        try:
+            raise ValueError('sin fuentes')
+        except ValueError:
+            entrada = self.registro(exc_info=sys.exc_info(), objeto=object())
+        datos = json.loads(FormatoJSON().format(entrada))
+        self.assertIn('ValueError: sin fuentes', datos['excepcion'])
+        self.assertIn('object', datos['objeto'])
+
+
+class TiempoPeticionTestCase(TestCase):
+    """Tests for the request timing middleware and the view logging"""
+
+    def setUp(self):
+        Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+
+    def test_request_line_with_route_and_queries(self):
+        with self.assertLogs('sgb.peticiones', 'INFO') as registros:
+            self.client.get(reverse('clientes:cliente_list'))
+        entrada, = registros.records
+        self.assertEqual(entrada.metodo, 'GET')
+        self.assertEqual(entrada.ruta, 'clientes:cliente_list')
+        self.assertEqual(entrada.estado, 200)
+        self.assertGreater(entrada.consultas, 0)
+        self.assertGreaterEqual(entrada.duracion_ms, entrada.tiempo_db_ms)
+
+    def test_unresolved_path(self):
+        with self.assertLogs('sgb.peticiones', 'INFO') as registros:
+            self.client.get('/no-existe/')
+        entrada, = registros.records
+        self.assertIsNone(entrada.ruta)
+        self.assertEqual(entrada.estado, 404)
+        self.assertIn('/no-existe/', entrada.getMessage())
+
+    def test_disabled_logger_is_not_measured(self):
+        logger = registro.logger
+        nivel = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            with mock.patch.object(logger, 'log') as log, \
+                    mock.patch.object(registro, 'medir') as medicion:
+                self.client.get(reverse('clientes:cliente_list'))
+        finally:
+            logger.setLevel(nivel)
+        log.assert_not_called()
+        medicion.assert_not_called()
+
+    def test_views_do_not_print_the_payload(self):
+        salida = StringIO()
+        with redirect_stdout(salida), \
+                self.assertLogs('clientes.views', 'INFO') as registros:
+            self.client.post(reverse('clientes:cliente_create'), {'ruc': 'secreto-123'})
+        self.assertEqual(salida.getvalue(), '')
+        self.assertIn('Formulario de cliente inválido', registros.output[0])
+        self.assertNotIn('secreto-123', registros.output[0])
@@ -0,0 +1,115 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from clientes import estado_cuenta
+from clientes.models import Cliente
+from liquidaciones.models import Banco, Pago, Procedencia, Proveedor, LiquidacionItem, SaldoMensual
+from tests import fabricas
+
+
+class SaldoMensualTestCase(TestCase):
+    """Tests for the monthly balance snapshots"""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        self.proveedor = Proveedor.objects.create(
+            nombre='Proveedor S.A.', procedencia=Procedencia.objects.create(nombre='Brasil')
+        )
+        self.banco = Banco.objects.create(nombre='Banco', titular='SGB', numero_cuenta='1')
+        self.enero = self.crear_liquidacion('2026-01-10', Decimal('1000'))
+        self.marzo = self.crear_liquidacion('2026-03-05', Decimal('500'))
+        self.pago = Pago.objects.create(
+            liquidacion=self.enero, banco=self.banco, fecha='2026-02-15', monto=Decimal('800')
+        )
+
+    def crear_liquidacion(self, fecha, monto):
+        return fabricas.crear_liquidacion(
+            self.cliente, self.proveedor, fecha, monto, fecha=fecha
+        )
+
+    def saldos(self):
+        return list(SaldoMensual.objects.values_list(
+            'mes', 'total_liquidaciones', 'total_pagos', 'saldo_cierre'
+        ))
+
+    def assertSaldosCoinciden(self):
+        esperados = [
+            (fila.mes, fila.total_liquidaciones, fila.total_pagos, fila.saldo_cierre)
+            for fila in SaldoMensual.objects.calcular()
+        ]
+        self.assertEqual(self.saldos(), esperados)
+
+    def test_maintained_on_create(self):
+        self.assertEqual(self.saldos(), [
+            (date(2026, 1, 1), Decimal('1000'), Decimal('0'), Decimal('-1000')),
+            (date(2026, 2, 1), Decimal('0'), Decimal('800'), Decimal('-200')),
+            (date(2026, 3, 1), Decimal('500'), Decimal('0'), Decimal('-700')),
+        ])
+
+    def test_item_change_carries_to_later_months(self):
+        LiquidacionItem.objects.create(liquidacion=self.enero, item='Gastos', monto=Decimal('100'))
+        self.assertSaldosCoinciden()
+        self.assertEqual(SaldoMensual.objects.last().saldo_cierre, Decimal('-800'))
+
+    def test_liquidacion_moves_month(self):
+        self.marzo.refresh_from_db()
+        self.marzo.fecha = date(2025, 12, 20)
+        self.marzo.save()
+        self.assertSaldosCoinciden()
+        self.assertEqual(
+            [fila[0] for fila in self.saldos()],
+            [date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)],
+        )
+
+    def test_liquidacion_moves_cliente_with_pagos_in_other_months(self):
+        otro = Cliente.objects.create(nombre='Ana Gómez', ruc='87654321')
+        self.enero.refresh_from_db()
+        self.enero.cliente = otro
+        self.enero.save()
+        self.assertSaldosCoinciden()
+        # The February pago moved with its liquidacion
+        totales = estado_cuenta.resumen(self.cliente.pk, date(2026, 3, 1), date(2026, 3, 31))
+        self.assertEqual(totales['saldo_inicial'], Decimal('0'))
+        totales = estado_cuenta.resumen(otro.pk, date(2026, 3, 1), date(2026, 3, 31))
+        self.assertEqual(totales['saldo_inicial'], Decimal('-200'))
+
+    def test_pago_changes_and_delete(self):
+        self.pago.fecha = date(2026, 3, 1)
+        self.pago.monto = Decimal('900')
+        self.pago.save()
+        self.assertSaldosCoinciden()
+        self.pago.delete()
+        self.assertSaldosCoinciden()
+        self.marzo.delete()
+        self.assertSaldosCoinciden()
+        self.assertEqual(len(self.saldos()), 1)
+
+    def test_cliente_delete_cascades(self):
+        Pago.objects.all().delete()
+        self.cliente.delete()
+        self.assertFalse(SaldoMensual.objects.exists())
+
+    def test_rebuild_command(self):
+        esperados = self.saldos()
+        SaldoMensual.objects.update(saldo_cierre=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_saldos_mensuales', '--check', stdout=StringIO(), stderr=StringIO())
+        call_command('rebuild_saldos_mensuales', stdout=StringIO())
+        self.assertEqual(self.saldos(), esperados)
+        call_command('rebuild_saldos_mensuales', '--check', stdout=StringIO())
+
+    def test_estado_cuenta_starts_from_snapshot(self):
+        totales = estado_cuenta.resumen(self.cliente.pk, date(2026, 3, 1), date(2026, 3, 31))
+        self.assertEqual(totales['saldo_inicial'], Decimal('-200'))
+        # Mid-month: snapshot up to February plus the March rows before desde
+        totales = estado_cuenta.resumen(self.cliente.pk, date(2026, 3, 10), date(2026, 3, 31))
+        self.assertEqual(totales['saldo_inicial'], Decimal('-700'))
+        # Earlier history is read from the snapshot, not replayed
+        SaldoMensual.objects.filter(mes=date(2026, 2, 1)).update(saldo_cierre=Decimal('5'))
+        totales = estado_cuenta.resumen(self.cliente.pk, date(2026, 3, 1), date(2026, 3, 31))
+        self.assertEqual(totales['saldo_inicial'], Decimal('5'))
@@ -0,0 +1,119 @@
+from io import StringIO
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from clientes.models import Cliente
+from liquidaciones import sembrado
+from liquidaciones.management.commands.benchmark_vistas import CASOS
+from liquidaciones.models import (
+    Liquidacion, LiquidacionItem, Pago, PlanillaGastos, PlanillaGastosItem, SaldoMensual,
+)
+from sgb import estadisticas
+
+
+class SembradoTestCase(TestCase):
+    """Tests for the synthetic data generator behind seed_bench"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_volumes_and_derived_data(self):
+        conteos = estadisticas.obtener()
+        volumenes = sembrado.volumenes(40, clientes=4)
+        self.assertEqual(volumenes, {
+            'liquidaciones': 40, 'clientes': 4, 'proveedores': 1,
+            'planillas': 1, 'items': 400, 'pagos': 80,
+        })
+        # A small batch size spreads the rows over several transactions
+        sembrado.sembrar(volumenes, lote=15)
+
+        self.assertEqual(Liquidacion.objects.count(), 40)
+        self.assertEqual(LiquidacionItem.objects.count(), 400)
+        self.assertEqual(Pago.objects.count(), 80)
+        self.assertEqual(Cliente.objects.count(), 4)
+        self.assertEqual(PlanillaGastosItem.objects.count(), sembrado.ITEMS_POR_PLANILLA)
+
+        campos = ('pk', 'total_monto', 'total_iva', 'total_retencion', 'total_subtotal')
+        totales = list(Liquidacion.objects.order_by('pk').values_list(*campos))
+        planillas = list(PlanillaGastos.objects.values_list('pk', 'total_gastos'))
+        Liquidacion.objects.recompute_totals()
+        PlanillaGastos.objects.recompute_totals()
+        self.assertEqual(totales, list(Liquidacion.objects.order_by('pk').values_list(*campos)))
+        self.assertEqual(planillas, list(PlanillaGastos.objects.values_list('pk', 'total_gastos')))
+
+        campos = ('cliente_id', 'mes', 'total_liquidaciones', 'total_pagos', 'saldo_cierre')
+        self.assertEqual(
+            set(SaldoMensual.objects.values_list(*campos)),
+            {tuple(getattr(fila, campo) for campo in campos)
+             for fila in SaldoMensual.objects.calcular()},
+        )
+        self.assertEqual(estadisticas.obtener()['liquidaciones'], conteos['liquidaciones'] + 40)
+
+    def test_same_seed_same_values(self):
+        def sembrar():
+            inicio = Liquidacion.objects.count()
+            sembrado.sembrar(sembrado.volumenes(10), semilla=7)
+            return list(
+                Liquidacion.objects.order_by('pk')[inicio:]
+                .values_list('total_subtotal', 'clase', 'partida_arancelaria')
+            )
+
+        self.assertEqual(sembrar(), sembrar())
+
+    def test_seed_bench_command(self):
+        salida = StringIO()
+        call_command('seed_bench', liquidaciones=20, pagos=0, stdout=salida)
+        self.assertIn('20 liquidaciones', salida.getvalue())
+        self.assertEqual(LiquidacionItem.objects.count(), 200)
+        self.assertFalse(Pago.objects.exists())
+        with self.assertRaises(CommandError):
+            call_command('seed_bench', liquidaciones=5, clientes=0, stdout=StringIO())
+
+
+class BenchmarkVistasTestCase(TestCase):
+    """Tests for the benchmark_vistas harness"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_json_results_by_size_and_comparison(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            anterior = os.path.join(directorio, 'anterior.json')
+            call_command(
+                'benchmark_vistas', tamanos=[50, 100], repeticiones=2, salida=anterior,
+                stdout=StringIO(),
+            )
+            with open(anterior) as archivo:
+                resultado = json.load(archivo)
+
+            salida = StringIO()
+            call_command(
+                'benchmark_vistas', repeticiones=2, casos=['estado_cuenta'],
+                comparar=anterior, stdout=salida,
+            )
+
+        self.assertEqual([t['liquidaciones'] for t in resultado['tamanos']], [50, 100])
+        self.assertEqual(resultado['repeticiones'], 2)
+        casos = resultado['tamanos'][1]['casos']
+        self.assertEqual(set(casos), {nombre for nombre, _ in CASOS})
+        for nombre, caso in casos.items():
+            with self.subTest(caso=nombre):
+                self.assertLessEqual(caso['p50_ms'], caso['max_ms'])
+                self.assertGreater(caso['bytes'], 0)
+        self.assertIn('100 liquidaciones (antes 100)', salida.getvalue())
+        self.assertIn('estado_cuenta', salida.getvalue())
+        # The login user is rolled back
+        self.assertFalse(User.objects.exists())
+
+    def test_empty_database(self):
+        with self.assertRaisesMessage(CommandError, 'seed_bench'):
+            call_command('benchmark_vistas', repeticiones=2, stdout=StringIO())
@@ -0,0 +1,191 @@
+from decimal import Decimal
+from io import StringIO
+import json
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from clientes.models import Cliente
+from liquidaciones.models import (
+    Procedencia, Proveedor, Liquidacion, LiquidacionItem, PlanillaGastos, PlanillaGastosItem,
+    SaldoMensual,
+)
+from sgb.cache import version
+from tests import fabricas
+
+
+class TotalesLiquidacionTestCase(TestCase):
+    """Tests for the database-side totals of Liquidacion"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.cliente = Cliente.objects.create(nombre='Juan Pérez', ruc='12345678')
+        procedencia = Procedencia.objects.create(nombre='Paraguay')
+        self.proveedor = Proveedor.objects.create(
+            nombre='Proveedor Paraguay S.A.',
+            procedencia=procedencia
+        )
+        self.liquidaciones = [self.crear_liquidacion(i) for i in range(5)]
+        for liquidacion in self.liquidaciones:
+            LiquidacionItem.objects.create(
+                liquidacion=liquidacion, item='Honorarios',
+                monto=Decimal('1000'), iva=Decimal('100'), retencion=Decimal('0')
+            )
+            LiquidacionItem.objects.create(
+                liquidacion=liquidacion, item='Gastos',
+                monto=Decimal('500'), iva=Decimal('50'), retencion=Decimal('25')
+            )
+        # One liquidacion without items
+        self.vacia = self.crear_liquidacion(99)
+
+    def crear_liquidacion(self, i):
+        return fabricas.crear_liquidacion(
+            self.cliente, self.proveedor, f'{i:03d}', fecha=f'2026-01-{(i % 28) + 1:02d}'
+        )
+
+    def test_persisted_totals_match_aggregates(self):
+        """The persisted columns match the totals aggregated from the items"""
+        for liquidacion in Liquidacion.objects.with_totals():
+            self.assertEqual(liquidacion.total_monto, liquidacion.suma_monto)
+            self.assertEqual(liquidacion.total_iva, liquidacion.suma_iva)
+            self.assertEqual(liquidacion.total_retencion, liquidacion.suma_retencion)
+            self.assertEqual(liquidacion.total_subtotal, liquidacion.suma_subtotal)
+
+    def test_persisted_totals_values(self):
+        liquidacion = Liquidacion.objects.get(pk=self.liquidaciones[0].pk)
+        self.assertEqual(liquidacion.total_monto, Decimal('1500'))
+        self.assertEqual(liquidacion.total_iva, Decimal('150'))
+        self.assertEqual(liquidacion.total_retencion, Decimal('25'))
+        self.assertEqual(liquidacion.valor_total_calculado, Decimal('1625'))
+
+    def test_totals_without_items_are_zero(self):
+        liquidacion = Liquidacion.objects.with_totals().get(pk=self.vacia.pk)
+        self.assertEqual(liquidacion.suma_subtotal, Decimal('0'))
+        self.assertEqual(liquidacion.valor_total_calculado, Decimal('0'))
+
+    def test_totals_follow_item_changes(self):
+        """Saving or deleting an item updates the liquidacion totals"""
+        liquidacion = self.liquidaciones[0]
+        item = liquidacion.liquidacionitem_set.get(item='Gastos')
+        item.monto = Decimal('900')
+        item.save()
+        liquidacion.refresh_from_db()
+        self.assertEqual(liquidacion.total_subtotal, Decimal('2025'))
+
+        item.delete()
+        liquidacion.refresh_from_db()
+        self.assertEqual(liquidacion.total_subtotal, Decimal('1100'))
+
+    def test_saving_a_stale_instance_keeps_the_totals(self):
+        liquidacion = fabricas.crear_liquidacion(
+            self.cliente, self.proveedor, '100', monto=Decimal('300')
+        )
+        liquidacion.numero_factura_comercial = 'FAC-CAMBIADA'
+        liquidacion.save()
+        liquidacion = Liquidacion.objects.get(pk=liquidacion.pk)
+        self.assertEqual(liquidacion.numero_factura_comercial, 'FAC-CAMBIADA')
+        self.assertEqual(liquidacion.total_subtotal, Decimal('300'))
+
+        planilla = PlanillaGastos.objects.create(fecha='2026-01-01', numero_planilla='PG-001')
+        PlanillaGastosItem.objects.create(planilla_gastos=planilla, descripcion='Flete', monto=Decimal('300'))
+        planilla.save()
+        planilla.refresh_from_db()
+        self.assertEqual(planilla.total_gastos, Decimal('300'))
+
+    def test_totals_follow_queryset_deletes(self):
+        """A QuerySet.delete() of items outside the item formsets still updates everything"""
+        autocompletado = version('autocompletar', 'liquidacion')
+        LiquidacionItem.objects.filter(item='Gastos').delete()
+        for liquidacion in Liquidacion.objects.filter(pk__in=[l.pk for l in self.liquidaciones]):
+            self.assertEqual(liquidacion.total_subtotal, Decimal('1100'))
+        saldo = SaldoMensual.objects.get(cliente=self.cliente)
+        self.assertEqual(saldo.total_liquidaciones, Decimal('5500'))
+        self.assertGreater(version('autocompletar', 'liquidacion'), autocompletado)
+
+        planilla = PlanillaGastos.objects.create(fecha='2026-01-01', numero_planilla='PG-001')
+        PlanillaGastosItem.objects.create(planilla_gastos=planilla, descripcion='Flete', monto=Decimal('300'))
+        planilla.planillagastositem_set.all().delete()
+        planilla.refresh_from_db()
+        self.assertEqual(planilla.total_gastos, Decimal('0'))
+
+    def test_item_moved_to_another_liquidacion(self):
+        origen, destino = self.liquidaciones[:2]
+        item = origen.liquidacionitem_set.get(item='Gastos')
+        item.liquidacion = destino
+        item.save()
+        self.assertEqual(Liquidacion.objects.get(pk=origen.pk).total_subtotal, Decimal('1100'))
+        self.assertEqual(Liquidacion.objects.get(pk=destino.pk).total_subtotal, Decimal('2150'))
+        self.assertEqual(
+            list(SaldoMensual.objects.values_list('mes', 'total_liquidaciones')),
+            [(fila.mes, fila.total_liquidaciones) for fila in SaldoMensual.objects.calcular()],
+        )
+
+        planillas = [
+            PlanillaGastos.objects.create(fecha='2026-01-01', numero_planilla=f'PG-00{i}')
+            for i in range(2)
+        ]
+        gasto = PlanillaGastosItem.objects.create(
+            planilla_gastos=planillas[0], descripcion='Flete', monto=Decimal('300')
+        )
+        gasto.planilla_gastos = planillas[1]
+        gasto.save()
+        self.assertEqual(
+            [planilla.total_gastos for planilla in PlanillaGastos.objects.order_by('pk')],
+            [Decimal('0'), Decimal('300')],
+        )
+
+    def test_planilla_total_gastos_follows_items(self):
+        planilla = PlanillaGastos.objects.create(fecha='2026-01-01', numero_planilla='PG-001')
+        PlanillaGastosItem.objects.create(planilla_gastos=planilla, descripcion='Flete', monto=Decimal('300'))
+        gasto = PlanillaGastosItem.objects.create(planilla_gastos=planilla, descripcion='Estiba', monto=Decimal('200'))
+        planilla.refresh_from_db()
+        self.assertEqual(planilla.total_gastos, Decimal('500'))
+
+        gasto.delete()
+        planilla.refresh_from_db()
+        self.assertEqual(planilla.total_gastos, Decimal('300'))
+
+    def test_recompute_totals_command(self):
+        """The command detects and repairs totals changed behind the signals"""
+        Liquidacion.objects.filter(pk=self.liquidaciones[1].pk).update(total_subtotal=0)
+        with self.assertRaises(CommandError):
+            call_command('recompute_totals', '--check', stdout=StringIO(), stderr=StringIO())
+
+        call_command('recompute_totals', stdout=StringIO(), stderr=StringIO())
+        liquidacion = Liquidacion.objects.get(pk=self.liquidaciones[1].pk)
+        self.assertEqual(liquidacion.total_subtotal, Decimal('1625'))
+        call_command('recompute_totals', '--check', stdout=StringIO(), stderr=StringIO())
+
+    def test_liquidacion_list_filter_and_order_by_total(self):
+        url = reverse('liquidacion_list')
+        response = self.client.get(url + '?monto_min=1.000&orden=-total')
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
+        response = self.client.get(url + '?monto_max=0')
+        self.assertEqual(list(response.context['page_obj']), [self.vacia])
+
+    @override_settings(CACHE_UN_PROCESO=True)
+    def test_liquidacion_autocomplete_query_count(self):
+        url = reverse('liquidacion_autocomplete')
+        # The first search loads the in-memory index
+        self.client.get(url + '?q=LIQ')
+        with self.assertNumQueries(1):
+            response = self.client.get(url + '?q=DES')
+        data = json.loads(response.content)
+        self.assertEqual(len(data['results']), 6)
+
+    def test_liquidacion_list_query_count_is_constant(self):
+        """The list page does not query once per row"""
+        url = reverse('liquidacion_list')
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, '1.625 Gs.')
+
+    def test_estado_cuenta_uses_totals(self):
+        url = reverse('clientes:estado_cuenta', args=[self.cliente.pk])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context['total_liquidaciones'], Decimal('8125'))